@@ -12,42 +12,80 @@
 # https://api.pota.app/stats/user/K2EAG
 # {"callsign": "K2EAG", "name": "Matt Brown", "qth": "Amherst, New York", "gravatar": "bf8377378b67b265cbb2be687b13a23a", "activator": {"activations": 72, "parks": 33, "qsos": 3724}, "attempts": {"activations": 80, "parks": 33, "qsos": 3724}, "hunter": {"parks": 237, "qsos": 334}, "awards": 16, "endorsements": 32}
 
+import time
+
+STARTED = time.perf_counter()
+
+# pylint: disable=wrong-import-position
 import argparse
 import datetime
 import sys
-import sqlite3
 import os
 import io
 import logging
-from math import radians, sin, cos, atan2, sqrt, asin, pi
+import threading
 
 from pathlib import Path
+from types import SimpleNamespace
 
 from json import loads, dumps
-import re
-
-from augratin.lib.udp_broadcast import broadcast_adif
+import sqlite3
 
-import psutil
-from PyQt6 import QtCore, QtWidgets, QtGui, uic
+from PyQt6 import QtCore, QtWidgets, QtGui
 from PyQt6.QtCore import QDir, Qt
 from PyQt6.QtGui import QFontDatabase, QColorConstants
 from PyQt6.QtWidgets import QApplication
 
-import PyQt6.QtWebEngineWidgets  # pylint: disable=unused-import
-
-import requests
-import folium
+# QtWebEngine, folium, requests and psutil are imported where they are
+# first used so the window can show before they load.
 
 try:
     from augratin.lib.version import __version__
     from augratin.lib.cat_interface import CAT
+    from augratin.lib.cat_discovery import CATDiscovery
+    from augratin.lib.adif_index import WorkedIndex
+    from augratin.lib.bandplan import BAND_PLAN
+    from augratin.lib.cat_queue import CATCommandQueue
+    from augratin.lib.feed_replay import FeedRecorder
+    from augratin.lib import geo
+    from augratin.lib.headless import run_headless
+    from augratin.lib.icons import IconInstaller
+    from augratin.lib.perf import PERF
+    from augratin.lib.poll_scheduler import PollScheduler
+    from augratin.lib.qso_logger import ADIF_HEADER, QSOLogger
+    from augratin.lib.qso_store import QSOStore
+    from augratin.lib.spot_engine import SpotEngine, getjson, set_recorder
+    from augratin.lib.spot_server import SpotServer
+    from augratin.lib.spot_sources import SpotMerger, telnet_source
+    from augratin.lib.startup import StartupProfile
+    from augratin.lib.ui_build import setup_ui
+    from augratin.lib.watch import WatchAlerts, WatchList, notify
+    from augratin.lib.udp_broadcast import UDPBroadcaster
 
     if sys.platform == "win32":
         from augratin.lib.omnirig_interface import OmniRigClient
 except ModuleNotFoundError:
     from lib.version import __version__
     from lib.cat_interface import CAT
+    from lib.cat_discovery import CATDiscovery
+    from lib.adif_index import WorkedIndex
+    from lib.bandplan import BAND_PLAN
+    from lib.cat_queue import CATCommandQueue
+    from lib.feed_replay import FeedRecorder
+    from lib import geo
+    from lib.headless import run_headless
+    from lib.icons import IconInstaller
+    from lib.perf import PERF
+    from lib.poll_scheduler import PollScheduler
+    from lib.qso_logger import ADIF_HEADER, QSOLogger
+    from lib.qso_store import QSOStore
+    from lib.spot_engine import SpotEngine, getjson, set_recorder
+    from lib.spot_server import SpotServer
+    from lib.spot_sources import SpotMerger, telnet_source
+    from lib.startup import StartupProfile
+    from lib.ui_build import setup_ui
+    from lib.watch import WatchAlerts, WatchList, notify
+    from lib.udp_broadcast import UDPBroadcaster
 
     if sys.platform == "win32":
         from lib.omnirig_interface import OmniRigClient
@@ -109,7 +147,120 @@ parser.add_argument(
     "-u",
     "--udp",
     type=str,
-    help="Force UDP Server Address. --udp localhost:2333",
+    help=(
+        "Force UDP Server Address, comma separated for more than one. "
+        "Prefix with wsjtx@ for WSJT-X framing. "
+        "--udp localhost:2333,wsjtx@localhost:2237"
+    ),
+)
+
+parser.add_argument(
+    "--import-adif",
+    type=str,
+    action="append",
+    metavar="FILE",
+    help="Add parks worked in another program's ADIF log. --import-adif ~/log.adi",
+)
+
+parser.add_argument(
+    "--export-adif",
+    type=str,
+    metavar="FILE",
+    help="Write every logged QSO to an ADIF file. --export-adif ~/export.adi",
+)
+
+parser.add_argument(
+    "--spot-server",
+    type=int,
+    metavar="PORT",
+    help="Serve the spot list as JSON at http://localhost:PORT/spots",
+)
+
+parser.add_argument(
+    "--spot-multicast",
+    type=str,
+    metavar="GROUP:PORT",
+    help="Send spot changes as JSON over UDP. --spot-multicast 239.1.1.1:5007",
+)
+
+parser.add_argument(
+    "--cluster",
+    type=str,
+    action="append",
+    metavar="HOST:PORT",
+    help="Add spots from a DX cluster telnet feed. --cluster dxc.example.net:7300",
+)
+
+parser.add_argument(
+    "--rbn",
+    type=str,
+    nargs="?",
+    const="telnet.reversebeacon.net:7000",
+    metavar="HOST:PORT",
+    help="Add spots from the Reverse Beacon Network.",
+)
+
+parser.add_argument(
+    "--install-icons",
+    action="store_true",
+    help="Install the desktop icons and menu entry, then exit.",
+)
+
+parser.add_argument(
+    "--headless",
+    action="store_true",
+    help=(
+        "No window, poll spots and print what changed as JSON lines. "
+        "python -m augratin.lib.headless does the same without loading Qt."
+    ),
+)
+
+parser.add_argument(
+    "--listen",
+    type=str,
+    metavar="[HOST:]PORT",
+    help="With --headless, send the JSON lines to TCP clients instead of stdout.",
+)
+
+parser.add_argument(
+    "--stats",
+    action="store_true",
+    help="Show a panel timing the busy parts of the program.",
+)
+
+parser.add_argument(
+    "--profile",
+    type=str,
+    nargs="?",
+    const="augratin-profile",
+    metavar="NAME",
+    help=(
+        "Profile the program until it exits, writing NAME.pstats and "
+        "NAME.trace.json for chrome://tracing or ui.perfetto.dev"
+    ),
+)
+
+parser.add_argument(
+    "--startup-profile",
+    action="store_true",
+    help="Print how long each part of starting up took.",
+)
+
+parser.add_argument(
+    "--api",
+    type=str,
+    metavar="URL",
+    help=(
+        "Use another POTA api, like a replay from "
+        "python -m augratin.lib.feed_replay. --api http://localhost:8088"
+    ),
+)
+
+parser.add_argument(
+    "--record-api",
+    type=str,
+    metavar="FILE",
+    help="Save every POTA api response to FILE for feed_replay.",
 )
 
 parser.add_argument(
@@ -149,11 +300,21 @@ if args.udp:
 if args.debug:
     logger.setLevel(logging.DEBUG)
 
+PERF.enabled = bool(args.debug or args.stats)
+POTA_API = (args.api or "https://api.pota.app").rstrip("/")
+if args.record_api:
+    set_recorder(FeedRecorder(args.record_api))
+if args.profile:
+    PERF.start_trace()
+
 logger.debug("Forces Interface: %s", FORCED_INTERFACE)
 logger.debug("Server Address: %s", SERVER_ADDRESS)
 logger.debug("Omnirig Rig Number: %s", OMNI_RIGNUMBER)
 logger.debug("UDP Server: %s", UDP_SERVER)
 
+PROFILE = StartupProfile(STARTED)
+PROFILE.mark("imports and arguments")
+
 
 def load_fonts_from_dir(directory):
     """loads in font families"""
@@ -167,141 +328,13 @@ def load_fonts_from_dir(directory):
 class Band:
     """the band"""
 
-    bands = {
-        "160m": (1.8, 2),
-        "80m": (3.5, 4),
-        "60m": (5.102, 5.4065),
-        "40m": (7.0, 7.3),
-        "30m": (10.1, 10.15),
-        "20m": (14.0, 14.35),
-        "17m": (18.068, 18.168),
-        "15m": (21.0, 21.45),
-        "12m": (24.89, 24.99),
-        "10m": (28.0, 29.7),
-        "6m": (50.0, 54.0),
-        "4m": (70.0, 71.0),
-        "2m": (144.0, 148.0),
-    }
+    bands = {band[0]: (band[1], band[2]) for band in BAND_PLAN.bands}
 
     def __init__(self, band: str) -> None:
-        self.start, self.end = self.bands.get(band, (0.0, 1.0))
+        self.start, self.end = BAND_PLAN.edges(band)
         self.name = band
 
 
-class Database:
-    """spot database"""
-
-    def __init__(self) -> None:
-        self.db = sqlite3.connect(":memory:")
-        self.db.row_factory = self.row_factory
-        self.cursor = self.db.cursor()
-        sql_command = (
-            "create table spots("
-            "spotId INTEGER NOT NULL,"
-            "spotTime DATETIME NOT NULL, "
-            "activator VARCHAR(15) NOT NULL, "
-            "frequency REAL NOT NULL, "
-            "mode VARCHAR(6), "
-            "reference VARCHAR(8), "
-            "parkName VARCHAR(50), "
-            "spotter VARCHAR(15) NOT NULL, "
-            "comments VARCHAR(45), "
-            "source VARCHAR(8), "
-            "invalid INTEGER, "
-            "name VARCHAR(50), "
-            "locationDesc VARCHAR(10), "
-            "grid4 VARCHAR(4), "
-            "grid6 VARCHAR(6), "
-            "latitude REAL, "
-            "longitude REAL, "
-            "count INTEGER, "
-            "expire INTEGER "
-            ");"
-        )
-        self.cursor.execute(sql_command)
-        self.db.commit()
-
-    @staticmethod
-    def row_factory(cursor, row):
-        """
-        cursor.description:
-        (name, type_code, display_size,
-        internal_size, precision, scale, null_ok)
-        row: (value, value, ...)
-        """
-        return {
-            col[0]: row[idx]
-            for idx, col in enumerate(
-                cursor.description,
-            )
-        }
-
-    def addspot(self, spot):
-        """doc"""
-        try:
-            delete_call = (
-                f"delete from spots where activator = '{spot.get('activator')}';"
-            )
-            self.cursor.execute(delete_call)
-            self.db.commit()
-
-            pre = "INSERT INTO spots("
-            values = []
-            columns = ""
-            placeholders = ""
-            for key in spot.keys():
-                columns += f"{key},"
-                values.append(spot[key])
-                placeholders += "?,"
-            post = f") VALUES({placeholders[:-1]});"
-
-            sql = f"{pre}{columns[:-1]}{post}"
-            self.cursor.execute(sql, tuple(values))
-            self.db.commit()
-        except sqlite3.IntegrityError:
-            ...
-
-    def getspots(self) -> list:
-        """returns a list of dicts."""
-        try:
-            self.cursor.execute("select * from spots order by frequency ASC;")
-            return self.cursor.fetchall()
-        except sqlite3.OperationalError:
-            return ()
-
-    def getspotsinband(self, start: float, end: float) -> list:
-        """ "return a list of dict where freq range is defined"""
-        self.cursor.execute(
-            f"select * from spots where frequency >= {start} and frequency <= {end} order by frequency ASC;"
-        )
-        return self.cursor.fetchall()
-
-    def get_next_spot(self, current: float, limit: float) -> dict:
-        """ "return a list of dict where freq range is defined"""
-        self.cursor.execute(
-            f"select * from spots where frequency > {current} and frequency <= {limit} order by frequency ASC;"
-        )
-        return self.cursor.fetchone()
-
-    def get_prev_spot(self, current: float, limit: float) -> dict:
-        """ "return a list of dict where freq range is defined"""
-        self.cursor.execute(
-            f"select * from spots where frequency < {current} and frequency >= {limit} order by frequency DESC;"
-        )
-        return self.cursor.fetchone()
-
-    def getspot_byid(self, spot_id: int) -> dict:
-        """Return a dict of spot with the matching spotId"""
-        self.cursor.execute(f"select * from spots where spotId = {spot_id};")
-        return self.cursor.fetchone()
-
-    def delete_spots(self, minutes: int):
-        """Delete old spots"""
-        self.cursor.execute(
-            f"delete from spots where spotTime < datetime('now', '-{minutes} minutes');"
-        )
-
-
 class MainWindow(QtWidgets.QMainWindow):
     """The main window class"""
 
@@ -315,27 +348,35 @@ class MainWindow(QtWidgets.QMainWindow):
     textItemList = []
     bandwidth = 0
     bandwidth_mark = []
+    rig_mode = ""
     freq = 0.0
     keepRXCenter = False
     something = None
     agetime = None
 
-    potaurl = "https://api.pota.app/spot/activator"
-    parkurl = "https://api.pota.app/park/"
-    activatorurl = "https://api.pota.app/stats/user/"
+    potaurl = f"{POTA_API}/spot/activator"
+    parkurl = f"{POTA_API}/park/"
+    activatorurl = f"{POTA_API}/stats/user/"
     bw = {}
     lastclicked = ""
-    workedlist = []
     spots = None
     map = None
     loggable = False
+    map_loaded = False
+    fetching = False
+    first_spots = True
+    redraw_spots = False
     MAP_TILES = "OpenStreetMap"
+    spots_fetched = QtCore.pyqtSignal(object)
 
     def __init__(self, parent=None):
         """Initialize class variables"""
         super().__init__(parent)
         data_path = WORKING_PATH + "/data/dialog.ui"
-        uic.loadUi(data_path, self)
+        if setup_ui(self, data_path):
+            PROFILE.mark("load ui (compiled)")
+        else:
+            PROFILE.mark("load ui (loadUi)")
 
         self.settings = {
             "mycall": "",
@@ -356,19 +397,17 @@ class MainWindow(QtWidgets.QMainWindow):
                 ) as file_descriptor:
                     file_descriptor.write(dumps(self.settings, indent=4))
                     logger.debug("writing: %s", self.settings)
-            if os.path.exists(f"{home}/.augratin_watched.json"):
-                with open(
-                    f"{home}/.augratin_watched.json", "rt", encoding="utf-8"
-                ) as file_descriptor:
-                    self.workedlist = loads(file_descriptor.read())
-                    logger.debug("reading workedlist: %s", self.settings)
         except IOError as exception:
             logger.critical("%s", exception)
 
         self.cat_control = None
-        local_flrig = self.check_process("flrig")
-        local_rigctld = self.check_process("rigctld")
-        local_omnirig = self.check_process("omnirig.exe")
+        self.poll_scheduler = PollScheduler()
+        self.cat_discovery = CATDiscovery(
+            SERVER_ADDRESS,
+            FORCED_INTERFACE,
+            processes={"omnirig": "omnirig.exe"} if sys.platform == "win32" else None,
+        )
+        self.discovered_cat = None
 
         if FORCED_INTERFACE:
             logger.debug("%s", f"Forced interface: {FORCED_INTERFACE} {SERVER_ADDRESS}")
@@ -379,32 +418,33 @@ class MainWindow(QtWidgets.QMainWindow):
                     f"Was unable to connect to {FORCED_INTERFACE}.\n"
                     f"Using Address: {address} Port: {port}"
                 )
-        else:
-            if local_flrig:
-                if SERVER_ADDRESS:
-                    address, port = SERVER_ADDRESS.split(":")
-                else:
-                    address, port = "localhost", "12345"
-                self.cat_control = CAT("flrig", address, int(port))
-                if self.cat_control.online is False:
-                    self.show_message_box(
-                        "Was unable to connect to flrig.\n"
-                        f"Using Address: {address} Port: {port}"
-                    )
-            if local_rigctld:
-                if SERVER_ADDRESS:
-                    address, port = SERVER_ADDRESS.split(":")
-                else:
-                    address, port = "localhost", "4532"
-                self.cat_control = CAT("rigctld", address, int(port))
-                if self.cat_control.online is False:
-                    self.show_message_box(
-                        "Was unable to connect to rigctld.\n"
-                        f"Using Address: {address} Port: {port}"
-                    )
-            if local_omnirig:
-                self.cat_control = OmniRigClient(OMNI_RIGNUMBER)
-                logging.debug("omnirig called")
+        self.cat_queue = CATCommandQueue(self.cat_control)
+        PROFILE.mark("settings and CAT")
+        home = os.path.expanduser("~")
+        self.qso_store = QSOStore(f"{home}/.augratin_qsos.db")
+        PROFILE.mark("QSO store")
+        self.qso_logger = QSOLogger(
+            f"{home}/POTA_Contacts.adi",
+            UDPBroadcaster(UDP_SERVER),
+            spool=f"{home}/.augratin_spool.adi",
+            store=self.qso_store,
+        )
+        self.spot_server = None
+        if args.spot_server is not None or args.spot_multicast:
+            self.spot_server = SpotServer(
+                port=args.spot_server or 0,
+                broadcaster=(
+                    UDPBroadcaster(args.spot_multicast) if args.spot_multicast else None
+                ),
+            )
+            if args.spot_server is not None:
+                self.spot_server.start()
+        self.worked = WorkedIndex(
+            f"{home}/POTA_Contacts.adi", f"{home}/.augratin_worked.json"
+        )
+        if self.worked.refresh():
+            self.save_worked()
+        PROFILE.mark("worked index")
 
         self.zoom_in_button.clicked.connect(self.dec_zoom)
         self.zoom_out_button.clicked.connect(self.inc_zoom)
@@ -413,13 +453,30 @@ class MainWindow(QtWidgets.QMainWindow):
         self.bandmap_scene.setFocusOnTouch(False)
         self.bandmap_scene.selectionChanged.connect(self.spotclicked)
         self.bandmap_scene.setFont(QtGui.QFont("JetBrains Mono", pointSize=5))
-        self.spotdb = Database()
-        self.comboBox_mode.currentTextChanged.connect(self.getspots)
+        self.engine = SpotEngine(self.potaurl)
+        self.spotdb = self.engine.spotdb
+        self.spot_index = self.engine.spot_index
+        self.watch_path = os.path.expanduser("~/.augratin_watched.json")
+        self.watchlist = WatchList()
+        self.watchlist.load(self.watch_path)
+        self.alerts = WatchAlerts(self.watchlist, self.watch_alert)
+        self.engine.subscribe(self.alerts.events)
+        self.engine.subscribe(self.spots_changed)
+        self.graphicsView.viewport().installEventFilter(self)
+        self.snapshot_path = os.path.expanduser("~/.augratin_spots.json")
+        self.engine.load_snapshot(self.snapshot_path)
+        # load_snapshot() hands out no events and the restored spots that
+        # are still current won't change on the next poll either.
+        self.alerts.rescan(self.engine.spots())
+        PROFILE.mark("spot snapshot")
+        self.comboBox_mode.currentTextChanged.connect(
+            lambda _mode: self.update_stations()
+        )
         self.comboBox_band.currentTextChanged.connect(self.nocat_bandchange)
 
         self.mycall_field.textEdited.connect(self.save_call_and_grid)
         self.mygrid_field.textEdited.connect(self.save_call_and_grid)
-        self.log_button.clicked.connect(self.log_contact)
+        self.log_button.clicked.connect(lambda _checked: self.log_contact())
         self.mycall_field.setText(self.settings.get("mycall", ""))
         self.mygrid_field.setText(self.settings.get("mygrid", ""))
         if self.settings.get("mygrid", "") == "":
@@ -428,20 +485,179 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.settings.get("mycall", "") == "":
             self.mycall_field.setStyleSheet("border: 1px solid red;")
             self.mycall_field.setFocus()
+        self.spots_fetched.connect(self.ingest_spots)
+        self.spot_timer = QtCore.QTimer(self)
+        self.spot_timer.timeout.connect(self.getspots)
+        self.merger = SpotMerger()
+        self.merger.add_source("pota")
+        self.sources = []
+        self.merge_timer = QtCore.QTimer(self)
+        self.merge_timer.timeout.connect(self.merge_spots)
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.timeout.connect(self.poll_radio)
+        self.snapshot_timer = QtCore.QTimer(self)
+        self.snapshot_timer.timeout.connect(self.save_snapshot)
+        self.stats_dock = None
+        if args.stats:
+            self.make_stats_dock()
+        QApplication.instance().styleHints().colorSchemeChanged.connect(
+            self.setDarkMode
+        )
+        self.setDarkMode()
+
+    def start_deferred(self) -> None:
+        """
+        The rest of starting up, run once the window is showing.
+        Spots are fetched in the background, then the map engine loads,
+        logs are imported in the background and the rig is looked for.
+        """
+        self.start_sources()
+        self.getspots()
+        self.spot_timer.start(30000)
+        self.snapshot_timer.start(300000)
+        self.load_map()
+        PROFILE.mark("map engine")
+        log = os.path.expanduser("~/POTA_Contacts.adi")
+        if self.qso_store.count() == 0 and os.path.exists(log):
+            # First run with a QSO store, fill it from the log we already have.
+            threading.Thread(
+                target=self.qso_store.import_adif,
+                args=(log,),
+                kwargs={"skip_dupes": True},
+                name="qso-store",
+                daemon=True,
+            ).start()
+        if args.import_adif:
+            threading.Thread(
+                target=self.import_logs,
+                args=(args.import_adif,),
+                name="import-adif",
+                daemon=True,
+            ).start()
+        if not FORCED_INTERFACE:
+            self.recheck_cat()
+        self.set_poll_interval(self.poll_scheduler.interval())
+
+    def load_map(self) -> None:
+        """Swap the mapview placeholder for a web view showing the US."""
+        if self.map_loaded:
+            return
+        try:
+            # pylint: disable=import-outside-toplevel
+            from PyQt6.QtWebEngineWidgets import QWebEngineView
+        except ImportError as exception:
+            logger.critical("No map, QtWebEngine failed to load: %s", exception)
+            return
+        view = QWebEngineView(self)
+        self.horizontalLayout_11.replaceWidget(self.mapview, view)
+        self.mapview.deleteLater()
+        self.mapview = view
+        self.map_loaded = True
         # start map centered on US.
-        self.map = folium.Map(
-            location=["39.8", "-98.5"],
+        self.show_map(self.new_map(["39.8", "-98.5"], 3))
+
+    def new_map(self, location: list, zoom: int):
+        """A folium map to draw on."""
+        import folium  # pylint: disable=import-outside-toplevel
+
+        return folium.Map(
+            location=location,
             tiles=self.MAP_TILES,
-            zoom_start=3,
+            zoom_start=zoom,
             max_zoom=19,
         )
-        data = io.BytesIO()
-        self.map.save(data, close_file=False)
-        self.mapview.setHtml(data.getvalue().decode())
-        QApplication.instance().styleHints().colorSchemeChanged.connect(
-            self.setDarkMode
+
+    def show_map(self, folium_map) -> None:
+        """Render a folium map into the mapview."""
+        self.load_map()
+        self.map = folium_map
+        if not self.map_loaded:
+            return
+        with PERF.time("map render"):
+            data = io.BytesIO()
+            self.map.save(data, close_file=False)
+            self.mapview.setHtml(data.getvalue().decode())
+
+    def make_stats_dock(self) -> None:
+        """A dock listing the PERF timings, refreshed every second."""
+        columns = ("count", "last", "p50", "p90", "p99", "max")
+        self.stats_table = QtWidgets.QTableWidget(0, len(columns))
+        self.stats_table.setHorizontalHeaderLabels(
+            ["count"] + [f"{col} ms" for col in columns[1:]]
         )
-        self.setDarkMode()
+        self.stats_table.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers
+        )
+        self.stats_dock = QtWidgets.QDockWidget("Performance", self)
+        self.stats_dock.setObjectName("stats_dock")
+        self.stats_dock.setWidget(self.stats_table)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.stats_dock)
+        self.stats_timer = QtCore.QTimer(self)
+        self.stats_timer.timeout.connect(self.show_stats)
+        self.stats_timer.start(1000)
+
+    def show_stats(self) -> None:
+        """Fill the stats dock."""
+        if self.stats_dock is None or not self.stats_dock.isVisible():
+            return
+        stats = PERF.stats()
+        self.stats_table.setRowCount(len(stats))
+        self.stats_table.setVerticalHeaderLabels(sorted(stats))
+        for row, name in enumerate(sorted(stats)):
+            for col, key in enumerate(("count", "last", "p50", "p90", "p99", "max")):
+                self.stats_table.setItem(
+                    row, col, QtWidgets.QTableWidgetItem(str(stats[name][key]))
+                )
+
+    def closeEvent(self, event):  # pylint: disable=invalid-name
+        """This overrides Qt close event. Finish writing QSOs before we go."""
+        if args.debug:
+            home = os.path.expanduser("~")
+            logger.debug("Timings: %s", PERF.dump(f"{home}/.augratin_perf.json"))
+        self.qso_logger.close()
+        self.cat_queue.stop()
+        if self.spot_server is not None:
+            self.spot_server.stop()
+        for source in self.sources:
+            source.stop()
+        self.engine.save_snapshot(self.snapshot_path)
+        self.worked.save()
+        super().closeEvent(event)
+
+    def save_snapshot(self) -> None:
+        """Save the spot table for the next start, off the GUI thread."""
+        threading.Thread(
+            target=self.engine.save_snapshot,
+            args=(self.snapshot_path,),
+            name="spot-snapshot",
+            daemon=True,
+        ).start()
+
+    def save_worked(self) -> None:
+        """Save the worked index, off the GUI thread, it can be large."""
+        threading.Thread(
+            target=self.worked.save, name="worked-index", daemon=True
+        ).start()
+
+    def import_logs(self, paths: list) -> None:
+        """
+        Add other programs' ADIF logs to the worked index and the QSO store,
+        on a worker thread, they can be large.
+        """
+        for adif_file in paths:
+            path = os.path.expanduser(adif_file)
+            try:
+                stats = self.worked.import_file(path)
+                logger.info(
+                    "Imported %s QSOs from %s in %ss (%s/s)",
+                    stats["records"],
+                    adif_file,
+                    stats["seconds"],
+                    stats["records_per_second"],
+                )
+                self.qso_store.import_adif(path, skip_dupes=True)
+            except (OSError, sqlite3.Error) as exception:
+                logger.critical("%s", exception)
 
     def keyPressEvent(self, event):  # pylint: disable=invalid-name
         """This overrides Qt key event."""
@@ -468,33 +684,84 @@ class MainWindow(QtWidgets.QMainWindow):
             self.text_color = QColorConstants.Black
         self.update()
 
+    def changeEvent(self, event):  # pylint: disable=invalid-name
+        """This overrides Qt change event. Stop polling the rig while minimized."""
+        if event.type() == QtCore.QEvent.Type.WindowStateChange:
+            if self.isMinimized():
+                self.poll_scheduler.pause()
+                self.set_poll_interval(0)
+            elif self.poll_scheduler.paused:
+                self.set_poll_interval(self.poll_scheduler.resume())
+        super().changeEvent(event)
+
+    def set_poll_interval(self, interval: int) -> None:
+        """Apply a new CAT poll interval in ms, 0 stops polling."""
+        if not interval:
+            self.poll_timer.stop()
+            return
+        if interval != self.poll_timer.interval() or not self.poll_timer.isActive():
+            self.poll_timer.start(interval)
+
+    def poll_metrics(self) -> dict:
+        """Returns the CAT poll rate and latency."""
+        return self.poll_scheduler.metrics()
+
+    @PERF.timed("poll_radio")
     def poll_radio(self):
         """Get Freq and Mode changes"""
+        self.adopt_discovered_cat()
         if self.cat_control:
             if self.cat_control.online:
-                try:
-                    newfreq = float(self.cat_control.get_vfo()) / 1000000
-                except ValueError:
+                # The command queue is talking to the rig, try again next poll.
+                if not self.cat_queue.lock.acquire(blocking=False):
                     return
-                if hasattr(self.cat_control, "get_bw"):
+                started = time.perf_counter()
+                changed = False
+                try:
                     try:
-                        newbw = int(self.cat_control.get_bw())
-                    except TypeError:
-                        newbw = 0
+                        newfreq = float(self.cat_control.get_vfo()) / 1000000
                     except ValueError:
+                        self.poll_scheduler.record(False, time.perf_counter() - started)
+                        return
+                    if hasattr(self.cat_control, "get_bw"):
+                        try:
+                            newbw = int(self.cat_control.get_bw())
+                        except TypeError:
+                            newbw = 0
+                        except ValueError:
+                            newbw = 0
+                    else:
                         newbw = 0
-                else:
-                    newbw = 0
+                    newmode = ""
+                    if hasattr(self.cat_control, "get_mode"):
+                        newmode = self.cat_control.get_mode()
+                finally:
+                    self.cat_queue.lock.release()
+                latency = time.perf_counter() - started
+                PERF.record("cat poll", latency)
                 if self.rx_freq != newfreq:
+                    changed = True
                     self.rx_freq = newfreq
-                    self.set_band(f"{self.getband(str(int(newfreq * 1000)))}m")
+                    band = BAND_PLAN.band_for(newfreq)
+                    if band:
+                        self.set_band(band)
                     step, _ = self.determine_step_digits()
                     self.drawTXRXMarks(step)
                     self.center_on_rxfreq()
                 if self.bandwidth != newbw:
+                    changed = True
                     self.bandwidth = newbw
                     step, _ = self.determine_step_digits()
                     self.drawTXRXMarks(step)
+                if self.rig_mode != newmode:
+                    changed = True
+                    self.rig_mode = newmode
+                    # Changed at the rig, the last mode the queue sent is stale.
+                    self.cat_queue.forget_mode()
+                interval = self.poll_scheduler.record(changed, latency)
+                if interval != self.poll_timer.interval():
+                    logger.debug("CAT poll: %s", self.poll_metrics())
+                self.set_poll_interval(interval)
 
     def show_message_box(self, message: str) -> None:
         """Display a message box to the user."""
@@ -528,77 +795,24 @@ class MainWindow(QtWidgets.QMainWindow):
     @staticmethod
     def getjson(url):
         """Get json request"""
-        try:
-            request = requests.get(url, timeout=5.0)
-            request.raise_for_status()
-        except requests.ConnectionError as err:
-            logger.debug("Network Error: %s", err)
-            return None
-        except requests.exceptions.Timeout as err:
-            logger.debug("Timeout Error: %s", err)
-            return None
-        except requests.exceptions.HTTPError as err:
-            logger.debug("HTTP Error: %s", err)
-            return None
-        except requests.exceptions.RequestException as err:
-            logger.debug("Error: %s", err)
-            return None
-        return loads(request.text)
+        return getjson(url)
 
     @staticmethod
     def gridtolatlon(maiden):
         """
         Converts a maidenhead gridsquare to a latitude longitude pair.
         """
-        maiden = str(maiden).strip().upper()
-
-        length = len(maiden)
-        if not 8 >= length >= 2 and length % 2 == 0:
-            return 0, 0
-
-        lon = (ord(maiden[0]) - 65) * 20 - 180
-        lat = (ord(maiden[1]) - 65) * 10 - 90
-
-        if length >= 4:
-            lon += (ord(maiden[2]) - 48) * 2
-            lat += ord(maiden[3]) - 48
-
-        if length >= 6:
-            lon += (ord(maiden[4]) - 65) / 12 + 1 / 24
-            lat += (ord(maiden[5]) - 65) / 24 + 1 / 48
-
-        if length >= 8:
-            lon += (ord(maiden[6])) * 5.0 / 600
-            lat += (ord(maiden[7])) * 2.5 / 600
-
-        return lat, lon
+        return geo.gridtolatlon(maiden)
 
     def distance(self, grid1: str, grid2: str) -> float:
         """
         Takes two maidenhead gridsquares and returns the distance between the two in kilometers.
         """
-        lat1, lon1 = self.gridtolatlon(grid1)
-        lat2, lon2 = self.gridtolatlon(grid2)
-        return round(self.haversine(lon1, lat1, lon2, lat2))
+        return geo.distance(grid1, grid2)
 
     def bearing(self, grid1: str, grid2: str) -> float:
         """calculate bearing to contact"""
-        lat1, lon1 = self.gridtolatlon(grid1)
-        lat2, lon2 = self.gridtolatlon(grid2)
-        lat1 = radians(lat1)
-        lon1 = radians(lon1)
-        lat2 = radians(lat2)
-        lon2 = radians(lon2)
-        londelta = lon2 - lon1
-        why = sin(londelta) * cos(lat2)
-        exs = cos(lat1) * sin(lat2) - sin(lat1) * cos(lat2) * cos(londelta)
-        brng = atan2(why, exs)
-        brng *= 180 / pi
-
-        if brng < 0:
-            brng += 360
-
-        return round(brng)
+        return geo.bearing(grid1, grid2)
 
     @staticmethod
     def haversine(lon1, lat1, lon2, lat2):
@@ -606,34 +820,112 @@ class MainWindow(QtWidgets.QMainWindow):
         Calculate the great circle distance in kilometers between two points
         on the earth (specified in decimal degrees)
         """
-        # convert degrees to radians
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+        return geo.haversine(lon1, lat1, lon2, lat2)
 
-        # haversine formula
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        aye = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-        cee = 2 * asin(sqrt(aye))
-        arrgh = 6372.8  # Radius of earth in kilometers.
-        return cee * arrgh
+    def spots_near_me(self, km: float):
+        """
+        Returns {spotId: km} for spots within 'km' of mygrid,
+        or None if there is no limit or no gridsquare to measure from.
+        """
+        mygrid = self.mygrid_field.text()
+        if not km or len(mygrid) < 4:
+            return None
+        lat, lon = self.gridtolatlon(mygrid)
+        return self.spot_index.within(lat, lon, km)
+
+    def enrich_spots(self, spots: list) -> None:
+        """Add distance and bearing from mygrid to every spot, in one batch."""
+        self.engine.mygrid = self.mygrid_field.text()
+        self.engine.enrich(spots)
 
+    @PERF.timed("getspots")
     def getspots(self):
-        """Gets activator spots from pota.app"""
+        """Gets activator spots from pota.app on a background thread"""
+        if self.fetching:
+            return
+        self.fetching = True
+        threading.Thread(target=self.fetch_spots, name="getspots", daemon=True).start()
+
+    def fetch_spots(self) -> None:
+        """Runs on the getspots thread, hands the spots to the GUI thread."""
+        spots = None
+        try:
+            with PERF.time("spot fetch"):
+                spots = self.getjson(self.potaurl)
+            if spots is not None and self.sources:
+                self.merger.replace("pota", spots)
+                spots = self.merger.merged()
+        except Exception as exception:  # pylint: disable=broad-except
+            logger.critical("Spot fetch failed: %s", exception)
+            spots = None
+        finally:
+            # ingest_spots() clears 'fetching', it has to hear back
+            # whatever happened or no fetch would ever start again.
+            self.spots_fetched.emit(spots)
+
+    def start_sources(self) -> None:
+        """Connect to the clusters and RBN asked for on the command line."""
+        login = self.mycall_field.text() or "NOCALL"
+        for address in args.cluster or []:
+            self.sources.append(telnet_source(address, login, "cluster"))
+        if args.rbn:
+            self.sources.append(telnet_source(args.rbn, login, "RBN"))
+        for source in self.sources:
+            source.start(self.merger)
+        if self.sources:
+            # The merged list is everything current, cluster spots that
+            # aged out have to go as well.
+            self.engine.prune = True
+            self.merge_timer.start(5000)
+
+    def merge_spots(self) -> None:
+        """Show what the clusters and RBN sent since the last look."""
+        if self.merger.changed.is_set() and not self.fetching:
+            with PERF.time("merge spots"):
+                spots = self.merger.merged()
+            self.ingest_spots(spots)
+
+    @PERF.timed("ingest_spots")
+    def ingest_spots(self, spots) -> None:
+        """Add freshly fetched spots to the database and redraw."""
+        self.fetching = False
         self.time.setText(
             str(datetime.datetime.now(datetime.timezone.utc))
             .split()[1]
             .split(".")[0][0:5]
         )
-        self.spots = self.getjson(self.potaurl)
+        self.spots = spots
+        if self.worked.refresh():
+            self.redraw_spots = True
+            self.save_worked()
         if self.spots:
-            for spot in self.spots:
-                try:
-                    spot["frequency"] = float(spot.get("frequency")) / 1000
-                    self.spotdb.addspot(spot)
-                except ValueError:
-                    pass
-            self.update()
-
+            self.engine.mygrid = self.mygrid_field.text()
+            self.engine.ingest(self.spots)
+        if self.redraw_spots:
+            self.redraw_spots = False
+            self.update_stations()
+        if self.first_spots:
+            self.first_spots = False
+            PROFILE.mark("first spots")
+            if args.startup_profile:
+                PROFILE.report()
+
+    def spots_changed(self, events: list) -> None:
+        """
+        Subscribed to the spot engine. Republishes the table and has the
+        spots redrawn only if the band showing is one that changed.
+        """
+        if self.spot_server is not None:
+            self.spot_server.publish(self.engine.spots(), self.time.text())
+        band = self.currentBand.name
+        for event in events:
+            if event["spot"].get("band") == band or (
+                event["previous"] is not None and event["previous"].get("band") == band
+            ):
+                self.redraw_spots = True
+                return
+
+    @PERF.timed("log_contact")
     def log_contact(self):
         """Log the contact"""
         if self.loggable is False:
@@ -664,31 +956,12 @@ class MainWindow(QtWidgets.QMainWindow):
             "<EOR>\n"
         )
         logger.debug("QSO: %s", qso)
-        home = os.path.expanduser("~")
-        if not Path(home + "/POTA_Contacts.adi").exists():
-            with open(
-                home + "/POTA_Contacts.adi", "w", encoding="utf-8"
-            ) as file_descriptor:
-                header = (
-                    "augratin POTA logger\n"
-                    "<ADIF_VER:5>3.1.2\n"
-                    "<PROGRAMID:8>AuGratin\n"
-                    "<PROGRAMVERSION:14>Version 22.3.7\n"
-                    "<EOH>\n"
-                )
-                print(header, file=file_descriptor)
-        with open(
-            home + "/POTA_Contacts.adi", "a", encoding="utf-8"
-        ) as file_descriptor:
-            print(qso, file=file_descriptor)
-
-        # Broadcast ADIF to listeners via UDP
-        result = broadcast_adif(qso, UDP_SERVER)
-        logger.debug("Broadcast result: %s", result)
+        self.qso_logger.submit(qso)
 
         self.clear_fields()
         self.loggable = False
 
+    @PERF.timed("update")
     def update(self):
         """doc"""
         # self.update_timer.setInterval(UPDATE_INTERVAL)
@@ -736,6 +1009,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.drawTXRXMarks(step)
         self.update_stations()
 
+    @PERF.timed("update_stations")
     def update_stations(self):
         """doc"""
         self.clear_all_callsign_from_scene()
@@ -745,9 +1019,17 @@ class MainWindow(QtWidgets.QMainWindow):
         result = self.spotdb.getspotsinband(
             self.currentBand.start, self.currentBand.end
         )
+        nearby = self.spots_near_me(self.settings.get("max_distance", 0))
         if result:
             min_y = 0.0
+            today = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d")
             for items in result:
+                if (
+                    nearby is not None
+                    and items.get("latitude") is not None
+                    and items.get("spotId") not in nearby
+                ):
+                    continue
                 if mode_selection == "-FT*" and items["mode"][:2] == "FT":
                     continue
                 if (
@@ -788,9 +1070,23 @@ class MainWindow(QtWidgets.QMainWindow):
                     text.setProperty("freq", items.get("frequency"))
                     text.setProperty("spotId", items.get("spotId"))
                     text.setProperty("mode", items.get("mode"))
-                    text.setToolTip(items.get("comments"))
+                    if items.get("distance") is not None:
+                        text.setToolTip(
+                            f"{items.get('comments')}\n"
+                            f"{items.get('distance')} km {items.get('bearing')}°"
+                        )
+                    else:
+                        text.setToolTip(items.get("comments"))
                     if "QRT" in items.get("comments", "").upper():
                         text.setDefaultTextColor(QtGui.QColor(120, 120, 120, 120))
+                    elif items.get("spotId") in self.alerts.watched:
+                        text.setDefaultTextColor(QtGui.QColor(230, 120, 0))
+                    elif self.worked.worked_on(
+                        items.get("activator", ""), items.get("reference", ""), today
+                    ):
+                        text.setDefaultTextColor(QtGui.QColor(90, 90, 200, 160))
+                    elif not self.worked.worked_park(items.get("reference", "")):
+                        text.setDefaultTextColor(QtGui.QColor(30, 160, 30))
 
                     min_y = text_y + text.boundingRect().height() / 2
 
@@ -802,6 +1098,8 @@ class MainWindow(QtWidgets.QMainWindow):
     def clear_fields(self):
         """Clear input fields and reset focus to RST TX."""
         self.activator_call.setText("")
+        self.activator_call.setStyleSheet("")
+        self.activator_call.setToolTip("")
         self.activator_name.setText("")
         self.park_designator.setText("")
         self.mode_field.setText("")
@@ -919,25 +1217,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def determine_step_digits(self):
         """doc"""
-        return_zoom = {
-            1: (0.0001, 4),
-            2: (0.00025, 4),
-            3: (0.0005, 4),
-            4: (0.001, 3),
-            5: (0.0025, 3),
-            6: (0.005, 3),
-            7: (0.01, 2),
-        }
-        step, digits = return_zoom.get(self.zoom, (0.0001, 4))
-
-        if self.currentBand.start >= 28.0 and self.currentBand.start < 420.0:
-            step = step * 10
-            return (step, digits)
-
-        if self.currentBand.start >= 420.0 and self.currentBand.start < 2300.0:
-            step = step * 100
-
-        return (step, digits)
+        return BAND_PLAN.step(self.currentBand.name, self.zoom)
 
     def set_band(self, band: str):
         """doc"""
@@ -962,6 +1242,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.bandmap_scene.removeItem(mark)
         currentPolygon.clear()
 
+    @PERF.timed("spotclicked")
     def spotclicked(self):
         """
         If flrig/rigctld is running on this PC, tell it to tune to the spot freq and change mode.
@@ -975,6 +1256,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if selected:
             spotId = selected.property("spotId")
             spotfreq = int(selected.property("freq") * 1000000)
+        self.set_poll_interval(self.poll_scheduler.kick())
 
         # old stuff
         try:
@@ -1015,7 +1297,23 @@ class MainWindow(QtWidgets.QMainWindow):
             except IndexError:
                 self.mode_field.setText("")
             self.freq_field.setText(f"{spotfreq}")
-            self.band_field.setText(f"{self.getband(line[3])}M")
+            self.band_field.setText(
+                f"{(BAND_PLAN.band_for(spot.get('frequency')) or '0m').upper()}"
+            )
+            if self.qso_store.is_dupe(
+                line[1],
+                line[2],
+                self.band_field.text(),
+                self.mode_field.text(),
+                the_date,
+            ):
+                self.activator_call.setStyleSheet("border: 1px solid red;")
+                self.activator_call.setToolTip(
+                    "Already logged on this band and mode today"
+                )
+            else:
+                self.activator_call.setStyleSheet("")
+                self.activator_call.setToolTip("")
             park_info = self.getjson(f"{self.parkurl}{line[2]}")
             if park_info:
                 self.park_name.setText(park_info["name"])
@@ -1034,21 +1332,33 @@ class MainWindow(QtWidgets.QMainWindow):
                         str(self.bearing(mygrid, park_info["grid6"]))
                     )
 
-                self.map = folium.Map(
-                    location=[park_info["latitude"], park_info["longitude"]],
-                    tiles=self.MAP_TILES,
-                    zoom_start=5,
-                    max_zoom=19,
+                import folium  # pylint: disable=import-outside-toplevel
+
+                park_map = self.new_map(
+                    [park_info["latitude"], park_info["longitude"]], 5
                 )
                 folium.Marker(
                     [park_info["latitude"], park_info["longitude"]],
                     popup=f"<i>{park_info['name']}</i>",
-                ).add_to(self.map)
-                data = io.BytesIO()
-                self.map.save(data, close_file=False)
-                self.mapview.setHtml(data.getvalue().decode())
+                ).add_to(park_map)
+                for km, spot_id in self.spot_index.nearest(
+                    park_info["latitude"], park_info["longitude"], 11
+                ):
+                    nearby = self.spotdb.getspot_byid(spot_id)
+                    if spot_id == spotId or nearby is None:
+                        continue
+                    folium.CircleMarker(
+                        [nearby["latitude"], nearby["longitude"]],
+                        radius=5,
+                        popup=(
+                            f"{nearby['activator']} @ {nearby['reference']} "
+                            f"{nearby['frequency']} {nearby['mode']} {round(km)} km"
+                        ),
+                    ).add_to(park_map)
+                self.show_map(park_map)
             if self.cat_control is not None:
                 combfreq = f"{spotfreq}"
+                mode = ""
                 try:
                     mode = line[4].upper()
                     if mode == "SSB":
@@ -1056,139 +1366,175 @@ class MainWindow(QtWidgets.QMainWindow):
                             mode = "USB"
                         else:
                             mode = "LSB"
-                    self.cat_control.set_mode(mode)
                 except IndexError:
                     pass
-                self.cat_control.set_vfo(
-                    combfreq
-                )  # Set Mode first because some rigs offset vfo based on mode.
+                self.cat_queue.submit(combfreq, mode)
+                logger.debug("CAT queue: %s", self.cat_queue.metrics())
             else:
-                self.recheck_cat()
+                # Clicking a spot with no rig is asking us to look again.
+                self.recheck_cat(force=True)
         except ConnectionRefusedError:
             pass
 
-    def item_double_clicked(self):
-        """If a list item is double clicked a green highlight will be toggled"""
-        item = self.listWidget.currentItem()
-        line = item.text().split()
-        if line[1] in self.workedlist:
-            self.workedlist.remove(line[1])
-        else:
-            self.workedlist.append(line[1])
-        self.showspots()
-        try:
-            home = os.path.expanduser("~")
-            with open(
-                f"{home}/.augratin_watched.json", "wt", encoding="utf-8"
-            ) as file_descriptor:
-                file_descriptor.write(dumps(self.workedlist))
-        except IOError as exception:
-            logger.critical("%s", exception)
+    def eventFilter(self, watched, event):  # pylint: disable=invalid-name
+        """Double clicking a spot on the band map watches its activator."""
+        if (
+            watched is self.graphicsView.viewport()
+            and event.type() == QtCore.QEvent.Type.MouseButtonDblClick
+        ):
+            item = self.graphicsView.itemAt(event.position().toPoint())
+            if (
+                isinstance(item, QtWidgets.QGraphicsTextItem)
+                and item.property("spotId") is not None
+            ):
+                self.item_double_clicked(item)
+                return True
+        return super().eventFilter(watched, event)
+
+    def item_double_clicked(self, item):
+        """Watch the activator of a band map spot, or stop. Watched spots are orange."""
+        spot = self.spotdb.getspot_byid(item.property("spotId"))
+        if spot is None:
+            return
+        self.watchlist.toggle_call(spot["activator"])
+        self.watchlist.save(self.watch_path)
+        self.alerts.rescan(self.engine.spots())
+        self.update_stations()
+
+    def watch_alert(self, found: list) -> None:
+        """Tell the user a watched station or park was spotted."""
+        lines = [
+            f"{spot['activator']} {spot['reference']} "
+            f"{spot['frequency']:.4f} {spot['mode']}"
+            for spot, _rules in found
+        ]
+        logger.info("Watched: %s", ", ".join(lines))
+        title = "Watched station spotted"
+        if len(lines) > 1:
+            title = f"{len(lines)} watched stations spotted"
+        if not notify(title, "\n".join(lines[:10])):
+            QApplication.beep()
 
     @staticmethod
     def getband(freq):
-        """converts a frequency into a ham band"""
+        """converts a frequency in kHz into a ham band, "0" if it isn't in one"""
         if freq.isnumeric():
-            frequency = int(float(freq)) * 1000
-            if 2000000 > frequency > 1800000:
-                return "160"
-            if 4000000 > frequency > 3500000:
-                return "80"
-            if 5406000 > frequency > 5330000:
-                return "60"
-            if 7300000 > frequency > 7000000:
-                return "40"
-            if 10150000 > frequency > 10100000:
-                return "30"
-            if 14350000 > frequency > 14000000:
-                return "20"
-            if 18168000 > frequency > 18068000:
-                return "17"
-            if 21450000 > frequency > 21000000:
-                return "15"
-            if 24990000 > frequency > 24890000:
-                return "12"
-            if 29700000 > frequency > 28000000:
-                return "10"
-            if 54000000 > frequency > 50000000:
-                return "6"
-            if 148000000 > frequency > 144000000:
-                return "2"
-        else:
-            return "0"
+            band = BAND_PLAN.band_for(int(freq) / 1000)
+            if band:
+                return band[:-1]
+        return "0"
 
-    @staticmethod
-    def check_process(name: str) -> bool:
-        """checks to see if program of name is in the active process list"""
-        for proc in psutil.process_iter():
-            if bool(re.match(name, proc.name().lower())):
-                logger.debug("%s found!", name)
-                return True
-        return False
-
-    def recheck_cat(self):
-        """Renegotiate CAT control."""
-        local_flrig = self.check_process("flrig")
-        local_rigctld = self.check_process("rigctld")
-        local_omnirig = self.check_process("omnirig.exe")
+    def recheck_cat(self, force: bool = False):
+        """
+        Renegotiate CAT control in the background, OmniRig included on
+        Windows. 'force' probes again even if the last look found nothing
+        only moments ago.
+        """
+        self.cat_discovery.connect_in_background(
+            self.make_cat, self.cat_discovered, force=force
+        )
 
-        if FORCED_INTERFACE:
-            address, port = SERVER_ADDRESS.split(":")
-            self.cat_control = CAT(FORCED_INTERFACE, address, int(port))
+    @staticmethod
+    def make_cat(interface: str, address: str, port: int):
+        """
+        Build the CAT object for a discovered backend. OmniRig is a COM
+        object that belongs to the thread making it, adopt_discovered_cat()
+        makes it on the GUI thread.
+        """
+        if interface == "omnirig":
+            return SimpleNamespace(interface=interface, online=True)
+        return CAT(interface, address, port)
 
-        if self.cat_control is None:
-            if local_flrig:
-                if SERVER_ADDRESS:
-                    address, port = SERVER_ADDRESS.split(":")
-                else:
-                    address, port = "localhost", "12345"
-                self.cat_control = CAT("flrig", address, int(port))
-            if local_rigctld:
-                if SERVER_ADDRESS:
-                    address, port = SERVER_ADDRESS.split(":")
-                else:
-                    address, port = "localhost", "4532"
-                self.cat_control = CAT("rigctld", address, int(port))
-            if local_omnirig:
-                self.cat_control = OmniRigClient(OMNI_RIGNUMBER)
+    def cat_discovered(self, cat_control: CAT) -> None:
+        """Called from the discovery thread, picked up by the next poll_radio."""
+        self.discovered_cat = cat_control
 
+    def adopt_discovered_cat(self) -> None:
+        """Start using a rig found in the background."""
+        if self.discovered_cat is None:
+            return
+        self.cat_control, self.discovered_cat = self.discovered_cat, None
+        if self.cat_control.interface == "omnirig":
+            self.cat_control = OmniRigClient(OMNI_RIGNUMBER)
+            self.cat_queue.set_backend(self.cat_control, threaded=False)
+            logger.debug("CAT control via omnirig")
+            return
+        self.cat_queue.set_backend(self.cat_control)
+        logger.debug("CAT control via %s", self.cat_control.interface)
+
+
+def install_icons(force: bool = False) -> bool:
+    """
+    Install application icons. Unless forced this only happens on the first
+    launch of a version, on a background thread.
+    """
+    installer = IconInstaller(f"{WORKING_PATH}/data", __version__)
+    if force:
+        return installer.install()
+    return installer.install_if_needed()
+
+
+def export_adif(path: str) -> bool:
+    """Write every logged QSO to an ADIF file, for --export-adif."""
+    home = os.path.expanduser("~")
+    qso_store = QSOStore(f"{home}/.augratin_qsos.db")
+    if qso_store.count() == 0 and os.path.exists(f"{home}/POTA_Contacts.adi"):
+        qso_store.import_adif(f"{home}/POTA_Contacts.adi")
+    try:
+        with open(os.path.expanduser(path), "w", encoding="utf-8") as file_descriptor:
+            exported = qso_store.export_adif(file_descriptor, ADIF_HEADER)
+    except OSError as exception:
+        logger.critical("%s", exception)
+        return False
+    print(f"Exported {exported} QSOs to {path}")
+    return True
 
-def install_icons():
-    """Install application icons"""
-    os.system(
-        "xdg-icon-resource install --size 128 --context apps --mode user "
-        f"{WORKING_PATH}/data/k6gte-augratin-128.png k6gte-augratin"
-    )
-    os.system(
-        "xdg-icon-resource install --size 64 --context apps --mode user "
-        f"{WORKING_PATH}/data/k6gte-augratin-64.png k6gte-augratin"
-    )
-    os.system(
-        "xdg-icon-resource install --size 32 --context apps --mode user "
-        f"{WORKING_PATH}/data/k6gte-augratin-32.png k6gte-augratin"
-    )
-    os.system(f"xdg-desktop-menu install {WORKING_PATH}/data/k6gte-augratin.desktop")
 
+def profile_event_loop(app: QApplication, name: str) -> int:
+    """Run the Qt event loop under cProfile, then save the profile and trace."""
+    # pylint: disable=import-outside-toplevel
+    import cProfile
+    import pstats
 
-app = QtWidgets.QApplication(sys.argv)
-font_dir = WORKING_PATH + "/data"
-families = load_fonts_from_dir(os.fspath(font_dir))
-logger.info(families)
-window = MainWindow()
-window.setWindowTitle(f"AuGratin v{__version__}")
-window.show()
-window.getspots()
-timer = QtCore.QTimer()
-timer.timeout.connect(window.getspots)
-timer2 = QtCore.QTimer()
-timer2.timeout.connect(window.poll_radio)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        code = app.exec()
+    finally:
+        profiler.disable()
+    profiler.dump_stats(f"{name}.pstats")
+    events = PERF.save_trace(f"{name}.trace.json")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    print(f"Wrote {name}.pstats and {name}.trace.json ({events} spans)")
+    return code
 
 
 def run():
     """Start the app"""
+    if args.install_icons:
+        sys.exit(0 if install_icons(force=True) else 1)
+    if args.headless:
+        sys.exit(run_headless(listen=args.listen, url=MainWindow.potaurl))
+    if args.export_adif:
+        sys.exit(0 if export_adif(args.export_adif) else 1)
     install_icons()
-    timer.start(30000)
-    timer2.start(100)
+    PROFILE.mark("install icons")
+    # QtWebEngine is loaded after the QApplication exists, which it
+    # only allows when contexts are shared.
+    QtCore.QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QtWidgets.QApplication(sys.argv)
+    PROFILE.mark("QApplication")
+    font_dir = WORKING_PATH + "/data"
+    families = load_fonts_from_dir(os.fspath(font_dir))
+    logger.info(families)
+    PROFILE.mark("fonts")
+    window = MainWindow()
+    window.setWindowTitle(f"AuGratin v{__version__}")
+    window.show()
+    PROFILE.mark("window shown")
+    QtCore.QTimer.singleShot(0, window.start_deferred)
+    if args.profile:
+        sys.exit(profile_event_loop(app, args.profile))
     sys.exit(app.exec())
 
 
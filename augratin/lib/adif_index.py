@@ -0,0 +1,227 @@
+"""
+K6GTE, Worked before index over the ADIF log
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import os
+import threading
+from json import dumps, loads
+from pathlib import Path
+
+try:
+    from augratin.lib.adif_reader import import_adif, scan_records
+except ModuleNotFoundError:
+    from lib.adif_reader import import_adif, scan_records
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+
+def record_parks(record: dict) -> list:
+    """The POTA parks in a record, from SIG_INFO or POTA_REF."""
+    parks = []
+    if record.get("SIG", "POTA").upper() == "POTA" and record.get("SIG_INFO"):
+        parks.append(record["SIG_INFO"])
+    if record.get("POTA_REF"):
+        parks.extend(record["POTA_REF"].split(","))
+    return [park.strip().split("@")[0].upper() for park in parks if park.strip()]
+
+
+class WorkedIndex:
+    """What has been worked, from the ADIF log."""
+
+    def __init__(self, adif_path: str, index_path: str = None) -> None:
+        """
+        Indexes CALL, SIG_INFO, BAND, MODE and QSO_DATE from the ADIF
+        file at 'adif_path'.
+
+        The first refresh() reads the whole log, after that only bytes
+        appended since the last refresh are read. If 'index_path' is
+        given save() keeps the index there so the next start does not
+        have to read the whole log again either. With a large imported
+        log that is a big file, so refresh() leaves saving to the caller,
+        who can do it off the GUI thread.
+
+        Logs from other programs can be added with import_file(), they
+        are kept in the index even if our own log is replaced.
+
+        Lookups are set membership tests.
+        """
+        self.adif_path = Path(adif_path)
+        self.index_path = Path(index_path) if index_path else None
+        self.imported = set()
+        self.lock = threading.Lock()
+        self.writing = threading.Lock()
+        self.dirty = False
+        self.clear()
+        self.load()
+
+    def clear(self) -> None:
+        """Forget everything read from our own log."""
+        self.offset = 0
+        self.head = ""
+        self.rows = []
+        self.calls = set()
+        self.parks = set()
+        self.park_band_mode = set()
+        self.call_park_date = set()
+        for row in self.imported:
+            self.__index_row(row)
+
+    def __index_row(self, row) -> None:
+        """Put a (call, park, band, mode, date) row in the lookup sets."""
+        call, park, band, mode, date = row
+        if call:
+            self.calls.add(call)
+        self.parks.add(park)
+        self.park_band_mode.add((park, band, mode))
+        self.call_park_date.add((call, park, date))
+
+    @staticmethod
+    def __rows(record: dict) -> list:
+        """The index rows for one ADIF record, one per park."""
+        call = record.get("CALL", "").upper()
+        band = record.get("BAND", "").lower()
+        mode = record.get("MODE", "").upper()
+        date = record.get("QSO_DATE", "")
+        return [(call, park, band, mode, date) for park in record_parks(record)]
+
+    def add(self, record: dict, imported: bool = False) -> None:
+        """Index one ADIF record."""
+        if record.get("CALL"):
+            self.calls.add(record["CALL"].upper())
+        for row in self.__rows(record):
+            if imported:
+                self.imported.add(row)
+            else:
+                self.rows.append(row)
+            self.__index_row(row)
+        self.dirty = True
+
+    def import_file(self, path: str, batch: int = 5000) -> dict:
+        """
+        Add another program's ADIF log, returns import_adif() stats.
+        Records are added under the lock a batch at a time, so this can
+        run on a worker thread while the GUI refreshes and saves.
+        """
+        records = []
+
+        def add_batch() -> None:
+            with self.lock:
+                for record in records:
+                    self.add(record, imported=True)
+            records.clear()
+
+        def collect(record: dict) -> None:
+            records.append(record)
+            if len(records) >= batch:
+                add_batch()
+
+        result = import_adif(path, collect)
+        add_batch()
+        self.save()
+        return result
+
+    def __head(self) -> str:
+        """The start of the indexed part of the log, to notice it being replaced."""
+        with open(self.adif_path, "rb") as file_descriptor:
+            head = file_descriptor.read(min(256, self.offset))
+        return head.decode("utf-8", errors="replace")
+
+    def refresh(self) -> int:
+        """
+        Read anything appended to the log, returns the number of new
+        records. Call save() to keep them in the saved index.
+        """
+        try:
+            size = os.path.getsize(self.adif_path)
+        except OSError:
+            return 0
+        if size == self.offset:
+            return 0
+        # save() copies the rows and offset under the lock, they must match.
+        with self.lock:
+            try:
+                if size < self.offset or (self.offset and self.__head() != self.head):
+                    logger.debug("ADIF log replaced, reindexing")
+                    self.clear()
+                    self.dirty = True
+                with open(self.adif_path, "rb") as file_descriptor:
+                    file_descriptor.seek(self.offset)
+                    data = file_descriptor.read(size - self.offset)
+            except OSError as exception:
+                logger.debug("%s", exception)
+                return 0
+            count = 0
+            end = 0
+            for record, end in scan_records(data):
+                self.add(record)
+                count += 1
+            if not end:
+                return 0
+            self.offset += end
+            if len(self.head) < 256:
+                try:
+                    self.head = self.__head()
+                except OSError:
+                    self.head = ""
+            return count
+
+    def load(self) -> None:
+        """Load a saved index if it still matches the log."""
+        if not self.index_path or not self.index_path.exists():
+            return
+        try:
+            saved = loads(self.index_path.read_text(encoding="utf-8"))
+            if saved.get("adif") != str(self.adif_path):
+                return
+            self.imported = {tuple(row) for row in saved.get("imported", [])}
+            self.clear()
+            self.rows = [tuple(row) for row in saved.get("rows", [])]
+            for row in self.rows:
+                self.__index_row(row)
+            self.offset = saved.get("offset", 0)
+            self.head = saved.get("head", "")
+        except (OSError, ValueError, TypeError) as exception:
+            logger.debug("Ignoring saved index: %s", exception)
+            self.imported = set()
+            self.clear()
+
+    def save(self) -> None:
+        """Save the index if anything was added since the last save, any thread."""
+        if not self.index_path or not self.dirty:
+            return
+        with self.lock:
+            # Copies, refresh() can carry on while they are written.
+            self.dirty = False
+            saved = {
+                "adif": str(self.adif_path),
+                "offset": self.offset,
+                "head": self.head,
+                "rows": list(self.rows),
+                "imported": list(self.imported),
+            }
+        with self.writing:
+            temporary = self.index_path.with_name(self.index_path.name + ".tmp")
+            try:
+                temporary.write_text(dumps(saved), encoding="utf-8")
+                os.replace(temporary, self.index_path)
+            except OSError as exception:
+                self.dirty = True
+                logger.debug("%s", exception)
+
+    def worked_park(self, park: str) -> bool:
+        """Has this park ever been worked."""
+        return park.upper() in self.parks
+
+    def worked_park_band_mode(self, park: str, band: str, mode: str) -> bool:
+        """Has this park been worked on this band and mode."""
+        return (park.upper(), band.lower(), mode.upper()) in self.park_band_mode
+
+    def worked_on(self, call: str, park: str, date: str) -> bool:
+        """Was this activator worked at this park on this date, YYYYMMDD."""
+        return (call.upper(), park.upper(), date) in self.call_park_date
@@ -0,0 +1,96 @@
+"""
+K6GTE, Streaming ADIF reader
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import mmap
+import time
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+
+def scan_records(buffer, start: int = 0, end: int = None):
+    """
+    Yields (record, offset) for each complete record in 'buffer',
+    which may be bytes or an mmap, between 'start' and 'end'.
+
+    'record' is a dict of upper cased field names to str values,
+    'offset' is just past the record's <EOR>.
+
+    Works on <TAG:len>value and <TAG:len:type>value fields, anything
+    before <EOH> is ignored. A field length counted in characters
+    rather than bytes only clips that value, the scan picks up again
+    at the next '<'.
+    """
+    if end is None:
+        end = len(buffer)
+    find = buffer.find
+    names = {}
+    record = {}
+    pos = find(b"<", start, end)
+    while pos >= 0:
+        close = find(b">", pos + 1, end)
+        if close < 0:
+            return
+        tag = buffer[pos + 1 : close]
+        name = names.get(tag)
+        if name is None:
+            name = tag.split(b":")
+            try:
+                name = (name[0].upper().decode("ascii"), int(name[1]))
+            except (IndexError, ValueError, UnicodeDecodeError):
+                name = (tag.upper(), None)
+            names[tag] = name
+        field, size = name
+        if size is None:
+            if field == b"EOR":
+                if record:
+                    yield record, close + 1
+                record = {}
+            elif field == b"EOH":
+                record = {}
+            pos = find(b"<", close + 1, end)
+            continue
+        value_end = close + 1 + size
+        record[field] = buffer[close + 1 : value_end].decode("utf-8", errors="replace")
+        pos = find(b"<", value_end, end)
+
+
+def iter_records(path: str):
+    """Yields each record of the ADIF file at 'path' without reading it all in."""
+    with open(path, "rb") as file_descriptor:
+        try:
+            buffer = mmap.mmap(file_descriptor.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files.
+            return
+        try:
+            for record, _offset in scan_records(buffer):
+                yield record
+        finally:
+            buffer.close()
+
+
+def import_adif(path: str, consumer) -> dict:
+    """
+    Hands every record in the ADIF file at 'path' to 'consumer(record)'.
+    Returns the record count, elapsed seconds and records per second.
+    """
+    started = time.perf_counter()
+    count = 0
+    for record in iter_records(path):
+        consumer(record)
+        count += 1
+    elapsed = time.perf_counter() - started
+    result = {
+        "records": count,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(count / elapsed) if elapsed else 0,
+    }
+    logger.info("Imported %s: %s", path, result)
+    return result
@@ -0,0 +1,89 @@
+"""
+K6GTE, Band plan
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+from bisect import bisect_right
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+# name, lower edge MHz, upper edge MHz, bandmap step multiplier
+#
+# 60m is channelised in some countries and a band segment in others, so
+# it is one block from the lowest to the highest national allocation.
+# A spot anywhere in it is shown on the 60m map, channels aren't checked.
+BANDS = (
+    ("160m", 1.8, 2.0, 1),
+    ("80m", 3.5, 4.0, 1),
+    ("60m", 5.102, 5.4065, 1),
+    ("40m", 7.0, 7.3, 1),
+    ("30m", 10.1, 10.15, 1),
+    ("20m", 14.0, 14.35, 1),
+    ("17m", 18.068, 18.168, 1),
+    ("15m", 21.0, 21.45, 1),
+    ("12m", 24.89, 24.99, 1),
+    ("10m", 28.0, 29.7, 10),
+    ("6m", 50.0, 54.0, 10),
+    ("4m", 70.0, 71.0, 10),
+    ("2m", 144.0, 148.0, 10),
+)
+
+# bandmap zoom level: (step in MHz per tick, digits shown)
+ZOOM_STEPS = {
+    1: (0.0001, 4),
+    2: (0.00025, 4),
+    3: (0.0005, 4),
+    4: (0.001, 3),
+    5: (0.0025, 3),
+    6: (0.005, 3),
+    7: (0.01, 2),
+}
+
+
+class BandPlan:
+    """Frequency to band lookups."""
+
+    def __init__(self, bands=BANDS) -> None:
+        """
+        'bands' is a sequence of (name, lower MHz, upper MHz, step multiplier),
+        edges are inclusive. Lookups bisect the sorted lower edges.
+        """
+        self.bands = tuple(sorted(bands, key=lambda band: band[1]))
+        self.starts = [band[1] for band in self.bands]
+        self.ends = [band[2] for band in self.bands]
+        self.by_name = {band[0]: band for band in self.bands}
+
+    def band_for(self, freq: float):
+        """The band name for a frequency in MHz, None if it's not in a band."""
+        index = bisect_right(self.starts, freq) - 1
+        if index >= 0 and freq <= self.ends[index]:
+            return self.bands[index][0]
+        return None
+
+    def bands_for(self, freqs) -> list:
+        """band_for() over a sequence of frequencies in MHz."""
+        band_for = self.band_for
+        return [band_for(freq) for freq in freqs]
+
+    def edges(self, name: str) -> tuple:
+        """(lower, upper) MHz of a band, (0.0, 1.0) if it's unknown."""
+        band = self.by_name.get(name)
+        if band is None:
+            return (0.0, 1.0)
+        return (band[1], band[2])
+
+    def step(self, name: str, zoom: int) -> tuple:
+        """(step, digits) for drawing a band at a zoom level."""
+        step, digits = ZOOM_STEPS.get(zoom, (0.0001, 4))
+        band = self.by_name.get(name)
+        if band is not None:
+            step = step * band[3]
+        return (step, digits)
+
+
+BAND_PLAN = BandPlan()
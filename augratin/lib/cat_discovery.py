@@ -0,0 +1,153 @@
+"""
+K6GTE, CAT backend discovery
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import re
+import socket
+import threading
+import time
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+
+def process_running(name: str) -> bool:
+    """checks to see if program of name is in the active process list"""
+    import psutil  # pylint: disable=import-outside-toplevel
+
+    for proc in psutil.process_iter():
+        if bool(re.match(name, proc.name().lower())):
+            logger.debug("%s found!", name)
+            return True
+    return False
+
+
+class CATDiscovery:
+    """Find a running flrig or rigctld by knocking on its port."""
+
+    ports = {
+        "rigctld": 4532,
+        "flrig": 12345,
+    }
+
+    def __init__(
+        self,
+        server_address: str = None,
+        interface: str = None,
+        ttl: float = 5.0,
+        timeout: float = 0.25,
+        retry: float = 3.0,
+        processes: dict = None,
+    ) -> None:
+        """
+        Probes the well known rigctld and flrig ports on localhost.
+
+        If 'server_address' is given as host:port, only that address is
+        probed. Unless 'interface' says what to expect there, the protocol
+        is guessed from what it answers to a rigctld 'f' command.
+
+        'processes' maps backends without a port to the program that has to
+        be running, {"omnirig": "omnirig.exe"}. They are looked for in the
+        process list before any port is probed, and found as
+        (interface, None, None).
+
+        The result of discover() is cached for 'ttl' seconds.
+
+        connect_in_background() keeps probing every 'retry' seconds on a
+        worker thread until something answers.
+        """
+        self.server_address = server_address
+        self.interface = interface
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry = retry
+        self.processes = processes or {}
+        self.result = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def __candidates(self) -> list:
+        """List of (interface, host, port) to try, best first."""
+        if self.server_address:
+            host, port = self.server_address.split(":")
+            return [(self.interface, host, int(port))]
+        return [(interface, None, None) for interface in self.processes] + [
+            (interface, "localhost", port) for interface, port in self.ports.items()
+        ]
+
+    def __probe(self, interface, host: str, port: int):
+        """Returns the interface name if something is listening, otherwise None."""
+        try:
+            with socket.create_connection((host, port), timeout=self.timeout) as sock:
+                if interface:
+                    return interface
+                return self.__identify(sock)
+        except OSError:
+            return None
+
+    def __identify(self, sock) -> str:
+        """rigctld answers 'f' with a number or RPRT, anything else is flrig."""
+        try:
+            sock.sendall(b"f\n")
+            reply = sock.recv(64).decode(errors="ignore").strip()
+        except OSError:
+            return "flrig"
+        if reply.startswith("RPRT") or reply.replace(".", "", 1).isdigit():
+            return "rigctld"
+        return "flrig"
+
+    def discover(self, force: bool = False):
+        """
+        Returns (interface, host, port) of the first backend found,
+        or None. Cached for 'ttl' seconds unless 'force' is True.
+        """
+        with self.lock:
+            if not force and time.monotonic() - self.checked < self.ttl:
+                return self.result
+            self.result = None
+            for interface, host, port in self.__candidates():
+                if host is None:
+                    found = process_running(self.processes[interface]) and interface
+                else:
+                    found = self.__probe(interface, host, port)
+                if found:
+                    logger.debug("%s found at %s:%s", found, host, port)
+                    self.result = (found, host, port)
+                    break
+            self.checked = time.monotonic()
+            return self.result
+
+    def connect_in_background(self, factory, callback, force: bool = False) -> None:
+        """
+        Keep probing on a worker thread. When a backend answers,
+        'factory(interface, host, port)' builds the rig object and,
+        if it is online, 'callback(rig)' is called from the worker thread.
+
+        Probes go through discover(), so a result less than 'ttl' old is
+        used as it is. 'force', for a retry the user asked for, probes
+        right away, or has an already running search do so next.
+        """
+        if force:
+            with self.lock:
+                self.checked = 0.0
+        if self.thread and self.thread.is_alive():
+            return
+
+        def search():
+            while True:
+                found = self.discover()
+                if found:
+                    rig = factory(*found)
+                    if getattr(rig, "online", False):
+                        callback(rig)
+                        return
+                time.sleep(self.retry)
+
+        self.thread = threading.Thread(target=search, name="cat-discovery", daemon=True)
+        self.thread.start()
@@ -111,7 +111,10 @@ class CAT:
             try:
                 self.online = True
                 self.rigctrlsocket.send(b"\nf\n")
-                return self.rigctrlsocket.recv(1024).decode().strip()
+                vfo = self.rigctrlsocket.recv(1024).decode().strip()
+                if not vfo:
+                    raise ConnectionResetError("rigctld closed the connection")
+                return vfo
             except socket.error as exception:
                 self.online = False
                 logger.debug("getvfo_rigctld: %s", exception)
@@ -0,0 +1,149 @@
+"""
+K6GTE, Coalescing CAT command queue
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import threading
+import time
+import xmlrpc.client
+from collections import deque
+
+try:
+    from pywintypes import com_error  # pylint: disable=import-error
+except ImportError:
+    com_error = OSError
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+
+class CATCommandQueue:
+    """Sends tune requests to the rig from a worker thread."""
+
+    def __init__(self, cat=None, window: int = 50, threaded: bool = True) -> None:
+        """
+        Queue of tune requests for a CAT, OmniRigClient or anything else
+        with set_vfo() and set_mode().
+
+        Only the latest request is kept. If the user clicks through
+        several spots while the rig is busy, the ones in between are
+        dropped and counted as 'coalesced'.
+
+        A mode change is skipped if the last one sent was to that mode.
+        Call forget_mode() whenever the mode polled from the rig changes,
+        it may have been changed by hand.
+
+        Without 'threaded' requests are sent from the thread calling
+        submit() instead, see set_backend().
+
+        Anyone else talking to the rig from another thread should hold
+        'lock' while doing so.
+
+        'window' is how many completion latencies are kept for metrics().
+        """
+        self.cat = cat
+        self.threaded = threaded
+        self.lock = threading.RLock()
+        self.mode = None
+        self.pending = None
+        self.sent = 0
+        self.coalesced = 0
+        self.mode_skipped = 0
+        self.latencies = deque(maxlen=window)
+        self.running = True
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(
+            target=self.__worker, name="cat-queue", daemon=True
+        )
+        self.thread.start()
+
+    def set_backend(self, cat, threaded: bool = True) -> None:
+        """
+        Use a new rig interface, forget what we knew about the old one.
+        OmniRig is a COM object that belongs to the thread that made it,
+        pass threaded=False for it and tuning stays on that thread.
+        """
+        with self.lock:
+            self.cat = cat
+            self.threaded = threaded
+            self.mode = None
+
+    def forget_mode(self) -> None:
+        """The rig's mode may have changed, send the next one regardless."""
+        with self.lock:
+            self.mode = None
+
+    def submit(self, freq: str, mode: str = "") -> None:
+        """Tune the rig to freq in Hz and set mode, replaces any waiting request."""
+        if not self.threaded:
+            self.__tune(freq, mode, time.perf_counter())
+            return
+        with self.condition:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = (freq, mode, time.perf_counter())
+            self.condition.notify()
+
+    def stop(self) -> None:
+        """Stop the worker thread."""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(timeout=2)
+
+    def __worker(self) -> None:
+        """Send the latest request to the rig."""
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                freq, mode, queued = self.pending
+                self.pending = None
+            self.__tune(freq, mode, queued)
+
+    def __tune(self, freq: str, mode: str, queued: float) -> None:
+        """Send one request, whatever the rig interface raises."""
+        try:
+            self.__send(freq, mode)
+        except (ConnectionRefusedError, OSError) as exception:
+            logger.debug("cat queue: %s", exception)
+        except (xmlrpc.client.Fault, com_error) as exception:
+            # Refused by flrig or OmniRig, the worker must not end,
+            # the next spot clicked should still tune.
+            logger.warning("cat queue: %s", exception)
+        self.latencies.append(time.perf_counter() - queued)
+
+    def __send(self, freq: str, mode: str) -> None:
+        """Set mode first because some rigs offset vfo based on mode."""
+        with self.lock:
+            if self.cat is None:
+                return
+            if mode:
+                if self.mode == mode:
+                    self.mode_skipped += 1
+                else:
+                    self.cat.set_mode(mode)
+                    self.mode = mode
+            self.cat.set_vfo(freq)
+            self.sent += 1
+
+    def metrics(self) -> dict:
+        """Returns counters and command completion latency in ms."""
+        latency = sorted(self.latencies)
+        result = {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "mode_skipped": self.mode_skipped,
+            "latency_avg_ms": 0.0,
+            "latency_max_ms": 0.0,
+        }
+        if latency:
+            result["latency_avg_ms"] = round(sum(latency) / len(latency) * 1000, 2)
+            result["latency_max_ms"] = round(latency[-1] * 1000, 2)
+        return result
@@ -0,0 +1,173 @@
+"""
+K6GTE, DX cluster and RBN simulator
+Email: michael.bridak@gmail.com
+GPL V3
+
+Stand in for a DX cluster or a Reverse Beacon Network telnet feed.
+
+python -m augratin.lib.cluster_simulator --port 7300 --rate 5
+python -m augratin.lib.cluster_simulator --port 7000 --rbn --rate 500
+"""
+
+import argparse
+import logging
+import random
+import socketserver
+import threading
+import time
+
+logger = logging.getLogger("__main__")
+
+SEGMENTS = {
+    "CW": ((3500, 3560), (7000, 7060), (14000, 14070), (21000, 21070)),
+    "SSB": ((3800, 4000), (7150, 7300), (14200, 14350), (21300, 21450)),
+    "FT8": ((3573, 3573), (7074, 7074), (14074, 14074), (21074, 21074)),
+}
+
+
+class ClusterSimulator:
+    """Sends 'DX de' lines to everyone who logs in."""
+
+    server = None
+    thread = None
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 0,
+        rate: float = 5.0,
+        calls: int = 2000,
+        rbn: bool = False,
+        seed=None,
+    ) -> None:
+        """
+        After asking for a callsign each client gets 'rate' spots a
+        second of 'calls' different callsigns, about one in five at a
+        park. With 'rbn' the lines look like skimmer spots, all CW or
+        FT8 with signal reports.
+        """
+        self.host = host
+        self.requested_port = port
+        self.rate = rate
+        self.calls = [f"K{index}SIM" for index in range(calls)]
+        self.rbn = rbn
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sent = 0
+
+    @property
+    def port(self) -> int:
+        """The port actually bound, useful when asking for port 0."""
+        if self.server:
+            return self.server.server_address[1]
+        return self.requested_port
+
+    def line(self) -> str:
+        """One random spot."""
+        with self.lock:
+            rand = self.random
+            call = rand.choice(self.calls)
+            mode = rand.choice(("CW", "FT8") if self.rbn else tuple(SEGMENTS))
+            low, high = rand.choice(SEGMENTS[mode])
+            freq = round(rand.uniform(low, high), 1)
+            if self.rbn:
+                spotter = f"W{rand.randrange(10)}SKM-#"
+            else:
+                spotter = f"N{rand.randrange(10)}SPT"
+            hhmm = time.strftime("%H%M", time.gmtime())
+            if self.rbn:
+                comment = (
+                    f"{mode:<4} {rand.randrange(3, 40):>2} dB  "
+                    f"{rand.randrange(15, 35)} WPM  CQ"
+                )
+            else:
+                comment = mode
+                if rand.random() < 0.2:
+                    comment += f" POTA K-{rand.randrange(10000):04}"
+        return (
+            f"DX de {spotter + ':':<12}{freq:>9}  {call:<12} {comment:<30} {hhmm}Z\r\n"
+        )
+
+    def start(self) -> "ClusterSimulator":
+        """Start serving on a daemon thread."""
+        simulator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            """One logged in client."""
+
+            def handle(self):
+                self.wfile.write(b"Please enter your call: ")
+                login = self.rfile.readline().strip().decode(errors="replace")
+                if not login:
+                    return
+                self.wfile.write(f"Hello {login}, spots follow.\r\n".encode())
+                started = time.monotonic()
+                sent = 0
+                try:
+                    while simulator.server is not None:
+                        due = int((time.monotonic() - started) * simulator.rate)
+                        if due > sent:
+                            lines = "".join(simulator.line() for _ in range(due - sent))
+                            self.wfile.write(lines.encode())
+                            with simulator.lock:
+                                simulator.sent += due - sent
+                            sent = due
+                        time.sleep(0.01)
+                except OSError:
+                    return
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(
+            (self.host, self.requested_port), Handler
+        )
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name=type(self).__name__, daemon=True
+        )
+        self.thread.start()
+        logger.debug("%s listening on %s:%s", type(self).__name__, self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and free the port."""
+        if self.server:
+            server, self.server = self.server, None
+            server.shutdown()
+            server.server_close()
+            self.thread.join(timeout=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+
+def main():
+    """Run a simulator until interrupted."""
+    cli = argparse.ArgumentParser(description="Pretend to be a DX cluster.")
+    cli.add_argument("--host", default="localhost")
+    cli.add_argument("--port", type=int, default=7300)
+    cli.add_argument("--rate", type=float, default=5.0, help="Spots a second")
+    cli.add_argument("--calls", type=int, default=2000)
+    cli.add_argument("--rbn", action="store_true", help="Skimmer style spots")
+    cli.add_argument("--seed", type=int)
+    options = cli.parse_args()
+    simulator = ClusterSimulator(
+        options.host,
+        options.port,
+        options.rate,
+        options.calls,
+        options.rbn,
+        options.seed,
+    ).start()
+    print(f"Cluster simulator on {options.host}:{simulator.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
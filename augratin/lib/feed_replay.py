@@ -0,0 +1,340 @@
+"""
+K6GTE, Record and replay the POTA api
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import argparse
+import bisect
+import logging
+import random
+import string
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from urllib.parse import urlsplit
+
+try:
+    from augratin.lib import geo
+    from augratin.lib.bandplan import BAND_PLAN
+except ModuleNotFoundError:
+    from lib import geo
+    from lib.bandplan import BAND_PLAN
+
+logger = logging.getLogger("__main__")
+
+POTA_API = "https://api.pota.app"
+SPOT_PATH = "/spot/activator"
+
+
+class FeedRecorder:
+    """Appends api responses to a JSON lines file."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Each line of 'path' is one response:
+        {"time": unix time, "path": "/park/K-0064", "status": 200, "body": "..."}
+        The body is kept exactly as it came, undecoded.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def record(self, url: str, status: int, body: str, when: float = None) -> None:
+        """Save one response, safe to call from any thread."""
+        line = dumps(
+            {
+                "time": time.time() if when is None else when,
+                "path": urlsplit(url).path,
+                "status": status,
+                "body": body,
+            }
+        )
+        with self.lock:
+            try:
+                with open(self.path, "at", encoding="utf-8") as file_descriptor:
+                    file_descriptor.write(line + "\n")
+                self.count += 1
+            except OSError as exception:
+                logger.critical("%s", exception)
+
+
+def load_recording(path: str) -> list:
+    """The responses in a recording, oldest first."""
+    responses = []
+    with open(path, "rt", encoding="utf-8") as file_descriptor:
+        for line in file_descriptor:
+            if line.strip():
+                responses.append(loads(line))
+    responses.sort(key=lambda response: response["time"])
+    return responses
+
+
+def random_grid(rand: random.Random) -> str:
+    """A random six character gridsquare."""
+    return (
+        rand.choice(string.ascii_uppercase[:18])
+        + rand.choice(string.ascii_uppercase[:18])
+        + str(rand.randrange(10))
+        + str(rand.randrange(10))
+        + rand.choice(string.ascii_lowercase[:24])
+        + rand.choice(string.ascii_lowercase[:24])
+    )
+
+
+def synthetic_spots(count: int, seed: int = 1, band: tuple = None) -> list:
+    """
+    Spots shaped like the /spot/activator feed, frequencies in kHz.
+    'band' (lower, upper) in kHz keeps them on one band.
+    """
+    rand = random.Random(seed)
+    low, high = band or (1800, 148000)
+    spots = []
+    for index in range(count):
+        grid = random_grid(rand)
+        lat, lon = geo.gridtolatlon(grid)
+        spots.append(
+            {
+                "spotId": index,
+                "activator": f"K{index}SYN",
+                "frequency": str(round(rand.uniform(low, high), 1)),
+                "mode": rand.choice(("CW", "SSB", "FT8")),
+                "reference": f"K-{rand.randrange(10000):04}",
+                "parkName": "Synthetic Park",
+                "spotTime": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+                "spotter": "K6GTE",
+                "comments": "",
+                "source": "Web",
+                "invalid": None,
+                "name": "Synthetic Park",
+                "locationDesc": "US-CA",
+                "grid4": grid[:4],
+                "grid6": grid,
+                "latitude": lat,
+                "longitude": lon,
+                "count": 1,
+                "expire": 600,
+            }
+        )
+    return spots
+
+
+def amplify(spots: list, count: int) -> list:
+    """
+    Grow a spot list to at least 'count' spots, so the load looks like a
+    busy weekend of the same mix. Each real spot gets copies with new
+    spotIds and callsigns, moved a little in frequency but kept on the
+    band. A copy only depends on the spot it was made from, so while a
+    recording replays the copies come and go with the real spots.
+    """
+    if len(spots) >= count:
+        return spots
+    if not spots:
+        return synthetic_spots(count)
+    copies = -(-count // len(spots))
+    grown = list(spots)
+    for copy in range(1, copies):
+        for spot in spots:
+            spot_id = int(spot.get("spotId") or 0)
+            rand = random.Random(spot_id * 1000 + copy)
+            clone = dict(spot)
+            try:
+                khz = float(spot.get("frequency"))
+                low, high = BAND_PLAN.edges(BAND_PLAN.band_for(khz / 1000) or "")
+                khz += rand.uniform(-25, 25)
+                if high > 1.0:
+                    khz = min(high * 1000, max(low * 1000, khz))
+                clone["frequency"] = str(round(khz, 1))
+            except (TypeError, ValueError):
+                pass
+            clone["spotId"] = spot_id + copy * 1000000000
+            clone["activator"] = f"{spot.get('activator', 'K6GTE')}/{copy}"
+            grown.append(clone)
+    return grown
+
+
+class FeedReplayServer:
+    """A local stand in for api.pota.app."""
+
+    def __init__(
+        self,
+        responses: list,
+        speed: float = 1.0,
+        amplify_to: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Serves recorded responses, see FeedRecorder and load_recording().
+
+        /spot/activator answers with the feed as it was at the replay
+        clock, which runs 'speed' times real time from the first
+        recording. A 'speed' of 0 moves to the next recorded feed on
+        every request instead. Past the end the last feed is repeated.
+
+        /park/... and /stats/user/... get the latest recorded response
+        for that path, or a 404.
+
+        With 'amplify_to' every feed is grown to that many spots, if
+        nothing was recorded a synthetic feed is made up.
+        """
+        self.speed = speed
+        self.amplify_to = amplify_to
+        self.host = host
+        self.requested_port = port
+        self.feeds = [
+            response for response in responses if response["path"] == SPOT_PATH
+        ]
+        self.feed_times = [response["time"] for response in self.feeds]
+        self.others = {
+            response["path"]: response
+            for response in responses
+            if response["path"] != SPOT_PATH
+        }
+        self.bodies = {}
+        self.served = 0
+        self.started = None
+        self.server = None
+
+    @property
+    def port(self) -> int:
+        """The port actually bound."""
+        if self.server:
+            return self.server.server_address[1]
+        return self.requested_port
+
+    @property
+    def url(self) -> str:
+        """Base url to use in place of https://api.pota.app"""
+        return f"http://{self.host}:{self.port}"
+
+    def feed_index(self) -> int:
+        """Which recorded feed is current."""
+        if not self.feeds:
+            return -1
+        if self.speed <= 0:
+            return min(self.served, len(self.feeds) - 1)
+        clock = self.feed_times[0] + (time.monotonic() - self.started) * self.speed
+        return max(0, bisect.bisect_right(self.feed_times, clock) - 1)
+
+    def feed_body(self) -> bytes:
+        """The spot feed to send now, encoded once per recorded feed."""
+        index = self.feed_index()
+        if index not in self.bodies:
+            spots = loads(self.feeds[index]["body"]) if index >= 0 else []
+            if self.amplify_to:
+                spots = amplify(spots, self.amplify_to)
+            self.bodies[index] = dumps(spots).encode()
+        self.served += 1
+        return self.bodies[index]
+
+    def start(self) -> "FeedReplayServer":
+        """Start serving on a daemon thread."""
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """GET only."""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                path = urlsplit(self.path).path
+                if path == SPOT_PATH:
+                    self.reply(200, replay.feed_body())
+                    return
+                response = replay.others.get(path)
+                if response is None:
+                    self.reply(404, b'{"error": "not recorded"}')
+                    return
+                self.reply(response["status"], response["body"].encode())
+
+            def reply(self, status: int, body: bytes):
+                """Send a JSON response."""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                """Keep quiet."""
+
+        self.server = ThreadingHTTPServer((self.host, self.requested_port), Handler)
+        self.server.daemon_threads = True
+        self.started = time.monotonic()
+        threading.Thread(
+            target=self.server.serve_forever, name="feed-replay", daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+
+def record(path: str, interval: float, duration: float, api: str = POTA_API) -> int:
+    """Poll the live spot feed into a recording, returns how many were saved."""
+    import requests  # pylint: disable=import-outside-toplevel
+
+    recorder = FeedRecorder(path)
+    ends = time.monotonic() + duration
+    while time.monotonic() < ends:
+        try:
+            response = requests.get(f"{api}{SPOT_PATH}", timeout=10)
+            recorder.record(response.url, response.status_code, response.text)
+            print(f"{recorder.count} feeds recorded", file=sys.stderr)
+        except requests.exceptions.RequestException as exception:
+            logger.critical("%s", exception)
+        time.sleep(interval)
+    return recorder.count
+
+
+def main(argv=None) -> int:
+    """python -m augratin.lib.feed_replay record|replay ..."""
+    cli = argparse.ArgumentParser(description="Record or replay the POTA api.")
+    commands = cli.add_subparsers(dest="command", required=True)
+    recording = commands.add_parser("record", help="Poll the live spot feed")
+    recording.add_argument("file")
+    recording.add_argument("--interval", type=float, default=30.0)
+    recording.add_argument("--duration", type=float, default=3600.0)
+    replay = commands.add_parser("replay", help="Serve a recording locally")
+    replay.add_argument("file", nargs="?", help="Leave out for synthetic spots")
+    replay.add_argument("--port", type=int, default=8088)
+    replay.add_argument(
+        "--speed", type=float, default=1.0, help="0 = next feed each poll"
+    )
+    replay.add_argument("--amplify", type=int, default=0, metavar="SPOTS")
+    options = cli.parse_args(argv)
+
+    if options.command == "record":
+        record(options.file, options.interval, options.duration)
+        return 0
+    responses = load_recording(options.file) if options.file else []
+    server = FeedReplayServer(
+        responses, options.speed, options.amplify, port=options.port
+    ).start()
+    print(
+        f"Replaying {len(server.feeds)} feeds at {server.url}, "
+        f"run augratin --api {server.url}"
+    )
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
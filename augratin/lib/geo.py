@@ -0,0 +1,136 @@
+"""
+K6GTE, Gridsquare distance and bearing
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+from functools import lru_cache
+from math import asin, atan2, cos, pi, radians, sin, sqrt
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+EARTH_RADIUS = 6372.8  # Radius of earth in kilometers.
+
+
+@lru_cache(maxsize=65536)
+def gridtolatlon(maiden):
+    """
+    Converts a maidenhead gridsquare to a latitude longitude pair.
+    """
+    maiden = str(maiden).strip().upper()
+
+    length = len(maiden)
+    if not 8 >= length >= 2 and length % 2 == 0:
+        return 0, 0
+
+    lon = (ord(maiden[0]) - 65) * 20 - 180
+    lat = (ord(maiden[1]) - 65) * 10 - 90
+
+    if length >= 4:
+        lon += (ord(maiden[2]) - 48) * 2
+        lat += ord(maiden[3]) - 48
+
+    if length >= 6:
+        lon += (ord(maiden[4]) - 65) / 12 + 1 / 24
+        lat += (ord(maiden[5]) - 65) / 24 + 1 / 48
+
+    if length >= 8:
+        lon += (ord(maiden[6])) * 5.0 / 600
+        lat += (ord(maiden[7])) * 2.5 / 600
+
+    return lat, lon
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    """
+    Calculate the great circle distance in kilometers between two points
+    on the earth (specified in decimal degrees)
+    """
+    # convert degrees to radians
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+
+    # haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    aye = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    cee = 2 * asin(sqrt(aye))
+    return cee * EARTH_RADIUS
+
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """Bearing in degrees, 0 to 360, from the first point to the second."""
+    lat1 = radians(lat1)
+    lon1 = radians(lon1)
+    lat2 = radians(lat2)
+    lon2 = radians(lon2)
+    londelta = lon2 - lon1
+    why = sin(londelta) * cos(lat2)
+    exs = cos(lat1) * sin(lat2) - sin(lat1) * cos(lat2) * cos(londelta)
+    brng = atan2(why, exs)
+    brng *= 180 / pi
+
+    if brng < 0:
+        brng += 360
+
+    return brng
+
+
+def distance(grid1: str, grid2: str) -> float:
+    """
+    Takes two maidenhead gridsquares and returns the distance between the two in kilometers.
+    """
+    lat1, lon1 = gridtolatlon(grid1)
+    lat2, lon2 = gridtolatlon(grid2)
+    return round(haversine(lon1, lat1, lon2, lat2))
+
+
+def bearing(grid1: str, grid2: str) -> float:
+    """calculate bearing to contact"""
+    lat1, lon1 = gridtolatlon(grid1)
+    lat2, lon2 = gridtolatlon(grid2)
+    return round(initial_bearing(lat1, lon1, lat2, lon2))
+
+
+def distances_bearings(mygrid: str, grids: list) -> tuple:
+    """
+    Distance in km and bearing in degrees, both rounded, from 'mygrid'
+    to every grid in 'grids'. Returns two lists the same length as
+    'grids'. Uses NumPy when it is installed.
+    """
+    if not grids:
+        return [], []
+    lat1, lon1 = gridtolatlon(mygrid)
+    points = [gridtolatlon(grid) for grid in grids]
+    if numpy is None:
+        return (
+            [round(haversine(lon1, lat1, lon2, lat2)) for lat2, lon2 in points],
+            [round(initial_bearing(lat1, lon1, lat2, lon2)) for lat2, lon2 in points],
+        )
+    lat1, lon1 = radians(lat1), radians(lon1)
+    lat2, lon2 = numpy.radians(numpy.array(points, dtype=float)).T
+    dlon = lon2 - lon1
+    aye = (
+        numpy.sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * numpy.cos(lat2) * numpy.sin(dlon / 2) ** 2
+    )
+    km = 2 * numpy.arcsin(numpy.sqrt(aye)) * EARTH_RADIUS
+    brng = numpy.degrees(
+        numpy.arctan2(
+            numpy.sin(dlon) * numpy.cos(lat2),
+            cos(lat1) * numpy.sin(lat2) - sin(lat1) * numpy.cos(lat2) * numpy.cos(dlon),
+        )
+    )
+    brng = numpy.where(brng < 0, brng + 360, brng)
+    return (
+        [int(value) for value in numpy.round(km)],
+        [int(value) for value in numpy.round(brng)],
+    )
@@ -0,0 +1,204 @@
+"""
+K6GTE, Headless spot daemon
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import socket
+import sys
+import threading
+from json import dumps, loads
+
+try:
+    from augratin.lib.spot_engine import POTA_SPOTS, SpotEngine
+except ModuleNotFoundError:
+    from lib.spot_engine import POTA_SPOTS, SpotEngine
+
+logger = logging.getLogger("__main__")
+
+
+def diff_line(diff: dict) -> str:
+    """One JSON line for a spot diff, stamped with the UTC time."""
+    return (
+        dumps(
+            {
+                "time": datetime.datetime.now(datetime.timezone.utc).isoformat(
+                    timespec="seconds"
+                ),
+                **diff,
+            },
+            default=str,
+        )
+        + "\n"
+    )
+
+
+class LineServer:
+    """Hands JSON lines to every client connected over TCP."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, greeting=None) -> None:
+        """
+        Listens on host:port. A new client first gets the line returned
+        by 'greeting()', the whole spot table, then every send().
+        """
+        self.greeting = greeting
+        self.clients = []
+        self.lock = threading.Lock()
+        self.server = socket.create_server((host, port))
+        self.thread = threading.Thread(
+            target=self.__accept, name="headless-accept", daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        """The port actually bound."""
+        return self.server.getsockname()[1]
+
+    def start(self) -> "LineServer":
+        """Start accepting clients."""
+        self.thread.start()
+        return self
+
+    def __accept(self) -> None:
+        while True:
+            try:
+                client, address = self.server.accept()
+            except OSError:
+                return
+            logger.info("Client %s:%s connected", *address[:2])
+            with self.lock:
+                if self.greeting is not None:
+                    if not self.__write(client, self.greeting()):
+                        continue
+                self.clients.append(client)
+
+    @staticmethod
+    def __write(client: socket.socket, line: str) -> bool:
+        try:
+            client.sendall(line.encode())
+            return True
+        except OSError:
+            client.close()
+            return False
+
+    def send(self, line: str) -> None:
+        """Send a line to every client, dropping the ones that went away."""
+        with self.lock:
+            self.clients = [
+                client for client in self.clients if self.__write(client, line)
+            ]
+
+    def stop(self) -> None:
+        """Disconnect everyone and stop listening."""
+        self.server.close()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+
+
+def mygrid_from_settings() -> str:
+    """The gridsquare saved by the GUI, if there is one."""
+    try:
+        with open(
+            os.path.expanduser("~/.augratin.json"), "rt", encoding="utf-8"
+        ) as file_descriptor:
+            return loads(file_descriptor.read()).get("mygrid", "")
+    except (OSError, ValueError, AttributeError):
+        return ""
+
+
+def run_headless(
+    interval: float = 30.0,
+    listen: str = None,
+    mygrid: str = None,
+    prune: bool = True,
+    once: bool = False,
+    url: str = POTA_SPOTS,
+    output=None,
+    stop: threading.Event = None,
+) -> int:
+    """
+    Poll the feed every 'interval' seconds and write each change to the
+    spot table as a JSON line:
+    {"time": ..., "added": [spots], "updated": [spots], "removed": [spotIds]}
+
+    Lines go to 'output', stdout by default, or with 'listen', HOST:PORT
+    or just PORT, to every client of a local TCP socket instead.
+
+    'once' polls a single time and returns. Setting 'stop' ends the loop.
+    Returns an exit code.
+    """
+    engine = SpotEngine(
+        url, mygrid=mygrid_from_settings() if mygrid is None else mygrid, prune=prune
+    )
+    output = output or sys.stdout
+    stop = stop or threading.Event()
+    server = None
+    if listen:
+        host, _, port = listen.rpartition(":")
+        server = LineServer(
+            host or "127.0.0.1",
+            int(port),
+            greeting=lambda: diff_line(
+                {"added": engine.spots(), "updated": [], "removed": []}
+            ),
+        ).start()
+        logger.info("Spot diffs at %s:%s", host or "127.0.0.1", server.port)
+    try:
+        while not stop.is_set():
+            try:
+                diff = engine.poll()
+            except Exception as exception:  # pylint: disable=broad-except
+                # One bad poll shouldn't end a daemon, try again next time.
+                logger.error("Poll failed: %s", exception)
+                diff = None
+            if diff is not None and any(diff.values()):
+                line = diff_line(diff)
+                if server is not None:
+                    server.send(line)
+                else:
+                    output.write(line)
+                    output.flush()
+            if once:
+                return 0 if diff is not None else 1
+            stop.wait(interval)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        return 0
+    finally:
+        if server is not None:
+            server.stop()
+    return 0
+
+
+def main(argv=None) -> int:
+    """python -m augratin.lib.headless, the same as augratin --headless."""
+    cli = argparse.ArgumentParser(
+        description="Stream POTA spot changes as JSON lines, no GUI needed."
+    )
+    cli.add_argument("--interval", type=float, default=30.0, help="Seconds, 30")
+    cli.add_argument(
+        "--listen", metavar="[HOST:]PORT", help="Serve the lines on a TCP socket"
+    )
+    cli.add_argument("--grid", help="Gridsquare for distance and bearing")
+    cli.add_argument("--url", default=POTA_SPOTS, help="Spot feed")
+    cli.add_argument("--once", action="store_true", help="Poll once and exit")
+    options = cli.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    return run_headless(
+        interval=options.interval,
+        listen=options.listen,
+        mygrid=options.grid,
+        once=options.once,
+        url=options.url,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+K6GTE, Desktop icon and menu entry installer
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from json import dumps, loads
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+ICON_SIZES = (128, 64, 32)
+DESKTOP_FILE = "k6gte-augratin.desktop"
+
+
+class IconInstaller:
+    """Installs the icons and menu entry once per version."""
+
+    def __init__(self, data_path: str, version: str, marker: str = None) -> None:
+        """
+        'data_path' is the folder holding the icon pngs and .desktop file.
+
+        After a good install the program version and a sha256 of each
+        of those files is written to 'marker', ~/.augratin_icons.json by
+        default. needed() is False while the marker still matches, so
+        the xdg tools only run on first launch, after an upgrade or if
+        the files change.
+        """
+        self.data_path = data_path
+        self.version = version
+        self.marker = marker or os.path.expanduser("~/.augratin_icons.json")
+        self.thread = None
+
+    def files(self) -> list:
+        """The files that get installed."""
+        names = [f"k6gte-augratin-{size}.png" for size in ICON_SIZES]
+        names.append(DESKTOP_FILE)
+        return names
+
+    def commands(self) -> list:
+        """The xdg commands doing the install, as argument lists."""
+        commands = [
+            [
+                "xdg-icon-resource",
+                "install",
+                "--size",
+                str(size),
+                "--context",
+                "apps",
+                "--mode",
+                "user",
+                f"{self.data_path}/k6gte-augratin-{size}.png",
+                "k6gte-augratin",
+            ]
+            for size in ICON_SIZES
+        ]
+        commands.append(
+            ["xdg-desktop-menu", "install", f"{self.data_path}/{DESKTOP_FILE}"]
+        )
+        return commands
+
+    def state(self) -> dict:
+        """What the marker should hold for the files as they are now."""
+        hashes = {}
+        for name in self.files():
+            try:
+                with open(f"{self.data_path}/{name}", "rb") as file_descriptor:
+                    hashes[name] = hashlib.sha256(file_descriptor.read()).hexdigest()
+            except OSError:
+                hashes[name] = None
+        return {"version": self.version, "files": hashes}
+
+    def installed(self) -> dict:
+        """What the marker holds, empty if there isn't one."""
+        try:
+            with open(self.marker, "rt", encoding="utf-8") as file_descriptor:
+                return loads(file_descriptor.read())
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def supported() -> bool:
+        """True if the xdg tools are on the path."""
+        return bool(
+            shutil.which("xdg-icon-resource") and shutil.which("xdg-desktop-menu")
+        )
+
+    def needed(self) -> bool:
+        """True if the icons were never installed or are out of date."""
+        return self.supported() and self.installed() != self.state()
+
+    def install(self) -> bool:
+        """Run the xdg commands now, returns True if they all worked."""
+        if not self.supported():
+            logger.info("xdg-utils not found, icons not installed")
+            return False
+        state = self.state()
+        for command in self.commands():
+            try:
+                result = subprocess.run(
+                    command,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    check=False,
+                )
+            except OSError as exception:
+                logger.critical("%s", exception)
+                return False
+            if result.returncode != 0:
+                logger.critical(
+                    "%s failed: %s", " ".join(command), result.stderr.decode().strip()
+                )
+                return False
+        try:
+            with open(self.marker, "wt", encoding="utf-8") as file_descriptor:
+                file_descriptor.write(dumps(state, indent=4))
+        except OSError as exception:
+            logger.critical("%s", exception)
+        return True
+
+    def install_if_needed(self) -> bool:
+        """
+        Start an install on a background thread if needed().
+        Returns True if one was started.
+        """
+        if not self.needed():
+            return False
+        self.thread = threading.Thread(target=self.install, name="install-icons")
+        self.thread.start()
+        return True
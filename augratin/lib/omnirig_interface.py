@@ -32,6 +32,8 @@ class OmniRigClient:
 
         get_vfo()
 
+        get_mode()
+
         get_bw()
 
         A variable 'online' is set to True if no error was encountered,
@@ -90,6 +92,14 @@ class OmniRigClient:
             return self.omnirig_object.Rig2.Freq
         return False
     
+    def get_mode(self) -> int:
+        """Returns the radios mode as an Omnirig param"""
+        if self.rig == 1:
+            return int(self.omnirig_object.Rig1.Mode)
+        if self.rig == 2:
+            return int(self.omnirig_object.Rig2.Mode)
+        return False
+
     def get_bw(self) -> int:
         """Returns the radios bandwidth"""
         if self.rig == 1:
@@ -0,0 +1,202 @@
+"""
+K6GTE, Hot path timers
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from json import dumps
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+_OFF = nullcontext()
+
+
+class _Timer:
+    """Context manager adding its elapsed time to a Perf."""
+
+    __slots__ = ("perf", "name", "start")
+
+    def __init__(self, perf, name: str) -> None:
+        self.perf = perf
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.perf.record(self.name, time.perf_counter() - self.start, self.start)
+        return False
+
+
+class Perf:
+    """Rolling timings of named operations."""
+
+    def __init__(self, enabled: bool = False, window: int = 500) -> None:
+        """
+        Keeps the last 'window' samples of each name.
+
+        While disabled time() hands back one shared do nothing context
+        manager and record() returns at once, so the timers can stay in
+        the hot paths.
+
+        Samples can be recorded from any thread.
+
+        After start_trace() every sample is also kept as a Chrome
+        trace event, see save_trace().
+        """
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.trace = None
+        self.trace_limit = 0
+        self.threads = {}
+
+    def time(self, name: str):
+        """with perf.time("update"): ..."""
+        if not self.enabled:
+            return _OFF
+        return _Timer(self, name)
+
+    def timed(self, name: str):
+        """
+        @PERF.timed("update") times every call of the function below it,
+        whether or not timing was on when it was decorated.
+
+        The wrapper takes any arguments, so Qt hands it every argument a
+        signal carries. Connect a decorated method through a lambda if it
+        takes fewer than the signal sends.
+        """
+
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Timer(self, name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def record(self, name: str, seconds: float, start: float = None) -> None:
+        """
+        Add a sample taken some other way. 'start', a time.perf_counter()
+        reading, places it in the trace, it is taken to have just ended
+        if not given.
+        """
+        if not self.enabled:
+            return
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(seconds)
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.trace is not None and len(self.trace) < self.trace_limit:
+            if start is None:
+                start = time.perf_counter() - seconds
+            thread = threading.get_ident()
+            if thread not in self.threads:
+                self.threads[thread] = threading.current_thread().name
+            self.trace.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": round(start * 1e6, 1),
+                    "dur": round(seconds * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": thread,
+                }
+            )
+
+    def start_trace(self, limit: int = 500000) -> None:
+        """
+        Keep every sample, up to 'limit' of them, as a trace event
+        for chrome://tracing or ui.perfetto.dev. Turns timing on.
+        """
+        self.enabled = True
+        self.trace = []
+        self.trace_limit = limit
+
+    def save_trace(self, path: str) -> int:
+        """Write the trace events as JSON, returns how many."""
+        events = list(self.trace or [])
+        for thread, name in self.threads.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": thread,
+                    "args": {"name": name},
+                }
+            )
+        try:
+            with open(path, "wt", encoding="utf-8") as file_descriptor:
+                file_descriptor.write(
+                    dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+                )
+        except OSError as exception:
+            logger.critical("%s", exception)
+        return len(self.trace or [])
+
+    def reset(self) -> None:
+        """Forget every sample."""
+        self.samples.clear()
+        self.counts.clear()
+
+    @staticmethod
+    def percentile(ordered: list, fraction: float) -> float:
+        """Nearest rank percentile of an already sorted list."""
+        if not ordered:
+            return 0.0
+        rank = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+        return ordered[rank]
+
+    def stats(self) -> dict:
+        """
+        {name: {"count", "last", "p50", "p90", "p99", "max"}}, times in ms
+        over the samples still in the window, count over all time.
+        """
+        result = {}
+        for name, samples in list(self.samples.items()):
+            recent = list(samples)
+            if not recent:
+                continue
+            ordered = sorted(recent)
+            result[name] = {
+                "count": self.counts.get(name, 0),
+                "last": round(recent[-1] * 1000, 3),
+                "p50": round(self.percentile(ordered, 0.50) * 1000, 3),
+                "p90": round(self.percentile(ordered, 0.90) * 1000, 3),
+                "p99": round(self.percentile(ordered, 0.99) * 1000, 3),
+                "max": round(ordered[-1] * 1000, 3),
+            }
+        return result
+
+    def dump(self, path: str = None) -> str:
+        """stats() as JSON, also written to 'path' if given."""
+        text = dumps(self.stats(), indent=4, sort_keys=True)
+        if path:
+            try:
+                with open(path, "wt", encoding="utf-8") as file_descriptor:
+                    file_descriptor.write(text)
+            except OSError as exception:
+                logger.critical("%s", exception)
+        return text
+
+
+PERF = Perf()
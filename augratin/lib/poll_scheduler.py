@@ -0,0 +1,106 @@
+"""
+K6GTE, Adaptive CAT poll scheduler
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import time
+from collections import deque
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+
+class PollScheduler:
+    """Decides how often the rig should be polled."""
+
+    def __init__(
+        self,
+        fast: int = 100,
+        slow: int = 1000,
+        quiet: float = 10.0,
+        window: int = 50,
+    ) -> None:
+        """
+        Adaptive poll rate for CAT control.
+
+        Polls at the 'fast' interval, in milliseconds, while the vfo is
+        changing. After 'quiet' seconds without a change the interval
+        doubles on each poll until it reaches the 'slow' interval.
+
+        While paused, usually because the window is minimized, interval()
+        returns 0 and the caller should stop its timer.
+
+        kick() returns to the fast rate right away, use it when the user
+        tunes the radio from the program.
+
+        'window' is how many poll samples are kept for the metrics.
+        """
+        self.fast = fast
+        self.slow = slow
+        self.quiet = quiet
+        self.current = fast
+        self.paused = False
+        self.last_change = time.monotonic()
+        self.latencies = deque(maxlen=window)
+        self.poll_times = deque(maxlen=window)
+
+    def kick(self) -> int:
+        """Something happened, poll fast again."""
+        self.last_change = time.monotonic()
+        self.current = self.fast
+        return self.interval()
+
+    def pause(self) -> None:
+        """Stop polling."""
+        self.paused = True
+
+    def resume(self) -> int:
+        """Start polling again at the fast rate."""
+        self.paused = False
+        return self.kick()
+
+    def record(self, changed: bool, latency: float) -> int:
+        """
+        Record the outcome of one poll.
+        'changed' is True if the frequency or bandwidth moved.
+        'latency' is the poll round trip in seconds.
+        Returns the interval in ms to use for the next poll.
+        """
+        now = time.monotonic()
+        self.latencies.append(latency)
+        self.poll_times.append(now)
+        if changed:
+            self.last_change = now
+            self.current = self.fast
+        elif now - self.last_change > self.quiet:
+            self.current = min(self.current * 2, self.slow)
+        return self.interval()
+
+    def interval(self) -> int:
+        """The poll interval in ms, 0 while paused."""
+        if self.paused:
+            return 0
+        return self.current
+
+    def metrics(self) -> dict:
+        """Returns the poll rate in Hz and the poll latency in ms."""
+        rate = 0.0
+        if len(self.poll_times) > 1:
+            span = self.poll_times[-1] - self.poll_times[0]
+            if span > 0:
+                rate = (len(self.poll_times) - 1) / span
+        latency = sorted(self.latencies)
+        result = {
+            "interval_ms": self.interval(),
+            "poll_rate_hz": round(rate, 2),
+            "latency_avg_ms": 0.0,
+            "latency_max_ms": 0.0,
+        }
+        if latency:
+            result["latency_avg_ms"] = round(sum(latency) / len(latency) * 1000, 2)
+            result["latency_max_ms"] = round(latency[-1] * 1000, 2)
+        return result
@@ -0,0 +1,263 @@
+"""
+K6GTE, Background QSO logging
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+ADIF_HEADER = (
+    "augratin POTA logger\n"
+    "<ADIF_VER:5>3.1.2\n"
+    "<PROGRAMID:8>AuGratin\n"
+    "<PROGRAMVERSION:14>Version 22.3.7\n"
+    "<EOH>\n"
+)
+
+
+class QSOLogger:
+    """Writes QSOs to the ADIF file and broadcasts them from a worker thread."""
+
+    def __init__(
+        self,
+        path: str,
+        broadcaster,
+        fsync: str = "always",
+        spool: str = None,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 30.0,
+        store=None,
+    ) -> None:
+        """
+        QSOs handed to submit() are saved in 'store', a QSOStore, if
+        given, then appended to the ADIF file at 'path', in the order
+        they were submitted, then sent with 'broadcaster', a
+        UDPBroadcaster.
+
+        'fsync' is 'always' to fsync after every QSO, 'batch' to fsync
+        once the queue is empty, or 'never' to leave it to the OS.
+
+        If the store or file can't be written the QSO stays at the head of the
+        queue and is retried, waiting 'retry_delay' seconds and doubling
+        up to 'max_retry_delay'. QSOs behind it wait their turn.
+
+        UDP sends that fail are retried by the broadcaster on the same
+        backoff schedule.
+
+        With a 'spool' file the worker appends every QSO to it before
+        queueing it for the log, and cuts the spool back to what is still
+        queued once it is written. QSOs in it when the logger starts,
+        after a crash or a close() that gave up, are written first. A
+        crash between writing a QSO and cutting the spool can log it
+        twice. submit() never touches the disk, so a QSO is only lost if
+        the program dies before the worker spools it.
+        """
+        self.path = Path(path)
+        self.broadcaster = broadcaster
+        self.fsync = fsync
+        self.spool = Path(spool) if spool else None
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.store = store
+        self.incoming = deque()
+        self.disk_queue = deque()
+        self.udp_queue = deque()
+        self.written = 0
+        self.broadcast = 0
+        self.errors = 0
+        self.running = True
+        self.condition = threading.Condition()
+        self.__load_spool()
+        self.thread = threading.Thread(
+            target=self.__worker, name="qso-logger", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, qso: str) -> None:
+        """Queue a QSO, returns without waiting for the spool or the log."""
+        with self.condition:
+            self.incoming.append(qso)
+            self.condition.notify()
+
+    def pending(self) -> int:
+        """QSOs not yet written to disk."""
+        with self.condition:
+            return len(self.incoming) + len(self.disk_queue)
+
+    def flush(self, timeout: float = 5.0, udp: bool = False) -> bool:
+        """Wait for every queued QSO to reach the disk, and the network if 'udp'."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while (self.incoming or self.disk_queue or (udp and self.udp_queue)) and (
+                time.monotonic() < deadline
+            ):
+                self.condition.wait(0.05)
+            return not (self.incoming or self.disk_queue)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Drain the queues and stop the worker, the spool keeps anything left."""
+        self.flush(timeout, udp=True)
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(timeout=timeout)
+        self.broadcaster.close()
+
+    def __load_spool(self) -> None:
+        """Put QSOs left over from last time at the front of the queue."""
+        if not self.spool or not self.spool.exists():
+            return
+        try:
+            text = self.spool.read_text(encoding="utf-8")
+        except OSError as exception:
+            logger.critical("%s", exception)
+            return
+        *complete, partial = text.split("<EOR>\n")
+        for qso in complete:
+            if qso.strip():
+                self.disk_queue.append(f"{qso}<EOR>\n")
+        if partial.strip():
+            logger.warning("Dropped a half written QSO from %s", self.spool)
+        logger.info("%d QSOs recovered from %s", len(self.disk_queue), self.spool)
+        # A half written last QSO from a crash is dropped from the file.
+        self.__spool_rewrite("".join(self.disk_queue))
+
+    def __spool_append(self, qsos: list) -> None:
+        """Write ahead, a QSO stays in the spool until it is in the log."""
+        if not self.spool:
+            return
+        try:
+            with open(self.spool, "a", encoding="utf-8") as file_descriptor:
+                file_descriptor.write("".join(qsos))
+                if self.fsync != "never":
+                    file_descriptor.flush()
+                    os.fsync(file_descriptor.fileno())
+        except OSError as exception:
+            logger.critical("Can't spool QSO: %s", exception)
+
+    def __spool_rewrite(self, queued: str) -> None:
+        """Cut the spool back to 'queued', the QSOs not yet in the log."""
+        if not self.spool:
+            return
+        try:
+            if not queued:
+                if self.spool.exists():
+                    self.spool.unlink()
+                return
+            temporary = self.spool.with_name(self.spool.name + ".tmp")
+            with open(temporary, "w", encoding="utf-8") as file_descriptor:
+                file_descriptor.write(queued)
+                if self.fsync != "never":
+                    file_descriptor.flush()
+                    os.fsync(file_descriptor.fileno())
+            os.replace(temporary, self.spool)
+        except OSError as exception:
+            logger.critical("%s", exception)
+
+    def __write(self, qso: str, sync: bool) -> None:
+        """Append one QSO to the ADIF file, with a header if it's new."""
+        new_file = not self.path.exists()
+        with open(self.path, "a", encoding="utf-8") as file_descriptor:
+            if new_file:
+                print(ADIF_HEADER, file=file_descriptor)
+            print(qso, file=file_descriptor)
+            if sync:
+                file_descriptor.flush()
+                os.fsync(file_descriptor.fileno())
+
+    def __worker(self) -> None:
+        """Spool, then disk, then UDP. One QSO at a time, in order.
+
+        Only the worker touches the spool and adds to the disk queue, so
+        the spool is written without holding the condition submit() needs.
+        """
+        disk_delay = self.retry_delay
+        disk_ready = 0.0
+        udp_delay = self.retry_delay
+        udp_ready = 0.0
+        stored = False
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                while self.running and not (
+                    self.incoming
+                    or (self.disk_queue and now >= disk_ready)
+                    or self.udp_queue
+                    or (self.broadcaster.pending() and now >= udp_ready)
+                ):
+                    waits = []
+                    if self.disk_queue:
+                        waits.append(disk_ready - now)
+                    if self.broadcaster.pending():
+                        waits.append(udp_ready - now)
+                    self.condition.wait(min(waits) if waits else None)
+                    now = time.monotonic()
+                if not self.running:
+                    return
+                # Left in incoming until spooled, so flush() waits for them.
+                arrived = list(self.incoming)
+                qso = None
+                if self.disk_queue and now >= disk_ready:
+                    qso = self.disk_queue[0]
+                last = len(self.disk_queue) == 1
+
+            if arrived:
+                self.__spool_append(arrived)
+                with self.condition:
+                    for _ in arrived:
+                        self.incoming.popleft()
+                    self.disk_queue.extend(arrived)
+                    self.condition.notify_all()
+                continue
+
+            if qso is not None:
+                sync = self.fsync == "always" or (self.fsync == "batch" and last)
+                try:
+                    if self.store is not None and not stored:
+                        self.store.add_adif(qso)
+                        stored = True
+                    self.__write(qso, sync)
+                except (OSError, sqlite3.Error) as exception:
+                    self.errors += 1
+                    logger.critical("Can't write QSO, retrying: %s", exception)
+                    disk_ready = time.monotonic() + disk_delay
+                    disk_delay = min(disk_delay * 2, self.max_retry_delay)
+                    continue
+                disk_delay = self.retry_delay
+                stored = False
+                self.written += 1
+                with self.condition:
+                    self.disk_queue.popleft()
+                    queued = "".join(self.disk_queue)
+                    self.udp_queue.append(qso)
+                    self.condition.notify_all()
+                self.__spool_rewrite(queued)
+                continue
+
+            if self.udp_queue:
+                with self.condition:
+                    qso = self.udp_queue.popleft()
+                    self.condition.notify_all()
+                if self.broadcaster.send(qso):
+                    self.broadcast += 1
+                else:
+                    self.errors += 1
+                    udp_ready = time.monotonic() + udp_delay
+                continue
+
+            if self.broadcaster.retry():
+                udp_delay = min(udp_delay * 2, self.max_retry_delay)
+                udp_ready = time.monotonic() + udp_delay
+            else:
+                udp_delay = self.retry_delay
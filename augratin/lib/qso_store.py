@@ -0,0 +1,215 @@
+"""
+K6GTE, SQLite QSO store
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import sqlite3
+import threading
+
+try:
+    from augratin.lib.adif_reader import iter_records, scan_records
+except ModuleNotFoundError:
+    from lib.adif_reader import iter_records, scan_records
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+# ADIF field name, in the order log_contact writes them.
+FIELDS = (
+    "BAND",
+    "CALL",
+    "COMMENT",
+    "SIG",
+    "SIG_INFO",
+    "DISTANCE",
+    "GRIDSQUARE",
+    "MODE",
+    "NAME",
+    "OPERATOR",
+    "RST_RCVD",
+    "RST_SENT",
+    "STATE",
+    "FREQ",
+    "QSO_DATE",
+    "TIME_ON",
+    "MY_GRIDSQUARE",
+)
+
+# What makes a QSO a dupe, the columns is_dupe() matches.
+DUPE_KEY = ("CALL", "SIG_INFO", "BAND", "MODE", "QSO_DATE")
+
+
+class QSOStore:
+    """QSO database"""
+
+    def __init__(self, path: str) -> None:
+        """
+        QSOs kept in an indexed SQLite database at 'path',
+        use ':memory:' for a throw away one.
+
+        Columns are the lower cased ADIF field names in FIELDS.
+        BAND is stored lower case and CALL, SIG_INFO and MODE upper case
+        so lookups don't have to care.
+
+        Safe to share between the GUI and the logging thread.
+        """
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = self.row_factory
+        columns = ", ".join(f"{field.lower()} TEXT" for field in FIELDS)
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL;")
+            self.db.execute(
+                f"create table if not exists qsos(id INTEGER PRIMARY KEY, {columns});"
+            )
+            self.db.execute(
+                "create index if not exists qsos_dupe "
+                "on qsos(call, sig_info, band, mode, qso_date);"
+            )
+            self.db.execute(
+                "create index if not exists qsos_park on qsos(sig_info, qso_date);"
+            )
+            self.db.execute("create index if not exists qsos_date on qsos(qso_date);")
+
+    @staticmethod
+    def row_factory(cursor, row):
+        """Rows come back as dicts keyed by ADIF field name."""
+        return {col[0].upper(): row[idx] for idx, col in enumerate(cursor.description)}
+
+    @staticmethod
+    def normalize(record: dict) -> tuple:
+        """Column values for an ADIF record dict."""
+        values = []
+        for field in FIELDS:
+            value = record.get(field, "")
+            if field == "BAND":
+                value = value.lower()
+            elif field in ("CALL", "SIG_INFO", "MODE"):
+                value = value.upper()
+            values.append(value)
+        return tuple(values)
+
+    def add(self, record: dict) -> int:
+        """Store one QSO, returns its id."""
+        placeholders = ",".join("?" * len(FIELDS))
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                f"insert into qsos({','.join(FIELDS)}) values({placeholders});",
+                self.normalize(record),
+            )
+            return cursor.lastrowid
+
+    def add_adif(self, adif: str) -> int:
+        """Store every record in a block of ADIF text, returns how many."""
+        count = 0
+        for record, _offset in scan_records(adif.encode()):
+            self.add(record)
+            count += 1
+        return count
+
+    def count(self) -> int:
+        """How many QSOs are stored."""
+        with self.lock:
+            return self.db.execute("select count(*) as n from qsos;").fetchone()["N"]
+
+    def is_dupe(self, call: str, park: str, band: str, mode: str, date: str) -> bool:
+        """Already worked this activator at this park, band and mode on this date."""
+        with self.lock:
+            return (
+                self.db.execute(
+                    "select 1 from qsos where call = ? and sig_info = ? "
+                    "and band = ? and mode = ? and qso_date = ? limit 1;",
+                    (call.upper(), park.upper(), band.lower(), mode.upper(), date),
+                ).fetchone()
+                is not None
+            )
+
+    def qsos_for_park(self, park: str) -> list:
+        """Every QSO with a park, newest first."""
+        with self.lock:
+            return self.db.execute(
+                "select * from qsos where sig_info = ? "
+                "order by qso_date desc, time_on desc;",
+                (park.upper(),),
+            ).fetchall()
+
+    def qsos_on(self, date: str) -> list:
+        """Every QSO on a date, YYYYMMDD."""
+        with self.lock:
+            return self.db.execute(
+                "select * from qsos where qso_date = ? order by time_on;", (date,)
+            ).fetchall()
+
+    def import_adif(
+        self, path: str, batch: int = 5000, skip_dupes: bool = False
+    ) -> int:
+        """
+        Stream an ADIF file into the store, returns the number of QSOs added.
+
+        Each batch is its own transaction and takes the lock on its own, so
+        a worker thread can import while the GUI checks for dupes. With
+        'skip_dupes' QSOs is_dupe() would match are left out, so a log can
+        be imported again or while QSOs are being logged.
+        """
+        columns = ",".join(FIELDS)
+        placeholders = ",".join("?" * len(FIELDS))
+        sql = f"insert into qsos({columns}) values({placeholders});"
+        key = [FIELDS.index(field) for field in DUPE_KEY]
+        if skip_dupes:
+            sql = (
+                f"insert into qsos({columns}) select {placeholders} "
+                "where not exists (select 1 from qsos where call = ? "
+                "and sig_info = ? and band = ? and mode = ? and qso_date = ?);"
+            )
+        count = 0
+        rows = []
+
+        def insert() -> None:
+            nonlocal count
+            if rows:
+                with self.lock, self.db:
+                    count += self.db.executemany(sql, rows).rowcount
+                rows.clear()
+
+        for record in iter_records(path):
+            row = self.normalize(record)
+            if skip_dupes:
+                row += tuple(row[index] for index in key)
+            rows.append(row)
+            if len(rows) >= batch:
+                insert()
+        insert()
+        logger.info("Imported %d QSOs from %s", count, path)
+        return count
+
+    def export_adif(self, file_descriptor, header: str = "") -> int:
+        """Write every QSO as ADIF to an open text file, returns how many."""
+        count = 0
+        if header:
+            print(header, file=file_descriptor)
+        with self.lock:
+            cursor = self.db.execute(
+                f"select {','.join(FIELDS)} from qsos order by id;"
+            )
+            for row in cursor:
+                file_descriptor.write(adif_record(row))
+                file_descriptor.write("\n")
+                count += 1
+        return count
+
+
+def adif_record(record: dict) -> str:
+    """ADIF text for a record dict, empty fields included like log_contact does."""
+    lines = []
+    for field in FIELDS:
+        value = record.get(field)
+        if value is None:
+            continue
+        value = str(value)
+        lines.append(f"<{field}:{len(value)}>{value}\n")
+    lines.append("<EOR>\n")
+    return "".join(lines)
@@ -0,0 +1,309 @@
+"""
+K6GTE, rigctld and flrig simulators
+Email: michael.bridak@gmail.com
+GPL V3
+
+Stand in for a real radio when working on the CAT code.
+
+python -m augratin.lib.rig_simulator rigctld --port 4532 --latency 0.05
+python -m augratin.lib.rig_simulator flrig --port 12345 --malformed 0.1
+"""
+
+import argparse
+import logging
+from abc import ABC, abstractmethod
+import random
+import socketserver
+import threading
+import time
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+logger = logging.getLogger("__main__")
+
+
+class RigState:
+    """What the pretend radio is doing."""
+
+    def __init__(self) -> None:
+        self.freq = 14074000
+        self.mode = "USB"
+        self.bw = 2400
+        self.power = 100
+        self.ptt = 0
+        self.lock = threading.Lock()
+
+
+class Faults:
+    """Ways the pretend radio misbehaves."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        disconnect: float = 0.0,
+        malformed: float = 0.0,
+        seed=None,
+    ) -> None:
+        """
+        'latency' seconds are added to every reply, plus a random
+        0 to 'jitter' seconds.
+
+        'disconnect' and 'malformed' are the chance, 0.0 to 1.0, that a
+        request gets the connection dropped or a garbage reply.
+
+        'seed' makes a run repeatable.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.disconnect = disconnect
+        self.malformed = malformed
+        self.random = random.Random(seed)
+
+    def delay(self) -> None:
+        """Sleep like a slow serial link."""
+        wait = self.latency
+        if self.jitter:
+            wait += self.random.uniform(0, self.jitter)
+        if wait:
+            time.sleep(wait)
+
+    def should_disconnect(self) -> bool:
+        """Roll for a dropped connection."""
+        return self.random.random() < self.disconnect
+
+    def should_garble(self) -> bool:
+        """Roll for a malformed reply."""
+        return self.random.random() < self.malformed
+
+
+class _Simulator(ABC):
+    """Runs a socketserver on a thread."""
+
+    server = None
+    thread = None
+
+    def __init__(self, host: str, port: int, faults: Faults = None) -> None:
+        self.host = host
+        self.requested_port = port
+        self.faults = faults or Faults()
+        self.state = RigState()
+        self.requests = 0
+
+    @property
+    def port(self) -> int:
+        """The port actually bound, useful when asking for port 0."""
+        if self.server:
+            return self.server.server_address[1]
+        return self.requested_port
+
+    @abstractmethod
+    def _make_server(self):
+        """The socketserver to run, bound but not yet serving."""
+
+    def start(self) -> "_Simulator":
+        """Start serving on a daemon thread."""
+        self.server = self._make_server()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name=type(self).__name__, daemon=True
+        )
+        self.thread.start()
+        logger.debug("%s listening on %s:%s", type(self).__name__, self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and free the port."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join(timeout=2)
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+
+class RigctldSimulator(_Simulator):
+    """Speaks enough of the rigctld TCP protocol for CAT."""
+
+    def __init__(self, host: str = "localhost", port: int = 0, faults: Faults = None):
+        super().__init__(host, port, faults)
+        self.clients = set()
+
+    def _make_server(self):
+        simulator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            """One connected client."""
+
+            def handle(self):
+                simulator.clients.add(self.connection)
+                try:
+                    for line in self.rfile:
+                        command = line.decode(errors="ignore").strip()
+                        if not command:
+                            continue
+                        simulator.requests += 1
+                        simulator.faults.delay()
+                        if simulator.faults.should_disconnect():
+                            return
+                        if simulator.faults.should_garble():
+                            reply = "#?\x00garbage\n"
+                        else:
+                            reply = simulator.command(command)
+                        self.wfile.write(reply.encode())
+                except OSError:
+                    pass
+                finally:
+                    simulator.clients.discard(self.connection)
+
+        server = socketserver.ThreadingTCPServer(
+            (self.host, self.requested_port), Handler, bind_and_activate=False
+        )
+        server.allow_reuse_address = True
+        server.daemon_threads = True
+        server.server_bind()
+        server.server_activate()
+        return server
+
+    def drop_clients(self) -> None:
+        """Hang up on everyone, like rigctld being restarted."""
+        for client in list(self.clients):
+            try:
+                client.shutdown(2)
+            except OSError:
+                pass
+
+    def command(self, command: str) -> str:
+        """Returns the rigctld reply to a single command line."""
+        parts = command.split()
+        state = self.state
+        with state.lock:
+            if parts[0] == "f":
+                return f"{state.freq}\n"
+            if parts[0] == "F" and len(parts) > 1:
+                state.freq = int(float(parts[1]))
+                return "RPRT 0\n"
+            if parts[0] == "m":
+                return f"{state.mode}\n{state.bw}\n"
+            if parts[0] == "M" and len(parts) > 1:
+                state.mode = parts[1]
+                if len(parts) > 2 and int(parts[2]) > 0:
+                    state.bw = int(parts[2])
+                return "RPRT 0\n"
+            if parts[0] == "t":
+                return f"{state.ptt}\n"
+            if parts[0] == "T" and len(parts) > 1:
+                state.ptt = int(parts[1])
+                return "RPRT 0\n"
+            if parts[0] == "l" and parts[1:] == ["RFPOWER"]:
+                return f"{state.power / 100}\n"
+            if parts[0] == "L" and len(parts) > 2 and parts[1] == "RFPOWER":
+                state.power = int(float(parts[2]) * 100)
+                return "RPRT 0\n"
+        return "RPRT -11\n"
+
+
+class FlrigSimulator(_Simulator):
+    """Serves the flrig XML-RPC calls used by CAT."""
+
+    def __init__(self, host: str = "localhost", port: int = 0, faults: Faults = None):
+        super().__init__(host, port, faults)
+
+    def _make_server(self):
+        simulator = self
+
+        class Handler(SimpleXMLRPCRequestHandler):
+            """Adds latency, hang ups and garbage to XML-RPC."""
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                simulator.requests += 1
+                simulator.faults.delay()
+                if simulator.faults.should_disconnect():
+                    self.close_connection = True
+                    return
+                if simulator.faults.should_garble():
+                    body = b"<?xml version='1.0'?><methodResponse><params>"
+                    self.send_response(200)
+                    self.send_header("Content-type", "text/xml")
+                    self.send_header("Content-length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                super().do_POST()
+
+            def log_message(self, *_args):
+                """Keep quiet."""
+
+        server = SimpleXMLRPCServer(
+            (self.host, self.requested_port),
+            requestHandler=Handler,
+            logRequests=False,
+            allow_none=True,
+            bind_and_activate=False,
+        )
+        server.allow_reuse_address = True
+        server.server_bind()
+        server.server_activate()
+        state = self.state
+
+        def setter(name, convert):
+            def call(value):
+                with state.lock:
+                    setattr(state, name, convert(value))
+                return 0
+
+            return call
+
+        server.register_function(lambda: "2.0.0", "main.get_version")
+        server.register_function(lambda: str(state.freq), "rig.get_vfo")
+        server.register_function(lambda: state.mode, "rig.get_mode")
+        server.register_function(lambda: str(state.bw), "rig.get_bw")
+        server.register_function(lambda: state.power, "rig.get_power")
+        server.register_function(lambda: state.ptt, "rig.get_ptt")
+        server.register_function(setter("freq", int), "rig.set_frequency")
+        server.register_function(setter("mode", str), "rig.set_mode")
+        server.register_function(setter("power", int), "rig.set_power")
+        server.register_function(setter("ptt", int), "rig.set_ptt")
+        return server
+
+
+SIMULATORS = {
+    "rigctld": RigctldSimulator,
+    "flrig": FlrigSimulator,
+}
+
+
+def main():
+    """Run a simulator until interrupted."""
+    cli = argparse.ArgumentParser(description="Pretend to be a radio.")
+    cli.add_argument("interface", choices=sorted(SIMULATORS))
+    cli.add_argument("--host", default="localhost")
+    cli.add_argument("--port", type=int, default=0)
+    cli.add_argument("--latency", type=float, default=0.0)
+    cli.add_argument("--jitter", type=float, default=0.0)
+    cli.add_argument("--disconnect", type=float, default=0.0)
+    cli.add_argument("--malformed", type=float, default=0.0)
+    cli.add_argument("--seed", type=int)
+    options = cli.parse_args()
+    faults = Faults(
+        options.latency,
+        options.jitter,
+        options.disconnect,
+        options.malformed,
+        options.seed,
+    )
+    simulator = SIMULATORS[options.interface](options.host, options.port, faults)
+    simulator.start()
+    print(f"{options.interface} simulator on {options.host}:{simulator.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
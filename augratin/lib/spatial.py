@@ -0,0 +1,142 @@
+"""
+K6GTE, Spatial index for spots and parks
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import heapq
+import logging
+from math import asin, ceil, cos, radians, sin, sqrt
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+EARTH_RADIUS = 6372.8  # Radius of earth in kilometers, same as geo.
+
+
+def unit_vector(lat: float, lon: float) -> tuple:
+    """A point on the earth as x, y, z on the unit sphere."""
+    lat, lon = radians(lat), radians(lon)
+    return (cos(lat) * cos(lon), cos(lat) * sin(lon), sin(lat))
+
+
+def chord_to_km(chord: float) -> float:
+    """Straight line distance through the unit sphere to great circle km."""
+    return 2 * asin(min(chord / 2, 1.0)) * EARTH_RADIUS
+
+
+def km_to_chord(km: float) -> float:
+    """Great circle km to straight line distance through the unit sphere."""
+    return 2 * sin(min(km / EARTH_RADIUS, 3.141592653589793) / 2)
+
+
+class SpatialIndex:
+    """Points bucketed in a 3D grid over their unit vectors."""
+
+    def __init__(self, cell_km: float = 250.0) -> None:
+        """
+        Each point is filed in a cube of side 'cell_km' (as a chord)
+        around its position on the unit sphere. A lookup only visits
+        the cubes that can hold an answer, so the poles and the date
+        line need no special cases.
+
+        Keys are anything hashable, a spotId or a park reference.
+        """
+        self.cell = km_to_chord(cell_km)
+        self.points = {}
+        self.buckets = {}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __bucket(self, vector: tuple) -> tuple:
+        return tuple(int(value // self.cell) for value in vector)
+
+    def clear(self) -> None:
+        """Empty the index."""
+        self.points.clear()
+        self.buckets.clear()
+
+    def insert(self, key, lat: float, lon: float) -> None:
+        """Add or move a point."""
+        if key in self.points:
+            self.remove(key)
+        vector = unit_vector(lat, lon)
+        self.points[key] = vector
+        self.buckets.setdefault(self.__bucket(vector), set()).add(key)
+
+    def remove(self, key) -> None:
+        """Drop a point, if it's there."""
+        vector = self.points.pop(key, None)
+        if vector is None:
+            return
+        bucket = self.__bucket(vector)
+        self.buckets[bucket].discard(key)
+        if not self.buckets[bucket]:
+            del self.buckets[bucket]
+
+    def rebuild(self, items) -> None:
+        """Replace everything with (key, lat, lon) items."""
+        self.clear()
+        for key, lat, lon in items:
+            if lat is not None and lon is not None:
+                self.insert(key, lat, lon)
+
+    def __candidates(self, vector: tuple, reach: int):
+        """Keys in every bucket within 'reach' buckets of 'vector'."""
+        if (2 * reach + 1) ** 3 >= len(self.buckets):
+            for keys in self.buckets.values():
+                yield from keys
+            return
+        x_cell, y_cell, z_cell = self.__bucket(vector)
+        for x_step in range(x_cell - reach, x_cell + reach + 1):
+            for y_step in range(y_cell - reach, y_cell + reach + 1):
+                for z_step in range(z_cell - reach, z_cell + reach + 1):
+                    keys = self.buckets.get((x_step, y_step, z_step))
+                    if keys:
+                        yield from keys
+
+    def __chord(self, vector: tuple, key) -> float:
+        other = self.points[key]
+        return sqrt(
+            (vector[0] - other[0]) ** 2
+            + (vector[1] - other[1]) ** 2
+            + (vector[2] - other[2]) ** 2
+        )
+
+    def within(self, lat: float, lon: float, km: float) -> dict:
+        """Returns {key: distance in km} for every point within 'km'."""
+        vector = unit_vector(lat, lon)
+        limit = km_to_chord(km)
+        reach = ceil(limit / self.cell)
+        found = {}
+        for key in self.__candidates(vector, reach):
+            chord = self.__chord(vector, key)
+            if chord <= limit:
+                found[key] = chord_to_km(chord)
+        return found
+
+    def nearest(self, lat: float, lon: float, count: int) -> list:
+        """Returns up to 'count' (distance in km, key) pairs, closest first."""
+        vector = unit_vector(lat, lon)
+        count = min(count, len(self.points))
+        if count <= 0:
+            return []
+        reach = 1
+        while True:
+            # Everything within reach - 1 buckets of the bucket holding
+            # 'vector' has been seen, so a chord that short is certain.
+            covered = (reach - 1) * self.cell
+            chords = [
+                (self.__chord(vector, key), key)
+                for key in self.__candidates(vector, reach)
+            ]
+            best = heapq.nsmallest(count, chords, key=lambda item: item[0])
+            if len(best) == count and (best[-1][0] <= covered or covered >= 2):
+                break
+            if len(chords) == len(self.points):
+                break
+            reach *= 2
+        return [(chord_to_km(chord), key) for chord, key in best]
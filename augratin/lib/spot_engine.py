@@ -0,0 +1,521 @@
+"""
+K6GTE, GUI free spot engine
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+# pylint: disable=line-too-long
+
+import datetime
+import logging
+import os
+import sqlite3
+import time
+from json import dumps, loads
+
+try:
+    from augratin.lib import geo
+    from augratin.lib.bandplan import BAND_PLAN
+    from augratin.lib.perf import PERF
+    from augratin.lib.spatial import SpatialIndex
+except ModuleNotFoundError:
+    from lib import geo
+    from lib.bandplan import BAND_PLAN
+    from lib.perf import PERF
+    from lib.spatial import SpatialIndex
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+POTA_SPOTS = "https://api.pota.app/spot/activator"
+
+# Kinds of change SpotEngine.ingest() hands its subscribers.
+ADDED = "added"
+UPDATED = "updated"
+QSY = "qsy"
+REMOVED = "removed"
+
+# Spot fields that change on every poll without anything happening.
+VOLATILE = ("expire",)
+
+# Set with set_recorder(), getjson() hands it every response it gets.
+RECORDER = None
+
+
+def set_recorder(recorder) -> None:
+    """Save every api response, see feed_replay.FeedRecorder. None stops."""
+    global RECORDER  # pylint: disable=global-statement
+    RECORDER = recorder
+
+
+def getjson(url: str, timeout: float = 5.0):
+    """Get json request, None if it fails"""
+    import requests  # pylint: disable=import-outside-toplevel
+
+    try:
+        request = requests.get(url, timeout=timeout)
+        if RECORDER is not None:
+            RECORDER.record(url, request.status_code, request.text)
+        request.raise_for_status()
+    except requests.ConnectionError as err:
+        logger.debug("Network Error: %s", err)
+        return None
+    except requests.exceptions.Timeout as err:
+        logger.debug("Timeout Error: %s", err)
+        return None
+    except requests.exceptions.HTTPError as err:
+        logger.debug("HTTP Error: %s", err)
+        return None
+    except requests.exceptions.RequestException as err:
+        logger.debug("Error: %s", err)
+        return None
+    with PERF.time("json decode"):
+        try:
+            return loads(request.text)
+        except ValueError as err:
+            logger.debug("JSON Error: %s", err)
+            return None
+
+
+def diff_spots(old: dict, new: dict) -> dict:
+    """
+    What changed between two {spotId: spot} dicts:
+    {"added": [spots], "updated": [spots], "removed": [spotIds]}
+    """
+    return {
+        "added": [spot for key, spot in new.items() if key not in old],
+        "updated": [
+            spot for key, spot in new.items() if key in old and old[key] != spot
+        ],
+        "removed": [key for key in old if key not in new],
+    }
+
+
+class Database:
+    """spot database"""
+
+    def __init__(self) -> None:
+        self.db = sqlite3.connect(":memory:")
+        self.db.row_factory = self.row_factory
+        self.cursor = self.db.cursor()
+        sql_command = (
+            "create table spots("
+            "spotId INTEGER NOT NULL,"
+            "spotTime DATETIME NOT NULL, "
+            "activator VARCHAR(15) NOT NULL, "
+            "frequency REAL NOT NULL, "
+            "mode VARCHAR(6), "
+            "reference VARCHAR(8), "
+            "parkName VARCHAR(50), "
+            "spotter VARCHAR(15) NOT NULL, "
+            "comments VARCHAR(45), "
+            "source VARCHAR(8), "
+            "invalid INTEGER, "
+            "name VARCHAR(50), "
+            "locationDesc VARCHAR(10), "
+            "grid4 VARCHAR(4), "
+            "grid6 VARCHAR(6), "
+            "latitude REAL, "
+            "longitude REAL, "
+            "band VARCHAR(4), "
+            "distance INTEGER, "
+            "bearing INTEGER, "
+            "count INTEGER, "
+            "expire INTEGER "
+            ");"
+        )
+        self.cursor.execute(sql_command)
+        self.cursor.execute("create index spots_activator on spots(activator);")
+        self.cursor.execute("create index spots_spotid on spots(spotId);")
+        self.db.commit()
+        self.columns = [
+            column["name"] for column in self.db.execute("pragma table_info(spots);")
+        ]
+
+    @staticmethod
+    def row_factory(cursor, row):
+        """
+        cursor.description:
+        (name, type_code, display_size,
+        internal_size, precision, scale, null_ok)
+        row: (value, value, ...)
+        """
+        return {
+            col[0]: row[idx]
+            for idx, col in enumerate(
+                cursor.description,
+            )
+        }
+
+    def addspot(self, spot):
+        """doc"""
+        try:
+            delete_call = (
+                f"delete from spots where activator = '{spot.get('activator')}';"
+            )
+            self.cursor.execute(delete_call)
+            self.db.commit()
+
+            pre = "INSERT INTO spots("
+            values = []
+            columns = ""
+            placeholders = ""
+            for key in spot.keys():
+                columns += f"{key},"
+                values.append(spot[key])
+                placeholders += "?,"
+            post = f") VALUES({placeholders[:-1]});"
+
+            sql = f"{pre}{columns[:-1]}{post}"
+            self.cursor.execute(sql, tuple(values))
+            self.db.commit()
+        except sqlite3.IntegrityError:
+            ...
+
+    def addspots(self, spots: list) -> None:
+        """
+        Insert a list of spots in one transaction. Unlike addspot() older
+        spots of the same activator are not deleted first.
+        """
+        if not spots:
+            return
+        columns = list(spots[0].keys())
+        self.cursor.executemany(
+            f"INSERT INTO spots({','.join(columns)}) VALUES({','.join('?' * len(columns))});",
+            [tuple(spot.get(column) for column in columns) for spot in spots],
+        )
+        self.db.commit()
+
+    def apply(self, upserts: list, removed) -> None:
+        """
+        One transaction for a whole feed's changes. Each spot in
+        'upserts' replaces any spot of the same activator, then the
+        spotIds in 'removed' are deleted.
+        """
+        self.cursor.executemany(
+            "delete from spots where activator = ?;",
+            [(spot.get("activator"),) for spot in upserts],
+        )
+        self.cursor.executemany(
+            "delete from spots where spotId = ?;", [(spot_id,) for spot_id in removed]
+        )
+        self.cursor.executemany(
+            f"INSERT INTO spots({','.join(self.columns)}) VALUES({','.join('?' * len(self.columns))});",
+            [tuple(spot.get(column) for column in self.columns) for spot in upserts],
+        )
+        self.db.commit()
+
+    def getspots(self, order: str = "frequency") -> list:
+        """returns a list of dicts, ordered by frequency or distance."""
+        if order not in ("frequency", "distance"):
+            order = "frequency"
+        try:
+            self.cursor.execute(f"select * from spots order by {order} ASC;")
+            return self.cursor.fetchall()
+        except sqlite3.OperationalError:
+            return ()
+
+    def getspotsinband(self, start: float, end: float) -> list:
+        """ "return a list of dict where freq range is defined"""
+        self.cursor.execute(
+            f"select * from spots where frequency >= {start} and frequency <= {end} order by frequency ASC;"
+        )
+        return self.cursor.fetchall()
+
+    def get_next_spot(self, current: float, limit: float) -> dict:
+        """ "return a list of dict where freq range is defined"""
+        self.cursor.execute(
+            f"select * from spots where frequency > {current} and frequency <= {limit} order by frequency ASC;"
+        )
+        return self.cursor.fetchone()
+
+    def get_prev_spot(self, current: float, limit: float) -> dict:
+        """ "return a list of dict where freq range is defined"""
+        self.cursor.execute(
+            f"select * from spots where frequency < {current} and frequency >= {limit} order by frequency DESC;"
+        )
+        return self.cursor.fetchone()
+
+    def getspot_byid(self, spot_id: int) -> dict:
+        """Return a dict of spot with the matching spotId"""
+        self.cursor.execute(f"select * from spots where spotId = {spot_id};")
+        return self.cursor.fetchone()
+
+    def delete_spots(self, minutes: int):
+        """Delete old spots"""
+        self.cursor.execute(
+            f"delete from spots where spotTime < datetime('now', '-{minutes} minutes');"
+        )
+
+    def remove_spots(self, spot_ids) -> None:
+        """Delete spots by spotId"""
+        self.cursor.executemany(
+            "delete from spots where spotId = ?;", [(spot_id,) for spot_id in spot_ids]
+        )
+        self.db.commit()
+
+
+class SpotEngine:
+    """Keeps the spot table up to date from the POTA feed."""
+
+    def __init__(
+        self,
+        url: str = POTA_SPOTS,
+        mygrid: str = "",
+        prune: bool = False,
+        fetch=getjson,
+    ) -> None:
+        """
+        Spots from 'url' are stored in a Database and a SpatialIndex.
+        Each gets a band and, when 'mygrid' is set, a distance and bearing.
+
+        The feed lists every spot that is still current. With 'prune'
+        spots that dropped off the feed are deleted, otherwise a spot
+        stays until the activator is spotted again, like the band map
+        has always done.
+
+        'fetch' is called with the url and returns the decoded spot list
+        or None, getjson() by default.
+
+        Nothing here needs Qt, the GUI and --headless share it.
+        """
+        self.url = url
+        self.mygrid = mygrid
+        self.prune = prune
+        self.fetch = fetch
+        self.spotdb = Database()
+        self.spot_index = SpatialIndex()
+        self.snapshot = {}
+        self.by_call = {}
+        self.warm = set()
+        self.enriched_for = mygrid
+        self.subscribers = []
+
+    def enrich(self, spots: list) -> None:
+        """Add distance and bearing from mygrid to every spot, in one batch."""
+        located = [spot for spot in spots if spot.get("grid6") or spot.get("grid4")]
+        if len(self.mygrid) < 4 or not located:
+            return
+        distances, bearings = geo.distances_bearings(
+            self.mygrid, [spot.get("grid6") or spot.get("grid4") for spot in located]
+        )
+        for spot, km, degrees in zip(located, distances, bearings):
+            spot["distance"] = km
+            spot["bearing"] = degrees
+
+    def subscribe(self, callback) -> None:
+        """
+        Call 'callback' with a list of events after every ingest() that
+        changed the table. Each event is a dict:
+        {"kind": ADDED, UPDATED, QSY or REMOVED, "spot": ..., "previous": ...}
+        "spot" is the stored spot, for REMOVED the one that went.
+        "previous" is the spot it replaced, None for ADDED and REMOVED.
+        QSY is an UPDATED where the frequency moved.
+        Callbacks run on the thread that called ingest().
+        """
+        self.subscribers.append(callback)
+
+    def ingest(self, spots: list) -> dict:
+        """
+        Store a spot list as fetched from the feed, frequencies in kHz.
+
+        The feed is compared with the table by activator and spotId and
+        only what changed is enriched and written, in one transaction.
+        Returns {"added": [spots], "updated": [spots], "removed": [spotIds]},
+        a re-spot with a new spotId lists the old one as removed.
+        """
+        with PERF.time("addspot ingest"):
+            regrid = self.mygrid != self.enriched_for
+            self.enriched_for = self.mygrid
+            # The table holds one spot per activator. A call the feed
+            # lists twice, a club call on two bands or a re-spot, keeps
+            # the last one like addspot()'s delete then insert always did.
+            latest = {}
+            for spot in spots:
+                try:
+                    spot["frequency"] = float(spot.get("frequency")) / 1000
+                except (TypeError, ValueError):
+                    continue
+                call = spot.get("activator")
+                if not call or spot.get("spotTime") is None or not spot.get("spotter"):
+                    continue
+                latest[call] = spot
+            fresh = {spot.get("spotId") for spot in latest.values()}
+            changed = {}
+            for call, spot in latest.items():
+                previous = self.snapshot.get(self.by_call.get(call))
+                if previous is None or regrid or self.__differs(previous, spot):
+                    changed[call] = (spot, previous)
+            upserts = [spot for spot, _ in changed.values()]
+            self.enrich(upserts)
+            for spot, band in zip(
+                upserts, BAND_PLAN.bands_for(spot["frequency"] for spot in upserts)
+            ):
+                spot["band"] = band
+
+            events = []
+            rows = []
+            replaced = []
+            for spot, previous in changed.values():
+                row = {column: spot.get(column) for column in self.spotdb.columns}
+                rows.append(row)
+                if previous is None:
+                    kind = ADDED
+                elif previous["frequency"] != row["frequency"]:
+                    kind = QSY
+                else:
+                    kind = UPDATED
+                if previous is not None and previous["spotId"] != row["spotId"]:
+                    replaced.append(previous["spotId"])
+                events.append({"kind": kind, "spot": row, "previous": previous})
+
+            # Spots loaded by load_snapshot() that the feed no longer
+            # lists are gone, even without 'prune'.
+            stale = self.snapshot if self.prune else self.warm
+            removed = [
+                self.snapshot[key]
+                for key in stale
+                if key not in fresh
+                and key in self.snapshot
+                and self.snapshot[key]["activator"] not in changed
+            ]
+            self.warm = set()
+            for spot in removed:
+                events.append({"kind": REMOVED, "spot": spot, "previous": None})
+            if not events:
+                return {"added": [], "updated": [], "removed": []}
+
+            removed_ids = [spot["spotId"] for spot in removed]
+            self.spotdb.apply(rows, removed_ids)
+            # A new dict, save_snapshot() may be reading the old one.
+            snapshot = dict(self.snapshot)
+            for spot_id in replaced + removed_ids:
+                old = snapshot.pop(spot_id, None)
+                self.spot_index.remove(spot_id)
+                if old is not None and self.by_call.get(old["activator"]) == spot_id:
+                    del self.by_call[old["activator"]]
+            for row in rows:
+                snapshot[row["spotId"]] = row
+                self.by_call[row["activator"]] = row["spotId"]
+                if row.get("latitude") is None or row.get("longitude") is None:
+                    self.spot_index.remove(row["spotId"])
+                else:
+                    self.spot_index.insert(
+                        row["spotId"], row["latitude"], row["longitude"]
+                    )
+            self.snapshot = snapshot
+
+        for callback in self.subscribers:
+            try:
+                callback(events)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Spot subscriber %s failed", callback)
+        return {
+            "added": [event["spot"] for event in events if event["kind"] == ADDED],
+            "updated": [
+                event["spot"] for event in events if event["kind"] in (UPDATED, QSY)
+            ],
+            "removed": replaced + removed_ids,
+        }
+
+    @staticmethod
+    def __differs(previous: dict, spot: dict) -> bool:
+        """True if a feed spot says something the stored one doesn't."""
+        for key, value in spot.items():
+            if key not in VOLATILE and key in previous and previous[key] != value:
+                return True
+        return False
+
+    def __refresh(self) -> dict:
+        """Rebuild the index and snapshot from the table, returns the diff."""
+        current = self.spotdb.getspots()
+        self.spot_index.rebuild(
+            (spot["spotId"], spot.get("latitude"), spot.get("longitude"))
+            for spot in current
+        )
+        new = {spot["spotId"]: spot for spot in current}
+        self.by_call = {spot["activator"]: spot["spotId"] for spot in current}
+        diff = diff_spots(self.snapshot, new)
+        self.snapshot = new
+        return diff
+
+    def clear(self) -> None:
+        """Forget every spot."""
+        self.spotdb.cursor.execute("delete from spots;")
+        self.spotdb.db.commit()
+        self.spot_index.clear()
+        self.snapshot = {}
+        self.by_call = {}
+        self.warm = set()
+
+    def poll(self):
+        """Fetch and ingest the feed once, None if the fetch failed."""
+        with PERF.time("spot fetch"):
+            spots = self.fetch(self.url)
+        if spots is None:
+            return None
+        return self.ingest(spots)
+
+    def spots(self) -> list:
+        """Every spot in the table, by frequency."""
+        return sorted(self.snapshot.values(), key=lambda spot: spot["frequency"])
+
+    def save_snapshot(self, path: str) -> int:
+        """
+        Write the spot table, band, distance and all, to 'path' for
+        load_snapshot(). Returns how many spots were saved.
+        """
+        spots = self.spots()
+        columns = sorted({key for spot in spots for key in spot})
+        text = dumps(
+            {
+                "saved": time.time(),
+                "columns": columns,
+                "rows": [[spot.get(column) for column in columns] for spot in spots],
+            },
+            separators=(",", ":"),
+        )
+        try:
+            with open(f"{path}.tmp", "wt", encoding="utf-8") as file_descriptor:
+                file_descriptor.write(text)
+            os.replace(f"{path}.tmp", path)
+        except OSError as exception:
+            logger.critical("%s", exception)
+            return 0
+        return len(spots)
+
+    def load_snapshot(self, path: str, max_age: float = 1800.0) -> int:
+        """
+        Fill the table from a save_snapshot() file, skipping spots more
+        than 'max_age' seconds old. They are kept until the next ingest()
+        says whether they are still on the feed. Returns how many loaded.
+        """
+        try:
+            with open(path, "rt", encoding="utf-8") as file_descriptor:
+                saved = loads(file_descriptor.read())
+            columns = saved["columns"]
+            rows = saved["rows"]
+        except (OSError, ValueError, KeyError, TypeError) as exception:
+            logger.debug("No spot snapshot: %s", exception)
+            return 0
+        cutoff = (
+            datetime.datetime.now(datetime.timezone.utc)
+            - datetime.timedelta(seconds=max_age)
+        ).strftime("%Y-%m-%dT%H:%M:%S")
+        spots = [dict(zip(columns, row)) for row in rows]
+        spots = [
+            spot
+            for spot in spots
+            if str(spot.get("spotTime") or "")[:19] >= cutoff
+            and spot.get("spotId") not in self.snapshot
+        ]
+        try:
+            self.spotdb.addspots(spots)
+        except sqlite3.Error as exception:
+            logger.critical("Bad spot snapshot: %s", exception)
+            return 0
+        self.warm.update(spot["spotId"] for spot in spots)
+        self.__refresh()
+        return len(spots)
@@ -0,0 +1,184 @@
+"""
+K6GTE, Local spot feed for other station software
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import hashlib
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+
+try:
+    from augratin.lib.spot_engine import diff_spots
+except ModuleNotFoundError:
+    from lib.spot_engine import diff_spots
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+
+class SpotServer:
+    """Re-publishes the spot table over HTTP and UDP."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        broadcaster=None,
+        max_bytes: int = 1400,
+    ) -> None:
+        """
+        Serves the current spots as a JSON list at http://host:port/spots
+        and the time of the last update at /status.
+
+        Each reply is encoded once per publish() and carries an ETag, a
+        client sending If-None-Match gets a 304 until the spots change.
+
+        If 'broadcaster', a UDPBroadcaster, is given, every publish()
+        also sends a JSON diff to its destinations, a multicast group
+        for example:
+        {"added": [spots], "updated": [spots], "removed": [spotIds]}
+        A big diff is split over several datagrams of at most 'max_bytes'
+        of JSON each, by default what fits one Ethernet frame unfragmented.
+        A single spot bigger than that goes alone. Datagrams the
+        broadcaster couldn't send are retried, in order, before the next
+        diff goes out.
+        """
+        self.host = host
+        self.requested_port = port
+        self.broadcaster = broadcaster
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.spots = {}
+        self.body = b"[]"
+        self.etag = '"0"'
+        self.updated = ""
+        self.requests = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def port(self) -> int:
+        """The port actually bound."""
+        if self.server:
+            return self.server.server_address[1]
+        return self.requested_port
+
+    def start(self) -> "SpotServer":
+        """Start serving on a daemon thread."""
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """GET only."""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                feed.requests += 1
+                if self.path.split("?")[0] == "/status":
+                    body = dumps(
+                        {"updated": feed.updated, "spots": len(feed.spots)}
+                    ).encode()
+                    self.reply(200, body)
+                    return
+                if self.path.split("?")[0] != "/spots":
+                    self.reply(404, b'{"error": "not found"}')
+                    return
+                with feed.lock:
+                    body, etag = feed.body, feed.etag
+                if self.headers.get("If-None-Match") == etag:
+                    self.reply(304, b"", etag)
+                    return
+                self.reply(200, body, etag)
+
+            def reply(self, status: int, body: bytes, etag: str = None):
+                """Send a JSON response."""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Access-Control-Allow-Origin", "*")
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                """Keep quiet."""
+
+        self.server = ThreadingHTTPServer((self.host, self.requested_port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="spot-server", daemon=True
+        )
+        self.thread.start()
+        logger.info("Spot feed at http://%s:%s/spots", self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def publish(self, spots: list, updated: str = "") -> dict:
+        """
+        Replace the served spots with 'spots', a list of dicts from
+        Database.getspots(). Returns the diff from the last publish().
+        """
+        new = {spot["spotId"]: spot for spot in spots}
+        diff = diff_spots(self.spots, new)
+        if not any(diff.values()):
+            return diff
+        body = dumps(spots).encode()
+        with self.lock:
+            self.spots = new
+            self.body = body
+            self.etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            self.updated = updated
+        if self.broadcaster is not None:
+            if self.broadcaster.pending():
+                self.broadcaster.retry()
+            for datagram in self.__split(diff):
+                self.broadcaster.send(datagram)
+        return diff
+
+    def __split(self, diff: dict):
+        """
+        Yields the diff as JSON text in pieces of at most 'max_bytes',
+        each shaped like the whole diff. Every spot is encoded once,
+        dumps() escapes to ASCII so characters are bytes.
+        """
+        kinds = ("added", "updated", "removed")
+        # Every piece is an empty diff plus its items and ", " between.
+        empty = len(dumps({name: [] for name in kinds}))
+        part = {name: [] for name in kinds}
+        size = empty
+        for kind in kinds:
+            for item in diff[kind]:
+                encoded = dumps(item)
+                if size > empty and size + 2 + len(encoded) > self.max_bytes:
+                    yield self.__join(part)
+                    part = {name: [] for name in kinds}
+                    size = empty
+                if part[kind]:
+                    size += 2
+                part[kind].append(encoded)
+                size += len(encoded)
+        if size > empty:
+            yield self.__join(part)
+
+    @staticmethod
+    def __join(part: dict) -> str:
+        """A piece's JSON text from its already encoded items."""
+        return (
+            "{"
+            + ", ".join(
+                f'"{kind}": [{", ".join(items)}]' for kind, items in part.items()
+            )
+            + "}"
+        )
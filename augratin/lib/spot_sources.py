@@ -0,0 +1,323 @@
+"""
+K6GTE, Spot sources besides the POTA api
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import datetime
+import logging
+import re
+import socket
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+
+try:
+    from augratin.lib.spot_engine import getjson
+except ModuleNotFoundError:
+    from lib.spot_engine import getjson
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+DX_LINE = re.compile(
+    r"^DX de (?P<spotter>[A-Z0-9/#-]+):?\s+(?P<frequency>\d+(?:\.\d+)?)\s+"
+    r"(?P<call>[A-Z0-9/]+)\s+(?P<comments>.*?)\s*(?P<time>\d{4})Z",
+    re.IGNORECASE,
+)
+PARK = re.compile(r"\b[A-Z0-9]{1,4}-\d{4,5}\b")
+MODES = ("CW", "SSB", "USB", "LSB", "FT8", "FT4", "RTTY", "PSK31", "AM", "FM")
+
+# Spots from sources other than the api get spotIds above this, the
+# api's own are nowhere near it.
+SOURCE_ID_BASE = 1 << 40
+
+
+def source_spot_id(source: str, call: str) -> int:
+    """The same spotId for every spot of 'call' from 'source'."""
+    return SOURCE_ID_BASE + zlib.crc32(f"{source}:{call}".encode())
+
+
+def parse_dx_line(line: str, source: str, expire: int = 600) -> dict:
+    """
+    A 'DX de' line from a DX cluster or the RBN as a spot shaped like the
+    /spot/activator feed, frequency in kHz. None if it isn't one.
+    """
+    match = DX_LINE.match(line.strip())
+    if match is None:
+        return None
+    call = match["call"].upper()
+    comments = match["comments"].strip()
+    words = comments.upper().split()
+    mode = next((word for word in words if word in MODES), "")
+    if mode in ("USB", "LSB"):
+        mode = "SSB"
+    park = PARK.search(comments.upper())
+    now = datetime.datetime.now(datetime.timezone.utc)
+    spot_time = now.replace(
+        hour=int(match["time"][:2]) % 24,
+        minute=int(match["time"][2:]) % 60,
+        second=0,
+        microsecond=0,
+    )
+    if spot_time > now + datetime.timedelta(minutes=5):
+        spot_time -= datetime.timedelta(days=1)
+    return {
+        "spotId": source_spot_id(source, call),
+        "activator": call,
+        "frequency": match["frequency"],
+        "mode": mode,
+        "reference": park.group(0) if park else "-",
+        "parkName": "",
+        "spotTime": spot_time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "spotter": match["spotter"].upper().rstrip("-#"),
+        "comments": comments[:45],
+        "source": source,
+        "invalid": None,
+        "name": "",
+        "locationDesc": "",
+        "grid4": "",
+        "grid6": "",
+        "latitude": None,
+        "longitude": None,
+        "count": 1,
+        "expire": expire,
+    }
+
+
+class SpotMerger:
+    """Combines the spots of every source into one feed."""
+
+    def __init__(self, window: float = 600.0, tolerance: float = 1.0) -> None:
+        """
+        A polled source, like the api, replaces its spots with every
+        poll. A streamed source, a cluster or the RBN, adds spots that
+        are forgotten 'window' seconds after they were last heard.
+
+        The merged feed has one spot per callsign, the table can't hold
+        more. It comes from the source added first that has the call, the
+        api has park details the others don't, and within one source the
+        spot heard last wins. Other sources hearing the call within
+        'tolerance' kHz of it add to its count.
+        """
+        self.window = window
+        self.tolerance = tolerance
+        self.order = []
+        self.polled = {}
+        self.streamed = {}
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.received = 0
+
+    def add_source(self, name: str) -> None:
+        """Register a source, in order of preference."""
+        with self.lock:
+            if name not in self.order:
+                self.order.append(name)
+
+    def replace(self, name: str, spots: list) -> None:
+        """Everything a polled source currently lists."""
+        self.add_source(name)
+        with self.lock:
+            self.polled[name] = spots
+            self.received += len(spots)
+        self.changed.set()
+
+    def add(self, name: str, spots: list) -> None:
+        """New spots from a streamed source."""
+        self.add_source(name)
+        heard = time.monotonic()
+        with self.lock:
+            stream = self.streamed.setdefault(name, {})
+            for spot in spots:
+                stream[spot["activator"]] = (heard, spot)
+            self.received += len(spots)
+        self.changed.set()
+
+    def __near(self, kept: dict, spot: dict) -> bool:
+        """True if two spots are within 'tolerance' kHz."""
+        try:
+            gap = abs(float(kept["frequency"]) - float(spot["frequency"]))
+        except (KeyError, TypeError, ValueError):
+            return False
+        return gap <= self.tolerance
+
+    def merged(self) -> list:
+        """One spot per callsign, frequencies in kHz like the api."""
+        self.changed.clear()
+        oldest = time.monotonic() - self.window
+        best = {}
+        with self.lock:
+            for name in self.order:
+                if name in self.polled:
+                    spots = self.polled[name]
+                else:
+                    stream = self.streamed.get(name, {})
+                    for call in [
+                        call for call, (heard, _) in stream.items() if heard < oldest
+                    ]:
+                        del stream[call]
+                    spots = [spot for _, spot in stream.values()]
+                for spot in spots:
+                    call = str(spot.get("activator", "")).upper()
+                    kept = best.get(call)
+                    if kept is None or kept[0] == name:
+                        best[call] = (name, dict(spot))
+                    elif self.__near(kept[1], spot):
+                        kept[1]["count"] = (kept[1].get("count") or 1) + 1
+        return [spot for _, spot in best.values()]
+
+
+class SpotSource(ABC):
+    """Something spots come from, run on its own thread."""
+
+    name = "source"
+
+    def __init__(self) -> None:
+        self.merger = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self, merger: SpotMerger) -> "SpotSource":
+        """Start handing spots to 'merger'."""
+        self.merger = merger
+        merger.add_source(self.name)
+        self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Ask the thread to finish."""
+        self.stopped.set()
+
+    @abstractmethod
+    def run(self) -> None:
+        """Fetch or read spots until stopped."""
+
+
+class HTTPPollSource(SpotSource):
+    """A JSON spot list fetched every so often, the POTA api by default."""
+
+    def __init__(
+        self,
+        url: str,
+        interval: float = 30.0,
+        name: str = "pota",
+        fetch=getjson,
+        normalize=None,
+    ) -> None:
+        """
+        'fetch' returns the decoded list or None. 'normalize' turns one
+        item of it into a spot shaped like the api's, items it returns
+        None for are dropped. Without it the items are used as they are.
+        """
+        super().__init__()
+        self.url = url
+        self.interval = interval
+        self.name = name
+        self.fetch = fetch
+        self.normalize = normalize
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            spots = self.fetch(self.url)
+            if spots is not None:
+                if self.normalize is not None:
+                    spots = [
+                        spot
+                        for spot in (self.normalize(item) for item in spots)
+                        if spot is not None
+                    ]
+                self.merger.replace(self.name, spots)
+            self.stopped.wait(self.interval)
+
+
+class TelnetSource(SpotSource):
+    """A DX cluster or RBN telnet feed."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        login: str,
+        name: str = "cluster",
+        batch: float = 0.25,
+    ) -> None:
+        """
+        Logs in with the 'login' callsign when asked, then reads 'DX de'
+        lines. Spots are handed over at most every 'batch' seconds so a
+        busy skimmer feed doesn't take the lock for every line.
+        Reconnects, waiting up to a minute, when the connection drops.
+        """
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.login = login
+        self.name = name
+        self.batch = batch
+        self.lines = 0
+        self.sock = None
+
+    def stop(self) -> None:
+        super().stop()
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def run(self) -> None:
+        backoff = 1.0
+        while not self.stopped.is_set():
+            try:
+                with socket.create_connection(
+                    (self.host, self.port), timeout=30
+                ) as sock:
+                    self.sock = sock
+                    backoff = 1.0
+                    self.__read(sock)
+            except OSError as exception:
+                logger.debug("%s: %s", self.name, exception)
+            self.sock = None
+            self.stopped.wait(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def __read(self, sock: socket.socket) -> None:
+        sock.settimeout(self.batch)
+        buffer = b""
+        pending = []
+        flushed = time.monotonic()
+        logged_in = False
+        while not self.stopped.is_set():
+            try:
+                data = sock.recv(65536)
+                if not data:
+                    break
+            except socket.timeout:
+                data = b""
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            if not logged_in and re.search(rb"(call|login)\S*:\s*$", buffer, re.I):
+                sock.sendall(f"{self.login}\r\n".encode())
+                logged_in = True
+                buffer = b""
+            for line in lines:
+                self.lines += 1
+                spot = parse_dx_line(line.decode(errors="replace"), self.name)
+                if spot is not None:
+                    pending.append(spot)
+            if pending and time.monotonic() - flushed >= self.batch:
+                self.merger.add(self.name, pending)
+                pending = []
+                flushed = time.monotonic()
+        if pending:
+            self.merger.add(self.name, pending)
+
+
+def telnet_source(address: str, login: str, name: str) -> TelnetSource:
+    """A TelnetSource from HOST:PORT."""
+    host, _, port = address.rpartition(":")
+    return TelnetSource(host or "localhost", int(port), login, name)
@@ -0,0 +1,52 @@
+"""
+K6GTE, Startup phase timer
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import sys
+import time
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+
+class StartupProfile:
+    """Wall clock time spent in each phase of starting the program."""
+
+    def __init__(self, started: float = None) -> None:
+        """
+        'started' is a time.perf_counter() reading taken as early as
+        possible, defaults to now. Each mark() closes the phase that
+        began at the previous mark.
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.last = self.started
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase: str) -> float:
+        """End a phase, returns its length in ms."""
+        now = time.perf_counter()
+        elapsed = (now - self.last) * 1000
+        self.phases.append((phase, elapsed, (now - self.started) * 1000))
+        self.last = now
+        return elapsed
+
+    def total(self) -> float:
+        """ms from the start to the last mark."""
+        return (self.last - self.started) * 1000
+
+    def report(self, file=None) -> str:
+        """The phases as a table, printed to 'file' (stderr) the first time."""
+        lines = [f"{'phase':<28}{'ms':>10}{'at ms':>10}"]
+        for phase, elapsed, at in self.phases:
+            lines.append(f"{phase:<28}{elapsed:>10.1f}{at:>10.1f}")
+        text = "\n".join(lines)
+        if not self.reported:
+            self.reported = True
+            print(text, file=file or sys.stderr, flush=True)
+        return text
@@ -6,7 +6,14 @@ email:barry.shaffer@gmail.com
 GPL V3
 """
 
+import logging
 import socket
+import struct
+import threading
+from collections import deque
+
+logger = logging.getLogger("__main__")
+
 
 def broadcast_adif(adif_data: str, address_port: str) -> str:
     """
@@ -24,7 +31,7 @@ def broadcast_adif(adif_data: str, address_port: str) -> str:
 
     try:
         # Split the address and port
-        broadcast_address, port = address_port.split(':')
+        broadcast_address, port = address_port.split(":")
 
         # Create a UDP socket
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -41,3 +48,134 @@ def broadcast_adif(adif_data: str, address_port: str) -> str:
         return "UDP broadcast successful"
     except Exception as e:
         return f"Error broadcasting data: {str(e)}"
+
+
+WSJTX_MAGIC = 0xADBCCBDA
+WSJTX_SCHEMA = 2
+WSJTX_LOGGED_ADIF = 12
+WSJTX_ADIF_HEADER = "\n<adif_ver:5>3.1.2\n<programid:8>AuGratin\n<EOH>\n"
+
+
+def qt_utf8(text: str) -> bytes:
+    """A QDataStream utf8 string, 32 bit big endian length then the bytes."""
+    data = text.encode()
+    return struct.pack(">I", len(data)) + data
+
+
+def wsjtx_logged_adif(adif_data: str, client_id: str = "AuGratin") -> bytes:
+    """A WSJT-X 'Logged ADIF' (type 12) datagram carrying one QSO."""
+    return (
+        struct.pack(">III", WSJTX_MAGIC, WSJTX_SCHEMA, WSJTX_LOGGED_ADIF)
+        + qt_utf8(client_id)
+        + qt_utf8(WSJTX_ADIF_HEADER + adif_data)
+    )
+
+
+class UDPBroadcaster:
+    """Sends QSOs to one or more UDP listeners over one long lived socket."""
+
+    formats = {
+        "adif": lambda adif_data: adif_data.encode(),
+        "wsjtx": wsjtx_logged_adif,
+    }
+
+    def __init__(self, destinations, retry_size: int = 100, attempts: int = 5) -> None:
+        """
+        Takes a comma separated string, or a list, of destinations.
+
+        Each is host:port for plain ADIF text, the same as broadcast_adif,
+        or format@host:port where format is 'adif' or 'wsjtx'. 'wsjtx'
+        wraps the QSO in a WSJT-X binary 'Logged ADIF' message.
+
+        Addresses are looked up once, here.
+
+        Datagrams that fail to send wait in a retry queue of at most
+        'retry_size' entries, the oldest are dropped when it's full.
+        Each gets 'attempts' tries in all.
+        """
+        if isinstance(destinations, str):
+            destinations = destinations.split(",")
+        self.attempts = attempts
+        self.retry_queue = deque(maxlen=retry_size)
+        self.lock = threading.Lock()
+        self.destinations = []
+        self.stats = {}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        for destination in destinations:
+            destination = destination.strip()
+            if not destination:
+                continue
+            kind, _, address_port = destination.rpartition("@")
+            kind = kind.lower() or "adif"
+            try:
+                host, port = address_port.rsplit(":", 1)
+                address = socket.getaddrinfo(
+                    host, int(port), socket.AF_INET, socket.SOCK_DGRAM
+                )[0][4]
+            except (ValueError, OSError) as exception:
+                logger.critical("Bad UDP destination %s: %s", destination, exception)
+                continue
+            if kind not in self.formats:
+                logger.critical("Unknown UDP format %s", kind)
+                continue
+            self.destinations.append((destination, kind, address))
+            self.stats[destination] = {
+                "sent": 0,
+                "bytes": 0,
+                "errors": 0,
+                "retried": 0,
+                "dropped": 0,
+            }
+
+    def __sendto(self, destination: str, datagram: bytes, address) -> bool:
+        """One datagram, counted."""
+        stats = self.stats[destination]
+        try:
+            self.sock.sendto(datagram, address)
+        except OSError as exception:
+            stats["errors"] += 1
+            logger.debug("UDP send to %s failed: %s", destination, exception)
+            return False
+        stats["sent"] += 1
+        stats["bytes"] += len(datagram)
+        return True
+
+    def __queue_retry(self, destination: str, datagram: bytes, address, tries: int):
+        """Keep a failed datagram for later, unless it's had enough tries."""
+        if tries >= self.attempts:
+            self.stats[destination]["dropped"] += 1
+            return
+        if len(self.retry_queue) == self.retry_queue.maxlen:
+            self.stats[self.retry_queue[0][0]]["dropped"] += 1
+        self.retry_queue.append((destination, datagram, address, tries))
+
+    def send(self, adif_data: str) -> bool:
+        """Send a QSO to every destination, True if they all went out."""
+        result = True
+        with self.lock:
+            for destination, kind, address in self.destinations:
+                datagram = self.formats[kind](adif_data)
+                if not self.__sendto(destination, datagram, address):
+                    self.__queue_retry(destination, datagram, address, 1)
+                    result = False
+        return result
+
+    def pending(self) -> int:
+        """Datagrams waiting to be retried."""
+        return len(self.retry_queue)
+
+    def retry(self) -> int:
+        """Try the retry queue once, returns how many are still waiting."""
+        with self.lock:
+            waiting = list(self.retry_queue)
+            self.retry_queue.clear()
+            for destination, datagram, address, tries in waiting:
+                self.stats[destination]["retried"] += 1
+                if not self.__sendto(destination, datagram, address):
+                    self.__queue_retry(destination, datagram, address, tries + 1)
+            return len(self.retry_queue)
+
+    def close(self) -> None:
+        """Close the socket."""
+        self.sock.close()
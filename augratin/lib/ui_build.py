@@ -0,0 +1,76 @@
+"""
+K6GTE, Precompiled main window UI
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import hashlib
+import importlib
+import logging
+import os
+
+logger = logging.getLogger("__main__")
+
+UI_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "dialog.ui")
+UI_MODULE = os.path.join(os.path.dirname(__file__), "ui_dialog.py")
+
+
+def source_hash(ui_path: str) -> str:
+    """sha256 of a .ui file."""
+    with open(ui_path, "rb") as file_descriptor:
+        return hashlib.sha256(file_descriptor.read()).hexdigest()
+
+
+def compile_ui(ui_path: str = UI_FILE, py_path: str = UI_MODULE) -> str:
+    """
+    Generate a Python module from a .ui file with pyuic. The sha256 of
+    the .ui file is stored in it as SOURCE_SHA256 so a stale module is
+    noticed. Returns 'py_path'.
+    """
+    from PyQt6 import uic  # pylint: disable=import-outside-toplevel
+
+    with open(py_path, "wt", encoding="utf-8") as file_descriptor:
+        uic.compileUi(ui_path, file_descriptor)
+        file_descriptor.write(f'\n\nSOURCE_SHA256 = "{source_hash(ui_path)}"\n')
+    return py_path
+
+
+def compiled_ui(ui_path: str = UI_FILE):
+    """
+    The generated Ui_MainWindow class, or None if there is no generated
+    module or it was built from a different 'ui_path' than the one on disk.
+    """
+    try:
+        module = importlib.import_module(".ui_dialog", __package__)
+    except ImportError:
+        return None
+    try:
+        if getattr(module, "SOURCE_SHA256", None) != source_hash(ui_path):
+            logger.debug("ui_dialog.py is out of date, using %s", ui_path)
+            return None
+    except OSError:
+        pass
+    return getattr(module, "Ui_MainWindow", None)
+
+
+def setup_ui(window, ui_path: str = UI_FILE) -> bool:
+    """
+    Build the widgets of 'ui_path' onto 'window'. Uses the generated module
+    when it is current, otherwise parses the .ui file with uic.loadUi.
+    Returns True if the generated module was used.
+    """
+    ui_class = compiled_ui(ui_path)
+    if ui_class is None:
+        from PyQt6 import uic  # pylint: disable=import-outside-toplevel
+
+        uic.loadUi(ui_path, window)
+        return False
+    ui = ui_class()
+    ui.setupUi(window)
+    for name, value in vars(ui).items():
+        setattr(window, name, value)
+    return True
+
+
+if __name__ == "__main__":
+    print(f"Wrote {compile_ui()}")
@@ -0,0 +1,262 @@
+"""
+K6GTE, Watched stations and parks
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import logging
+import shutil
+import subprocess
+from json import dumps, loads
+
+try:
+    from augratin.lib.spot_engine import ADDED, QSY, REMOVED
+except ModuleNotFoundError:
+    from lib.spot_engine import ADDED, QSY, REMOVED
+
+if __name__ == "__main__":
+    print("I'm not the program you are looking for.")
+
+logger = logging.getLogger("__main__")
+
+FIELDS = ("call", "park", "location", "mode")
+
+
+def base_call(call: str) -> str:
+    """K6GTE/P, VE3/K6GTE and K6GTE all give K6GTE."""
+    return max(call.upper().split("/"), key=len)
+
+
+class PrefixTrie:
+    """Finds every stored prefix of a string in one walk down it."""
+
+    def __init__(self) -> None:
+        self.root = {}
+
+    def add(self, prefix: str, value) -> None:
+        """File 'value' under 'prefix'."""
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(None, set()).add(value)
+
+    def discard(self, prefix: str, value) -> None:
+        """Unfile 'value', empty branches stay, they cost nothing."""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return
+        node.get(None, set()).discard(value)
+
+    def matches(self, text: str) -> set:
+        """Values of every prefix 'text' starts with."""
+        found = set()
+        node = self.root
+        found.update(node.get(None, ()))
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            found.update(node.get(None, ()))
+        return found
+
+
+class WatchList:
+    """Rules a spot is checked against."""
+
+    def __init__(self, rules=()) -> None:
+        """
+        A rule is a dict of any of
+        "call": a callsign, portable forms of it match too
+        "park": a reference or the start of one, "K-" or "VE-0"
+        "location": a locationDesc, "US-CA"
+        "mode": "CW", "SSB", "FT8" ...
+        and matches a spot when all of its fields do. A plain string is
+        a callsign, the file used to be a list of them.
+
+        Each rule is filed under one field, callsigns, locations and
+        modes in dicts and parks in a PrefixTrie, so a spot only meets
+        the rules that could match it.
+        """
+        self.rules = {}
+        self.next_id = 0
+        self.calls = {}
+        self.parks = PrefixTrie()
+        self.locations = {}
+        self.modes = {}
+        for rule in rules:
+            self.add(rule)
+
+    @staticmethod
+    def normalize(rule) -> dict:
+        """A rule as a dict of upper case values, None if it isn't one."""
+        if isinstance(rule, str):
+            rule = {"call": rule}
+        if not isinstance(rule, dict):
+            return None
+        rule = {
+            field: str(rule[field]).strip().upper()
+            for field in FIELDS
+            if rule.get(field)
+        }
+        if "call" in rule:
+            rule["call"] = base_call(rule["call"])
+        return rule or None
+
+    def __index(self, rule: dict):
+        """The dict or trie a rule is filed in and its key there."""
+        if "call" in rule:
+            return self.calls, rule["call"]
+        if "park" in rule:
+            return self.parks, rule["park"]
+        if "location" in rule:
+            return self.locations, rule["location"]
+        return self.modes, rule["mode"]
+
+    def add(self, rule) -> int:
+        """Add a rule, returns its id, None if it isn't a rule."""
+        rule = self.normalize(rule)
+        if rule is None:
+            return None
+        for rule_id, existing in self.rules.items():
+            if existing == rule:
+                return rule_id
+        rule_id = self.next_id
+        self.next_id += 1
+        self.rules[rule_id] = rule
+        index, key = self.__index(rule)
+        if isinstance(index, PrefixTrie):
+            index.add(key, rule_id)
+        else:
+            index.setdefault(key, set()).add(rule_id)
+        return rule_id
+
+    def remove(self, rule_id: int) -> None:
+        """Drop a rule."""
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return
+        index, key = self.__index(rule)
+        if isinstance(index, PrefixTrie):
+            index.discard(key, rule_id)
+        else:
+            index.get(key, set()).discard(rule_id)
+
+    def toggle_call(self, call: str) -> bool:
+        """Watch a callsign, or stop if it is. Returns True if now watched."""
+        rule = self.normalize(call)
+        for rule_id, existing in list(self.rules.items()):
+            if existing == rule:
+                self.remove(rule_id)
+                return False
+        self.add(rule)
+        return True
+
+    def matches(self, spot: dict) -> list:
+        """The rules a spot meets."""
+        call = base_call(str(spot.get("activator") or ""))
+        park = str(spot.get("reference") or "").upper()
+        locations = str(spot.get("locationDesc") or "").upper().split(",")
+        mode = str(spot.get("mode") or "").upper()
+        candidates = set(self.calls.get(call, ()))
+        candidates |= self.parks.matches(park)
+        for location in locations:
+            candidates |= self.locations.get(location, set())
+        candidates |= self.modes.get(mode, set())
+        matched = []
+        for rule_id in candidates:
+            rule = self.rules[rule_id]
+            if (
+                rule.get("call", call) == call
+                and rule.get("mode", mode) == mode
+                and park.startswith(rule.get("park", ""))
+                and rule.get("location", locations[0]) in locations
+            ):
+                matched.append(rule)
+        return matched
+
+    def load(self, path: str) -> int:
+        """Add the rules saved in 'path', returns how many there were."""
+        try:
+            with open(path, "rt", encoding="utf-8") as file_descriptor:
+                saved = loads(file_descriptor.read())
+        except (OSError, ValueError) as exception:
+            logger.debug("No watch list: %s", exception)
+            return 0
+        if not isinstance(saved, list):
+            return 0
+        for rule in saved:
+            self.add(rule)
+        return len(saved)
+
+    def save(self, path: str) -> None:
+        """Write the rules, callsign only rules as plain strings like before."""
+        saved = [
+            rule["call"] if list(rule) == ["call"] else rule
+            for rule in self.rules.values()
+        ]
+        try:
+            with open(path, "wt", encoding="utf-8") as file_descriptor:
+                file_descriptor.write(dumps(saved, indent=4))
+        except OSError as exception:
+            logger.critical("%s", exception)
+
+
+class WatchAlerts:
+    """Checks newly arrived spots against a WatchList."""
+
+    def __init__(self, watchlist: WatchList, alert=None) -> None:
+        """
+        Subscribe events() to a SpotEngine. Only the spots in the events
+        are checked, the rest of the table is left alone, and only spots
+        that were added or moved frequency raise an alert. 'alert' is
+        called with a list of (spot, rules) for each batch with any.
+        'watched' holds the spotIds currently matching, for highlighting.
+        """
+        self.watchlist = watchlist
+        self.alert = alert
+        self.watched = set()
+
+    def events(self, events: list) -> None:
+        """SpotEngine subscriber."""
+        found = []
+        for event in events:
+            spot = event["spot"]
+            if event["kind"] == REMOVED:
+                self.watched.discard(spot["spotId"])
+                continue
+            if event["previous"] is not None:
+                self.watched.discard(event["previous"]["spotId"])
+            rules = self.watchlist.matches(spot)
+            if rules:
+                self.watched.add(spot["spotId"])
+                if event["kind"] in (ADDED, QSY):
+                    found.append((spot, rules))
+            else:
+                self.watched.discard(spot["spotId"])
+        if found and self.alert is not None:
+            self.alert(found)
+
+    def rescan(self, spots) -> None:
+        """Work out 'watched' from scratch, after the rules change."""
+        self.watched = {
+            spot["spotId"] for spot in spots if self.watchlist.matches(spot)
+        }
+
+
+def notify(title: str, message: str) -> bool:
+    """A desktop notification through notify-send, False if there isn't one."""
+    command = shutil.which("notify-send")
+    if command is None:
+        return False
+    try:
+        subprocess.Popen(  # pylint: disable=consider-using-with
+            [command, "--app-name=augratin", title, message],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as exception:
+        logger.debug("notify-send: %s", exception)
+        return False
+    return True
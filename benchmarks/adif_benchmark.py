@@ -0,0 +1,84 @@
+"""
+K6GTE, ADIF import benchmark
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.adif_benchmark --records 500000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from augratin.lib.adif_index import WorkedIndex
+from augratin.lib.adif_reader import import_adif, iter_records
+
+BANDS = ["160M", "80M", "40M", "30M", "20M", "17M", "15M", "12M", "10M", "6M", "2M"]
+MODES = ["CW", "SSB", "FT8", "FT4"]
+
+
+def field(name: str, value: str) -> str:
+    """One ADIF field the way log_contact writes it."""
+    return f"<{name}:{len(value)}>{value}\n"
+
+
+def write_log(path: str, records: int, seed: int = 1) -> None:
+    """Write a synthetic ADIF log."""
+    rand = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as file_descriptor:
+        file_descriptor.write("synthetic log\n<ADIF_VER:5>3.1.2\n<EOH>\n")
+        for index in range(records):
+            freq = f"{rand.uniform(1.8, 148):.4f}"
+            file_descriptor.write(
+                field("BAND", rand.choice(BANDS))
+                + field("CALL", f"K{index % 10}X{index % 26 * 7:03d}")
+                + field("COMMENT", "POTA: synthetic park")
+                + field("SIG", "POTA")
+                + field("SIG_INFO", f"K-{rand.randrange(1, 12000):04d}")
+                + field("GRIDSQUARE", "FM08vv")
+                + field("MODE", rand.choice(MODES))
+                + field("FREQ", freq)
+                + field(
+                    "QSO_DATE",
+                    f"2024{rand.randrange(1, 13):02d}{rand.randrange(1, 29):02d}",
+                )
+                + field("TIME_ON", f"{rand.randrange(0, 2400):04d}00")
+                + "<EOR>\n\n"
+            )
+
+
+def main():
+    """Build the file, then time parsing alone and parsing into the index."""
+    cli = argparse.ArgumentParser(description="Benchmark the streaming ADIF reader.")
+    cli.add_argument("--records", type=int, default=500000)
+    options = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.adi")
+        started = time.perf_counter()
+        write_log(path, options.records)
+        size = os.path.getsize(path) / 1e6
+        print(
+            f"wrote {options.records} records, {size:.1f} MB "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        started = time.perf_counter()
+        count = sum(1 for _ in iter_records(path))
+        elapsed = time.perf_counter() - started
+        print(
+            f"scan only:    {count} records {elapsed:6.2f}s {count / elapsed:10.0f}/s"
+        )
+
+        index = WorkedIndex(os.path.join(directory, "none.adi"))
+        stats = import_adif(path, lambda record: index.add(record, imported=True))
+        print(
+            f"scan + index: {stats['records']} records {stats['seconds']:6.2f}s "
+            f"{stats['records_per_second']:10}/s, {len(index.parks)} parks"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+K6GTE, Band plan lookup benchmark
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.bandplan_benchmark --lookups 200000
+"""
+
+import argparse
+import random
+import time
+
+from augratin.lib.bandplan import BAND_PLAN
+
+
+def getband_chain(freq):
+    """The if-chain BandPlan replaced, kept here to compare against."""
+    if freq.isnumeric():
+        frequency = int(float(freq)) * 1000
+        if 2000000 > frequency > 1800000:
+            return "160"
+        if 4000000 > frequency > 3500000:
+            return "80"
+        if 5406000 > frequency > 5330000:
+            return "60"
+        if 7300000 > frequency > 7000000:
+            return "40"
+        if 10150000 > frequency > 10100000:
+            return "30"
+        if 14350000 > frequency > 14000000:
+            return "20"
+        if 18168000 > frequency > 18068000:
+            return "17"
+        if 21450000 > frequency > 21000000:
+            return "15"
+        if 24990000 > frequency > 24890000:
+            return "12"
+        if 29700000 > frequency > 28000000:
+            return "10"
+        if 54000000 > frequency > 50000000:
+            return "6"
+        if 148000000 > frequency > 144000000:
+            return "2"
+        return None
+    return "0"
+
+
+def main():
+    """Time both lookups."""
+    cli = argparse.ArgumentParser(description="Benchmark band lookups.")
+    cli.add_argument("--lookups", type=int, default=200000)
+    options = cli.parse_args()
+
+    rand = random.Random(1)
+    freqs = []
+    for _ in range(options.lookups):
+        _name, start, end, _scale = rand.choice(BAND_PLAN.bands)
+        freqs.append(rand.uniform(start, end))
+    khz = [str(int(freq * 1000)) for freq in freqs]
+
+    started = time.perf_counter()
+    for freq in khz:
+        getband_chain(freq)
+    chain = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for freq in freqs:
+        BAND_PLAN.band_for(freq)
+    bisect = time.perf_counter() - started
+
+    started = time.perf_counter()
+    BAND_PLAN.bands_for(freqs)
+    batch = time.perf_counter() - started
+
+    for label, elapsed in (("if-chain", chain), ("bisect", bisect), ("batch", batch)):
+        print(f"{label:9} {elapsed / options.lookups * 1e9:7.0f} ns/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+K6GTE, CAT benchmark against the rig simulators
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.cat_benchmark --polls 2000 --latency 0.001 --jitter 0.002
+"""
+
+import argparse
+import time
+
+from augratin.lib.cat_interface import CAT
+from augratin.lib.rig_simulator import SIMULATORS, Faults
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Nearest rank percentile of a sorted list, in ms."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index] * 1000
+
+
+def poll_latency(cat: CAT, polls: int) -> tuple:
+    """Time get_vfo() calls, returns (sorted latencies, errors)."""
+    latencies = []
+    errors = 0
+    for _ in range(polls):
+        started = time.perf_counter()
+        try:
+            if not cat.get_vfo().isdigit():
+                errors += 1
+        except Exception:  # pylint: disable=broad-except
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies, errors
+
+
+def run_commands(cat: CAT, state, count: int) -> dict:
+    """
+    Send 'count' set_vfo() commands, one worked if the simulator's 'state'
+    has the new frequency afterwards. Returns how many worked per second,
+    how many failed, and the sorted seconds from each first failure to
+    the next command that worked again.
+    """
+    failures = 0
+    recoveries = []
+    failed_at = None
+    started = time.perf_counter()
+    for index in range(count):
+        freq = 14000000 + index
+        sent = time.perf_counter()
+        try:
+            worked = cat.set_vfo(str(freq)) is not False and state.freq == freq
+        except Exception:  # pylint: disable=broad-except
+            worked = False
+        if worked and failed_at is not None:
+            recoveries.append(time.perf_counter() - failed_at)
+            failed_at = None
+        elif not worked:
+            failures += 1
+            if failed_at is None:
+                failed_at = sent
+    recoveries.sort()
+    return {
+        "rate": (count - failures) / (time.perf_counter() - started),
+        "failures": failures,
+        "recoveries": recoveries,
+    }
+
+
+def reconnect_time(interface: str, simulator, cat: CAT, timeout: float = 5.0) -> float:
+    """Restart the simulator on the same port, seconds until CAT reads a vfo again."""
+    port = simulator.port
+    simulator.stop()
+    try:
+        cat.get_vfo()
+    except Exception:  # pylint: disable=broad-except
+        pass
+    simulator.requested_port = port
+    started = time.perf_counter()
+    simulator.start()
+    while time.perf_counter() - started < timeout:
+        try:
+            if cat.get_vfo().isdigit():
+                return time.perf_counter() - started
+        except Exception:  # pylint: disable=broad-except
+            pass
+        if interface == "rigctld":
+            time.sleep(0.001)
+    return float("inf")
+
+
+def main():
+    """Run every backend and print a report."""
+    cli = argparse.ArgumentParser(description="Benchmark CAT against simulated rigs.")
+    cli.add_argument("--polls", type=int, default=1000)
+    cli.add_argument("--commands", type=int, default=500)
+    cli.add_argument("--latency", type=float, default=0.0)
+    cli.add_argument("--jitter", type=float, default=0.0)
+    cli.add_argument("--disconnect", type=float, default=0.0)
+    cli.add_argument("--malformed", type=float, default=0.0)
+    cli.add_argument("--seed", type=int, default=1)
+    options = cli.parse_args()
+
+    # With dropped connections most commands fail fast, a rate would only
+    # time the failures. Failures and how long they take to recover from
+    # are shown instead.
+    print(
+        f"{'backend':8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'errors':>7} {'cmd/s':>9} {'cmd fail':>9} {'recover ms':>11} "
+        f"{'reconnect ms':>13}"
+    )
+    for interface, simulator_class in SIMULATORS.items():
+        faults = Faults(
+            options.latency,
+            options.jitter,
+            options.disconnect,
+            options.malformed,
+            options.seed,
+        )
+        with simulator_class("localhost", 0, faults) as simulator:
+            cat = CAT(interface, "localhost", simulator.port)
+            latencies, errors = poll_latency(cat, options.polls)
+            commands = run_commands(cat, simulator.state, options.commands)
+            reconnect = reconnect_time(interface, simulator, cat)
+        rate = "-" if options.disconnect else f"{commands['rate']:.0f}"
+        recover = "-"
+        if commands["recoveries"]:
+            recover = f"{percentile(commands['recoveries'], 50):.3f}"
+        print(
+            f"{interface:8} {percentile(latencies, 50):8.3f} "
+            f"{percentile(latencies, 95):8.3f} {percentile(latencies, 99):8.3f} "
+            f"{errors:7} {rate:>9} {commands['failures']:9} {recover:>11} "
+            f"{reconnect * 1000:13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+K6GTE, Distance and bearing benchmark
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.geo_benchmark --pairs 10000
+"""
+
+import argparse
+import random
+import string
+import time
+
+from augratin.lib import geo
+
+
+def random_grid(rand: random.Random) -> str:
+    """A random six character gridsquare."""
+    return (
+        rand.choice(string.ascii_uppercase[:18])
+        + rand.choice(string.ascii_uppercase[:18])
+        + str(rand.randrange(10))
+        + str(rand.randrange(10))
+        + rand.choice(string.ascii_lowercase[:24])
+        + rand.choice(string.ascii_lowercase[:24])
+    )
+
+
+def main():
+    """Scalar per spot calls against one batched call."""
+    cli = argparse.ArgumentParser(description="Benchmark distance and bearing.")
+    cli.add_argument("--pairs", type=int, default=10000)
+    cli.add_argument("--repeat", type=int, default=5)
+    options = cli.parse_args()
+    rand = random.Random(1)
+    mygrid = "DM13at"
+    grids = [random_grid(rand) for _ in range(options.pairs)]
+
+    uncached = geo.gridtolatlon.__wrapped__
+
+    def scalar():
+        result = []
+        for grid in grids:
+            lat1, lon1 = uncached(mygrid)
+            lat2, lon2 = uncached(grid)
+            km = round(geo.haversine(lon1, lat1, lon2, lat2))
+            lat1, lon1 = uncached(mygrid)
+            lat2, lon2 = uncached(grid)
+            result.append((km, round(geo.initial_bearing(lat1, lon1, lat2, lon2))))
+        return result
+
+    def batched():
+        return list(zip(*geo.distances_bearings(mygrid, grids)))
+
+    timings = {}
+    for name, function in (("scalar", scalar), ("batched", batched)):
+        best = float("inf")
+        for _ in range(options.repeat):
+            started = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - started)
+        timings[name] = (best, result)
+
+    mismatches = 0
+    for old, new in zip(timings["scalar"][1], timings["batched"][1]):
+        turn = abs(old[1] - new[1])
+        if abs(old[0] - new[0]) > 1 or min(turn, 360 - turn) > 1:
+            mismatches += 1
+    backend = "numpy" if geo.numpy is not None else "pure python"
+    print(f"{options.pairs} grid pairs, batched backend: {backend}")
+    for name, (best, _result) in timings.items():
+        print(f"{name:8} {best * 1000:8.2f} ms")
+    print(f"speedup  {timings['scalar'][0] / timings['batched'][0]:8.1f}x")
+    print(f"mismatches over 1 km or 1 degree: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
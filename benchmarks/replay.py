@@ -0,0 +1,98 @@
+"""
+K6GTE, Replayed feed load test
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.replay                          10k synthetic spots
+python -m benchmarks.replay weekend.jsonl            a recorded feed, as fast as it goes
+python -m benchmarks.replay weekend.jsonl --amplify 12000 --gui
+
+Serves the feed from a local FeedReplayServer, so no network is needed,
+polls it like the program does and prints the PERF timings. With --gui
+every poll also goes through MainWindow.ingest_spots() and redraws the
+band map on the offscreen platform.
+
+Record a feed with
+python -m augratin.lib.feed_replay record weekend.jsonl --duration 7200
+or run augratin --record-api weekend.jsonl to also get the park and
+activator lookups of a session.
+"""
+
+import argparse
+import sys
+import time
+
+from augratin.lib.feed_replay import SPOT_PATH, FeedReplayServer, load_recording
+from augratin.lib.perf import PERF
+from augratin.lib.spot_engine import SpotEngine, getjson
+
+
+def main() -> int:
+    """Replay, poll, report."""
+    cli = argparse.ArgumentParser(description="Load test with a replayed feed.")
+    cli.add_argument("recording", nargs="?", help="Leave out for synthetic spots")
+    cli.add_argument("--amplify", type=int, default=10000, metavar="SPOTS")
+    cli.add_argument("--polls", type=int, default=20)
+    cli.add_argument("--speed", type=float, default=0.0, help="0 = next feed each poll")
+    cli.add_argument("--interval", type=float, default=0.0, help="Seconds between")
+    cli.add_argument("--grid", default="DM13at")
+    cli.add_argument("--gui", action="store_true", help="Redraw the band map too")
+    cli.add_argument("--band", default="20m", help="Band shown with --gui")
+    options = cli.parse_args()
+
+    responses = load_recording(options.recording) if options.recording else []
+    PERF.enabled = True
+    changes = {"added": 0, "updated": 0, "removed": 0}
+    with FeedReplayServer(responses, options.speed, options.amplify) as server:
+        url = f"{server.url}{SPOT_PATH}"
+        if options.gui:
+            # pylint: disable=import-outside-toplevel
+            from benchmarks.suite import main_window
+
+            window, _program = main_window()
+            window.set_band(options.band)
+            PERF.enabled = True
+        else:
+            engine = SpotEngine(url, mygrid=options.grid, prune=True)
+        started = time.perf_counter()
+        for _ in range(options.polls):
+            if options.gui:
+                with PERF.time("spot fetch"):
+                    spots = getjson(url, timeout=30)
+                if spots is None:
+                    print("The replay server didn't answer")
+                    return 1
+                window.mygrid_field.setText(options.grid)
+                window.ingest_spots(spots)
+            else:
+                diff = engine.poll()
+                if diff is None:
+                    print("The replay server didn't answer")
+                    return 1
+                for kind, spots in diff.items():
+                    changes[kind] += len(spots)
+            time.sleep(options.interval)
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{options.polls} polls of {len(server.feeds) or 'synthetic'} feeds, "
+        f"{options.amplify} spots each, in {elapsed:.2f} s"
+    )
+    if options.gui:
+        print(f"{len(window.engine.snapshot)} spots in the table")
+    else:
+        print(
+            f"{changes['added']} added, {changes['updated']} updated, "
+            f"{changes['removed']} removed"
+        )
+    print(f"{'':22} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'max ms':>9}")
+    for name, stat in sorted(PERF.stats().items()):
+        print(
+            f"{name:22} {stat['count']:6} {stat['p50']:9.2f} "
+            f"{stat['p90']:9.2f} {stat['max']:9.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+K6GTE, Spot source throughput against local stand in servers
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.sources_benchmark --rbn-rate 500 --seconds 10
+
+Runs the POTA api from a FeedReplayServer, a DX cluster and an RBN feed
+from ClusterSimulators, all on localhost, and reads them with the spot
+sources into one SpotMerger. Every --merge seconds the merged list goes
+through SpotEngine.ingest() like the band map does. Reports how many
+spots a second were read and kept up with, and what merging and
+ingesting cost.
+"""
+
+import argparse
+import sys
+import time
+
+from augratin.lib.cluster_simulator import ClusterSimulator
+from augratin.lib.feed_replay import SPOT_PATH, FeedReplayServer
+from augratin.lib.perf import PERF
+from augratin.lib.spot_engine import SpotEngine
+from augratin.lib.spot_sources import (
+    HTTPPollSource,
+    SpotMerger,
+    TelnetSource,
+    parse_dx_line,
+)
+
+
+def parse_rate(count: int) -> float:
+    """parse_dx_line() calls a second on simulated RBN lines."""
+    simulator = ClusterSimulator(rbn=True, seed=1)
+    lines = [simulator.line() for _ in range(count)]
+    started = time.perf_counter()
+    for line in lines:
+        parse_dx_line(line, "RBN")
+    return count / (time.perf_counter() - started)
+
+
+def main() -> int:
+    """Stand the servers up, read them, report."""
+    cli = argparse.ArgumentParser(description="Spot source throughput.")
+    cli.add_argument("--seconds", type=float, default=10.0)
+    cli.add_argument("--rbn-rate", type=float, default=500.0, help="Spots a second")
+    cli.add_argument("--cluster-rate", type=float, default=20.0)
+    cli.add_argument("--calls", type=int, default=5000, help="Different callsigns")
+    cli.add_argument("--api-spots", type=int, default=300)
+    cli.add_argument("--merge", type=float, default=2.0, help="Seconds between")
+    options = cli.parse_args()
+
+    print(f"parse_dx_line: {parse_rate(20000):,.0f} lines/s")
+    PERF.enabled = True
+    merger = SpotMerger()
+    engine = SpotEngine(mygrid="DM13at", prune=True)
+    with (
+        FeedReplayServer([], speed=0, amplify_to=options.api_spots) as api,
+        ClusterSimulator(
+            rate=options.cluster_rate, calls=options.calls, seed=2
+        ) as cluster,
+        ClusterSimulator(
+            rate=options.rbn_rate, calls=options.calls, rbn=True, seed=3
+        ) as rbn,
+    ):
+        sources = [
+            HTTPPollSource(f"{api.url}{SPOT_PATH}", interval=5.0).start(merger),
+            TelnetSource("localhost", cluster.port, "K6GTE", "cluster").start(merger),
+            TelnetSource("localhost", rbn.port, "K6GTE", "RBN").start(merger),
+        ]
+        started = time.monotonic()
+        while time.monotonic() - started < options.seconds:
+            time.sleep(options.merge)
+            with PERF.time("merged"):
+                spots = merger.merged()
+            with PERF.time("ingest"):
+                engine.ingest(spots)
+        for source in sources:
+            source.stop()
+        elapsed = time.monotonic() - started
+        sent = cluster.sent + rbn.sent
+        read = sources[1].lines + sources[2].lines
+
+    print(
+        f"{sent} spots sent in {elapsed:.1f} s, {read} read "
+        f"({read / elapsed:,.0f}/s), {merger.received} received by the merger"
+    )
+    print(f"{len(engine.snapshot)} spots in the table after deduplication")
+    print(f"{'':16} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'max ms':>9}")
+    for name, stat in sorted(PERF.stats().items()):
+        print(
+            f"{name:16} {stat['count']:6} {stat['p50']:9.2f} "
+            f"{stat['p90']:9.2f} {stat['max']:9.2f}"
+        )
+    if read < sent * 0.95:
+        print("The sources fell behind the servers")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+K6GTE, Spot feed load test
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.spot_server_benchmark --clients 50 --requests 200 --spots 800
+"""
+
+import argparse
+import http.client
+import random
+import threading
+import time
+
+from augratin.lib.spot_server import SpotServer
+
+
+def synthetic_spots(count: int, seed: int = 1) -> list:
+    """Spots shaped like Database.getspots() rows."""
+    rand = random.Random(seed)
+    return [
+        {
+            "spotId": index,
+            "spotTime": "2026-10-19T12:00:00",
+            "activator": f"K{index}ABC",
+            "frequency": round(rand.uniform(7.0, 29.7), 4),
+            "mode": rand.choice(["CW", "SSB", "FT8"]),
+            "reference": f"K-{rand.randrange(1, 12000):04d}",
+            "parkName": "Synthetic Park",
+            "spotter": "K6GTE",
+            "comments": "599 thanks",
+        }
+        for index in range(count)
+    ]
+
+
+def client(port: int, requests: int, latencies: list, conditional: bool) -> None:
+    """One keep-alive client polling /spots."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    etag = None
+    for _ in range(requests):
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        started = time.perf_counter()
+        connection.request("GET", "/spots", headers=headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        etag = response.getheader("ETag")
+    connection.close()
+
+
+def run(server: SpotServer, clients: int, requests: int, conditional: bool) -> None:
+    """Hammer the server and print the results."""
+    latencies = []
+    threads = [
+        threading.Thread(
+            target=client, args=(server.port, requests, latencies, conditional)
+        )
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    label = "conditional" if conditional else "full body"
+    print(
+        f"{label:12} {len(latencies) / elapsed:8.0f} req/s "
+        f"p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms"
+    )
+
+
+def main():
+    """Load test with many local clients."""
+    cli = argparse.ArgumentParser(description="Load test the local spot feed.")
+    cli.add_argument("--clients", type=int, default=50)
+    cli.add_argument("--requests", type=int, default=200)
+    cli.add_argument("--spots", type=int, default=800)
+    options = cli.parse_args()
+
+    server = SpotServer().start()
+    server.publish(synthetic_spots(options.spots), "12:00")
+    print(
+        f"{options.clients} clients x {options.requests} requests, {options.spots} spots"
+    )
+    run(server, options.clients, options.requests, False)
+    run(server, options.clients, options.requests, True)
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+K6GTE, Benchmark suite with stored baselines
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.suite              compare against the merge base with main
+python -m benchmarks.suite --against v1 compare against the merge base with v1
+python -m benchmarks.suite --baseline F compare against a baseline file
+python -m benchmarks.suite --save       record benchmarks/baseline.json
+python -m benchmarks.suite --only db    run the benchmarks with 'db' in the name
+
+Timings only compare on one machine, so by default the commit this branch
+started from is checked out into a temporary worktree and timed with its
+own suite first, in the same run. A benchmark more than --threshold, 25%
+by default, slower than that fails the run, once the median of --confirm
+more runs agrees. Outside a git checkout benchmarks/baseline.json is
+used, and a baseline recorded on a different kind of machine fails the
+run rather than being compared.
+"""
+
+import argparse
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from json import dumps, loads
+
+from augratin.lib import geo
+from augratin.lib.cat_interface import CAT
+from augratin.lib.feed_replay import random_grid, synthetic_spots
+from augratin.lib.rig_simulator import SIMULATORS
+from augratin.lib.spot_engine import Database, SpotEngine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+MAIN_BRANCHES = ("origin/main", "main", "origin/master", "master")
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """
+    Register a benchmark. The decorated function does the setup and
+    returns (callable to time, cleanup callable or None).
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+class Skip(Exception):
+    """Raised by a setup that can't run here."""
+
+
+def ingested(spots: list) -> list:
+    """Spots with frequencies in MHz and a band, as addspot gets them."""
+    engine = SpotEngine(prune=False)
+    engine.ingest([dict(spot) for spot in spots])
+    return engine.spots()
+
+
+@benchmark("db.addspot.1k")
+def bench_addspot():
+    """Store 1000 spots in an empty table."""
+    spots = ingested(synthetic_spots(1000))
+
+    def run():
+        database = Database()
+        for spot in spots:
+            database.addspot(spot)
+
+    return run, None
+
+
+@benchmark("db.getspotsinband.10k")
+def bench_getspotsinband():
+    """Pull the 20m spots out of a 10k spot table."""
+    database = Database()
+    for spot in ingested(synthetic_spots(10000)):
+        database.addspot(spot)
+    return (lambda: database.getspotsinband(14.0, 14.35)), None
+
+
+@benchmark("engine.ingest.2k")
+def bench_ingest():
+    """A feed poll of 2000 spots that are all in the table already."""
+    spots = synthetic_spots(2000)
+    engine = SpotEngine(mygrid="DM13at")
+    engine.ingest([dict(spot) for spot in spots])
+    return (lambda: engine.ingest([dict(spot) for spot in spots])), None
+
+
+@benchmark("engine.ingest.2k.cold")
+def bench_ingest_cold():
+    """2000 new spots, distance, band, store and index."""
+    spots = synthetic_spots(2000)
+
+    def run():
+        engine = SpotEngine(mygrid="DM13at")
+        engine.ingest([dict(spot) for spot in spots])
+
+    return run, None
+
+
+@benchmark("engine.load_snapshot.2k")
+def bench_load_snapshot():
+    """Warm start from a saved table of 2000 spots."""
+    engine = SpotEngine(mygrid="DM13at")
+    engine.ingest(synthetic_spots(2000))
+    path = os.path.join(tempfile.mkdtemp(prefix="augratin-bench-"), "spots.json")
+    engine.save_snapshot(path)
+    return (lambda: SpotEngine().load_snapshot(path)), lambda: os.remove(path)
+
+
+@benchmark("geo.gridtolatlon.1k")
+def bench_gridtolatlon():
+    """Uncached gridsquare conversions."""
+    rand = random.Random(2)
+    grids = [random_grid(rand) for _ in range(1000)]
+    convert = geo.gridtolatlon.__wrapped__
+
+    def run():
+        for grid in grids:
+            convert(grid)
+
+    return run, None
+
+
+@benchmark("geo.distance_bearing.1k")
+def bench_distance_bearing():
+    """distance() and bearing() one pair at a time."""
+    rand = random.Random(3)
+    grids = [random_grid(rand) for _ in range(1000)]
+
+    def run():
+        for grid in grids:
+            geo.distance("DM13at", grid)
+            geo.bearing("DM13at", grid)
+
+    return run, None
+
+
+@benchmark("geo.distances_bearings.10k")
+def bench_distances_bearings():
+    """The batched call enrich uses."""
+    rand = random.Random(4)
+    grids = [random_grid(rand) for _ in range(10000)]
+    return (lambda: geo.distances_bearings("DM13at", grids)), None
+
+
+def cat_benchmark(interface: str):
+    """get_vfo() round trip against a local simulator."""
+    simulator = SIMULATORS[interface]("localhost", 0).start()
+    cat = CAT(interface, "localhost", simulator.port)
+    return cat.get_vfo, simulator.stop
+
+
+@benchmark("cat.rigctld.get_vfo")
+def bench_rigctld():
+    """rigctld get_vfo() round trip."""
+    return cat_benchmark("rigctld")
+
+
+@benchmark("cat.flrig.get_vfo")
+def bench_flrig():
+    """flrig get_vfo() round trip."""
+    return cat_benchmark("flrig")
+
+
+WINDOW = {}
+
+
+def main_window():
+    """A MainWindow on the offscreen platform, with its own home folder."""
+    if "window" in WINDOW:
+        return WINDOW["window"], WINDOW["module"]
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["HOME"] = tempfile.mkdtemp(prefix="augratin-bench-")
+    argv, sys.argv = sys.argv, ["augratin"]
+    try:
+        # pylint: disable=import-outside-toplevel
+        from PyQt6 import QtCore, QtWidgets
+        from PyQt6.QtCore import Qt
+
+        import augratin.__main__ as program
+    except ImportError as exception:
+        raise Skip(f"no Qt: {exception}") from exception
+    finally:
+        sys.argv = argv
+    QtCore.QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    WINDOW["app"] = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    WINDOW["window"] = program.MainWindow()
+    WINDOW["module"] = program
+    return WINDOW["window"], program
+
+
+def window_with_spots(count: int):
+    """The window showing 'count' spots spread over 20m."""
+    window, _program = main_window()
+    window.engine.clear()
+    window.engine.ingest(synthetic_spots(count, band=(14000, 14350)))
+    window.set_band("20m")
+    return window
+
+
+@benchmark("qt.update.500")
+def bench_update():
+    """Redraw the whole band map with 500 spots on the band."""
+    return window_with_spots(500).update, None
+
+
+@benchmark("qt.update_stations.500")
+def bench_update_stations():
+    """Redraw just the spots, 500 on the band."""
+    return window_with_spots(500).update_stations, None
+
+
+@benchmark("qt.getband.1k")
+def bench_getband():
+    """MainWindow.getband() on kHz strings."""
+    _window, program = main_window()
+    rand = random.Random(5)
+    freqs = [str(rand.randrange(1800, 148000)) for _ in range(1000)]
+    getband = program.MainWindow.getband
+
+    def run():
+        for freq in freqs:
+            getband(freq)
+
+    return run, None
+
+
+def machine() -> str:
+    """What kind of machine a baseline was recorded on, without its name."""
+    parts = (
+        platform.system(),
+        platform.machine(),
+        platform.processor(),
+        f"{os.cpu_count()} cpus",
+        f"Python {platform.python_version()}",
+    )
+    return " ".join(part for part in parts if part)
+
+
+def git(*args) -> str:
+    """Run git in the checkout, returns its output."""
+    return subprocess.run(
+        ["git", *args], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def merge_base(ref: str) -> str:
+    """The commit HEAD branched from 'ref', or the first main branch found."""
+    for candidate in [ref] if ref else MAIN_BRANCHES:
+        try:
+            return git("merge-base", "HEAD", candidate)
+        except (OSError, subprocess.CalledProcessError):
+            continue
+    return ""
+
+
+def reference_run(commit: str, only: str, repeat: int) -> dict:
+    """
+    Time 'commit' with its own copy of the suite, now, on this machine.
+    Returns a baseline dict, or None if it couldn't be run.
+    """
+    folder = tempfile.mkdtemp(prefix="augratin-bench-")
+    tree = os.path.join(folder, "tree")
+    output = os.path.join(folder, "reference.json")
+    git("worktree", "add", "--detach", tree, commit)
+    try:
+        suite = os.path.join(tree, "benchmarks", "suite.py")
+        if not os.path.exists(suite):
+            return None
+        command = [sys.executable, "-m", "benchmarks.suite", "--save"]
+        command += ["--baseline", output, "--only", only, "--repeat", str(repeat)]
+        with open(suite, "rt", encoding="utf-8") as file_descriptor:
+            if "--confirm" in file_descriptor.read():
+                command += ["--confirm", "0"]
+        finished = subprocess.run(
+            command,
+            cwd=tree,
+            env=dict(os.environ, PYTHONPATH=tree),
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if finished.returncode:
+            print(finished.stderr[-2000:])
+            return None
+        with open(output, "rt", encoding="utf-8") as file_descriptor:
+            return loads(file_descriptor.read())
+    finally:
+        git("worktree", "remove", "--force", tree)
+        if os.path.exists(output):
+            os.remove(output)
+        os.rmdir(folder)
+
+
+def measure(function, repeat: int) -> float:
+    """Best seconds per call."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_suite(names: list, repeat: int) -> dict:
+    """{name: seconds per call or None if skipped}"""
+    results = {}
+    for name in names:
+        try:
+            function, cleanup = BENCHMARKS[name]()
+        except Skip as exception:
+            print(f"{name:30} skipped, {exception}")
+            results[name] = None
+            continue
+        try:
+            results[name] = measure(function, repeat)
+        finally:
+            if cleanup is not None:
+                cleanup()
+    return results
+
+
+def main() -> int:
+    """Run, compare, optionally save."""
+    cli = argparse.ArgumentParser(description="Benchmark the hot paths.")
+    cli.add_argument("--only", default="", help="Run names containing this")
+    cli.add_argument("--repeat", type=int, default=9)
+    cli.add_argument("--threshold", type=float, default=0.25, help="0.25 = 25%%")
+    cli.add_argument("--confirm", type=int, default=4, help="Re-runs of a slow result")
+    cli.add_argument("--against", default="", help="Branch to compare with")
+    cli.add_argument("--baseline", help="Compare with this file instead")
+    cli.add_argument("--save", action="store_true", help="Write a new baseline")
+    options = cli.parse_args()
+
+    path = options.baseline or BASELINE
+    baseline = None
+    if not options.save and not options.baseline:
+        commit = merge_base(options.against)
+        if commit:
+            print(f"Timing {commit[:10]} to compare with")
+            baseline = reference_run(commit, options.only, options.repeat)
+        if baseline is not None:
+            baseline["machine"] = machine()
+        else:
+            print(f"No commit to compare with, using {path}")
+    if baseline is None:
+        try:
+            with open(path, "rt", encoding="utf-8") as file_descriptor:
+                baseline = loads(file_descriptor.read())
+        except (OSError, ValueError):
+            baseline = {"results": {}}
+    comparable = baseline.get("machine") == machine()
+
+    names = [name for name in BENCHMARKS if options.only in name]
+    results = run_suite(names, options.repeat)
+
+    def ratio(name: str):
+        old = baseline["results"].get(name, {}).get("seconds")
+        if not old or results[name] is None:
+            return None
+        return results[name] / old - 1
+
+    # A slow result has to repeat before it counts, one busy moment
+    # on the machine shouldn't fail a review. The median of all its runs
+    # is what gets compared.
+    for name in names:
+        if options.save or results[name] is None or not comparable:
+            continue
+        if (ratio(name) or 0) <= options.threshold:
+            continue
+        runs = [results[name]]
+        for _ in range(options.confirm):
+            runs.append(run_suite([name], options.repeat)[name])
+        results[name] = statistics.median(runs)
+
+    regressions = []
+    print(f"{'benchmark':30} {'us/call':>12} {'change':>8}")
+    for name, seconds in results.items():
+        if seconds is None:
+            continue
+        change = ""
+        if ratio(name) is not None:
+            change = f"{ratio(name):+.0%}"
+            if ratio(name) > options.threshold:
+                regressions.append(name)
+                change += " !"
+        print(f"{name:30} {seconds * 1e6:12.1f} {change:>8}")
+
+    if options.save:
+        saved = dict(baseline["results"]) if comparable else {}
+        for name, seconds in results.items():
+            if seconds is not None:
+                saved[name] = {"seconds": seconds}
+        with open(path, "wt", encoding="utf-8") as file_descriptor:
+            file_descriptor.write(
+                dumps(
+                    {"machine": machine(), "results": saved}, indent=4, sort_keys=True
+                )
+                + "\n"
+            )
+        print(f"Saved {path}")
+        return 0
+
+    if not comparable:
+        print(
+            f"NOT COMPARED: the baseline is from "
+            f"{baseline.get('machine', 'an unknown machine')}, this is {machine()}. "
+            "Run from a git checkout or record a baseline here with --save."
+        )
+        return 2
+    if regressions:
+        print(
+            f"{len(regressions)} slower than the baseline by more than "
+            f"{options.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+K6GTE, UDP broadcaster framing check and throughput
+Email: michael.bridak@gmail.com
+GPL V3
+
+python -m benchmarks.udp_benchmark --qsos 20000
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+
+from augratin.lib.udp_broadcast import (
+    WSJTX_LOGGED_ADIF,
+    WSJTX_MAGIC,
+    WSJTX_SCHEMA,
+    UDPBroadcaster,
+    broadcast_adif,
+)
+
+QSO = (
+    "<BAND:3>20M\n<CALL:5>K6GTE\n<SIG:4>POTA\n<SIG_INFO:6>K-0064\n"
+    "<MODE:2>CW\n<QSO_DATE:8>20261019\n<TIME_ON:6>123456\n<EOR>\n"
+)
+
+
+class UDPListener:
+    """Receives datagrams on localhost and checks their framing."""
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.5)
+        self.port = self.sock.getsockname()[1]
+        self.received = 0
+        self.bad = 0
+        self.thread = threading.Thread(target=self.listen, daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self) -> str:
+        """Destination string for UDPBroadcaster."""
+        return f"{self.kind}@127.0.0.1:{self.port}"
+
+    @staticmethod
+    def read_utf8(data: bytes, offset: int) -> tuple:
+        """A QDataStream utf8 string, returns (text, next offset)."""
+        (length,) = struct.unpack_from(">I", data, offset)
+        offset += 4
+        return data[offset : offset + length].decode(), offset + length
+
+    def check(self, data: bytes) -> bool:
+        """Is the datagram the QSO we sent, framed the way it should be."""
+        if self.kind == "adif":
+            return data.decode() == QSO
+        magic, schema, kind = struct.unpack_from(">III", data)
+        if (magic, schema, kind) != (WSJTX_MAGIC, WSJTX_SCHEMA, WSJTX_LOGGED_ADIF):
+            return False
+        client_id, offset = self.read_utf8(data, 12)
+        adif, offset = self.read_utf8(data, offset)
+        return client_id == "AuGratin" and adif.endswith(QSO) and offset == len(data)
+
+    def listen(self) -> None:
+        """Count good and bad datagrams until the socket goes quiet."""
+        while True:
+            try:
+                data = self.sock.recv(65535)
+            except socket.timeout:
+                return
+            self.received += 1
+            if not self.check(data):
+                self.bad += 1
+
+
+def main():
+    """Compare the old one socket per QSO function with the broadcaster."""
+    cli = argparse.ArgumentParser(description="Benchmark UDP QSO broadcasting.")
+    cli.add_argument("--qsos", type=int, default=20000)
+    options = cli.parse_args()
+
+    listener = UDPListener("adif")
+    started = time.perf_counter()
+    for _ in range(options.qsos):
+        broadcast_adif(QSO, f"127.0.0.1:{listener.port}")
+    elapsed = time.perf_counter() - started
+    listener.thread.join()
+    print(
+        f"broadcast_adif: {options.qsos / elapsed:9.0f} QSO/s "
+        f"received {listener.received} bad {listener.bad}"
+    )
+
+    listeners = [UDPListener("adif"), UDPListener("wsjtx")]
+    broadcaster = UDPBroadcaster([listener.address for listener in listeners])
+    started = time.perf_counter()
+    for _ in range(options.qsos):
+        broadcaster.send(QSO)
+    elapsed = time.perf_counter() - started
+    for listener in listeners:
+        listener.thread.join()
+    print(f"UDPBroadcaster: {options.qsos / elapsed:9.0f} QSO/s to 2 destinations")
+    for listener in listeners:
+        print(
+            f"  {listener.kind:6} received {listener.received} bad {listener.bad} "
+            f"{broadcaster.stats[listener.address]}"
+        )
+    broadcaster.close()
+
+
+if __name__ == "__main__":
+    main()
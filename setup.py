@@ -0,0 +1,25 @@
+"""Generates augratin/lib/ui_dialog.py from dialog.ui while building."""
+
+import importlib.util
+
+from setuptools import setup
+from setuptools.command.build_py import build_py
+
+
+class BuildWithUI(build_py):
+    """build_py that compiles the main window UI first."""
+
+    def run(self):
+        spec = importlib.util.spec_from_file_location(
+            "ui_build", "augratin/lib/ui_build.py"
+        )
+        ui_build = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(ui_build)
+        try:
+            ui_build.compile_ui()
+        except ImportError as exception:
+            print(f"Not compiling dialog.ui, loadUi will be used: {exception}")
+        super().run()
+
+
+setup(cmdclass={"build_py": BuildWithUI})
@@ -0,0 +1,60 @@
+"""
+K6GTE, ADIF import tests for the QSO store and worked index
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import pytest
+
+from augratin.lib.adif_index import WorkedIndex
+from augratin.lib.qso_store import QSOStore
+
+
+def qso(call: str, park: str = "K-0064", band: str = "20M", date: str = "20261019"):
+    """One ADIF record the way another logger might write it."""
+    fields = {
+        "CALL": call,
+        "SIG": "POTA",
+        "SIG_INFO": park,
+        "BAND": band,
+        "MODE": "CW",
+        "QSO_DATE": date,
+    }
+    return "".join(f"<{name}:{len(value)}>{value}" for name, value in fields.items())
+
+
+@pytest.fixture(name="log")
+def log_fixture(tmp_path):
+    """An ADIF log of 25 QSOs, one of them twice."""
+    path = tmp_path / "other.adi"
+    records = [qso(f"K{number:04}") for number in range(24)] + [qso("W1AW")] * 2
+    path.write_text(
+        "other logger\n<EOH>\n" + "<EOR>\n".join(records) + "<EOR>\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_store_import_in_batches(log):
+    store = QSOStore(":memory:")
+    assert store.import_adif(str(log), batch=7) == 26
+    assert store.count() == 26
+    assert store.is_dupe("w1aw", "k-0064", "20M", "cw", "20261019")
+
+
+def test_store_import_skips_dupes(log):
+    store = QSOStore(":memory:")
+    assert store.import_adif(str(log), batch=7, skip_dupes=True) == 25
+    assert store.import_adif(str(log), skip_dupes=True) == 0
+    assert store.count() == 25
+
+
+def test_worked_index_import_in_batches(log, tmp_path):
+    worked = WorkedIndex(tmp_path / "ours.adi", tmp_path / "worked.json")
+    stats = worked.import_file(str(log), batch=7)
+    assert stats["records"] == 26
+    assert worked.worked_park("k-0064")
+    assert worked.worked_on("W1AW", "K-0064", "20261019")
+
+    reloaded = WorkedIndex(tmp_path / "ours.adi", tmp_path / "worked.json")
+    assert reloaded.worked_on("K0023", "K-0064", "20261019")
@@ -0,0 +1,61 @@
+"""
+K6GTE, BandPlan edge tests
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import pytest
+
+from augratin.lib.bandplan import BAND_PLAN, BANDS, BandPlan
+
+NUDGE = 0.00001
+
+EDGES = [
+    pytest.param(freq, name, id=f"{name}-{label}")
+    for name, start, end, _step in BANDS
+    for label, freq in (
+        ("lower", start),
+        ("upper", end),
+        ("middle", (start + end) / 2),
+    )
+]
+
+OUTSIDE = [
+    pytest.param(freq, id=f"{name}-{label}")
+    for name, start, end, _step in BANDS
+    for label, freq in (("below", start - NUDGE), ("above", end + NUDGE))
+]
+
+
+@pytest.mark.parametrize("freq, name", EDGES)
+def test_band_edges_are_in_the_band(freq, name):
+    assert BAND_PLAN.band_for(freq) == name
+
+
+@pytest.mark.parametrize("freq", OUTSIDE)
+def test_just_outside_a_band_is_no_band(freq):
+    assert BAND_PLAN.band_for(freq) is None
+
+
+@pytest.mark.parametrize("freq", [0.0, 1000.0, -1.0])
+def test_far_outside_every_band(freq):
+    assert BAND_PLAN.band_for(freq) is None
+
+
+@pytest.mark.parametrize("khz", [5330.5, 5332.0, 5348.0, 5358.5, 5373.0, 5403.5])
+def test_60m_channels_are_on_60m(khz):
+    assert BAND_PLAN.band_for(khz / 1000) == "60m"
+
+
+def test_bands_for_matches_band_for():
+    freqs = [start for _name, start, _end, _step in BANDS] + [0.0, 14.2]
+    assert BAND_PLAN.bands_for(freqs) == [BAND_PLAN.band_for(f) for f in freqs]
+
+
+def test_unsorted_table_and_unknown_band():
+    plan = BandPlan(reversed(BANDS))
+    assert plan.band_for(7.1) == "40m"
+    assert plan.edges("40m") == (7.0, 7.3)
+    assert plan.edges("11m") == (0.0, 1.0)
+    assert plan.step("10m", 1) == (0.001, 4)
+    assert plan.step("11m", 99) == (0.0001, 4)
@@ -0,0 +1,50 @@
+"""
+K6GTE, CATDiscovery tests against the rig simulators
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import os
+import threading
+from types import SimpleNamespace
+
+import psutil
+
+from augratin.lib.cat_discovery import CATDiscovery
+from augratin.lib.rig_simulator import SIMULATORS
+
+
+def test_guesses_the_protocol_and_caches_it():
+    for interface in ("rigctld", "flrig"):
+        with SIMULATORS[interface]("localhost", 0) as simulator:
+            discovery = CATDiscovery(f"localhost:{simulator.port}", ttl=60)
+            assert discovery.discover() == (interface, "localhost", simulator.port)
+            checked = discovery.checked
+            assert discovery.discover() == (interface, "localhost", simulator.port)
+            assert discovery.checked == checked
+            discovery.discover(force=True)
+            assert discovery.checked > checked
+
+
+def test_running_program_is_found_before_any_port():
+    ourselves = psutil.Process(os.getpid()).name().lower()
+    discovery = CATDiscovery(processes={"omnirig": ourselves})
+    assert discovery.discover() == ("omnirig", None, None)
+
+
+def test_background_search_hands_over_the_rig():
+    handed_over = threading.Event()
+    rigs = []
+
+    def callback(rig) -> None:
+        rigs.append(rig)
+        handed_over.set()
+
+    with SIMULATORS["rigctld"]("localhost", 0) as simulator:
+        port = simulator.port
+        discovery = CATDiscovery(f"localhost:{port}", retry=0.05)
+        discovery.connect_in_background(
+            lambda *found: SimpleNamespace(online=True, found=found), callback
+        )
+        assert handed_over.wait(5)
+    assert rigs[0].found == ("rigctld", "localhost", port)
@@ -0,0 +1,76 @@
+"""
+K6GTE, QSOLogger tests
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import time
+
+from augratin.lib import qso_logger
+from augratin.lib.qso_logger import QSOLogger
+
+QSO = "<CALL:5>K6GTE\n<SIG:4>POTA\n<SIG_INFO:6>K-0064\n<MODE:2>CW\n<EOR>\n"
+
+
+class QuietBroadcaster:
+    """Takes every QSO, a QSOLogger needs somewhere to send them."""
+
+    def __init__(self) -> None:
+        self.sent = []
+
+    def send(self, qso: str) -> bool:
+        self.sent.append(qso)
+        return True
+
+    def pending(self) -> int:
+        return 0
+
+    def retry(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+def test_submit_does_not_wait_for_a_slow_disk(tmp_path, monkeypatch):
+    real_fsync = qso_logger.os.fsync
+
+    def slow_fsync(descriptor) -> None:
+        time.sleep(0.2)
+        real_fsync(descriptor)
+
+    monkeypatch.setattr(qso_logger.os, "fsync", slow_fsync)
+    log = QSOLogger(
+        tmp_path / "log.adi",
+        QuietBroadcaster(),
+        spool=tmp_path / "spool.adi",
+    )
+    try:
+        started = time.monotonic()
+        for number in range(5):
+            log.submit(QSO.replace("K6GTE", f"K{number:04}"))
+        assert time.monotonic() - started < 0.1
+        assert log.flush(timeout=10.0)
+    finally:
+        log.close()
+    text = (tmp_path / "log.adi").read_text(encoding="utf-8")
+    assert [f"K{number:04}" in text for number in range(5)] == [True] * 5
+    assert not (tmp_path / "spool.adi").exists()
+
+
+def test_spooled_qsos_are_logged_after_a_crash(tmp_path):
+    spool = tmp_path / "spool.adi"
+    spool.write_text(
+        QSO + QSO.replace("K6GTE", "W1AW") + "<CALL:4>N0CA", encoding="utf-8"
+    )
+    broadcaster = QuietBroadcaster()
+    log = QSOLogger(tmp_path / "log.adi", broadcaster, spool=spool)
+    try:
+        assert log.flush(timeout=5.0, udp=True)
+    finally:
+        log.close()
+    text = (tmp_path / "log.adi").read_text(encoding="utf-8")
+    assert text.index("K6GTE") < text.index("W1AW")
+    assert "N0CA" not in text
+    assert len(broadcaster.sent) == 2
+    assert not spool.exists()
@@ -0,0 +1,77 @@
+"""
+K6GTE, SpotEngine tests
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+from augratin.lib.spot_engine import ADDED, QSY, REMOVED, SpotEngine
+
+
+def spot(spot_id: int, call: str, khz: float, **fields) -> dict:
+    """A spot shaped like the /spot/activator feed."""
+    made = {
+        "spotId": spot_id,
+        "activator": call,
+        "frequency": str(khz),
+        "mode": "CW",
+        "reference": "K-0064",
+        "spotTime": "2025-05-18T12:00:00",
+        "spotter": "K6GTE",
+        "grid6": "DM13at",
+        "grid4": "DM13",
+    }
+    made.update(fields)
+    return made
+
+
+def feed(*spots) -> list:
+    """A fresh copy every poll, ingest() changes the spots it gets."""
+    return [dict(item) for item in spots]
+
+
+def test_ingest_reports_only_changes():
+    engine = SpotEngine(mygrid="DM13at")
+    events = []
+    engine.subscribe(events.extend)
+    first = spot(1, "K6GTE", 14062)
+    engine.ingest(feed(first))
+    assert [event["kind"] for event in events] == [ADDED]
+
+    events.clear()
+    diff = engine.ingest(feed(first))
+    assert not events
+    assert diff == {"added": [], "updated": [], "removed": []}
+
+    engine.ingest(feed(spot(1, "K6GTE", 14070)))
+    assert [event["kind"] for event in events] == [QSY]
+    assert engine.snapshot[1]["frequency"] == 14.07
+
+
+def test_activator_listed_twice_settles_on_the_last():
+    engine = SpotEngine(mygrid="DM13at", prune=True)
+    events = []
+    engine.subscribe(events.extend)
+    twice = feed(spot(1, "W1AW", 14062), spot(2, "W1AW", 7030))
+    engine.ingest(feed(*twice))
+    assert list(engine.snapshot) == [2]
+    assert engine.snapshot[2]["frequency"] == 7.03
+    assert len(engine.spotdb.getspots()) == 1
+
+    for _ in range(3):
+        events.clear()
+        diff = engine.ingest(feed(*twice))
+        assert not events
+        assert diff == {"added": [], "updated": [], "removed": []}
+    assert list(engine.snapshot) == [2]
+
+
+def test_prune_removes_spots_gone_from_the_feed():
+    engine = SpotEngine(prune=True)
+    events = []
+    engine.subscribe(events.extend)
+    engine.ingest(feed(spot(1, "K6GTE", 14062), spot(2, "W1AW", 7030)))
+    events.clear()
+    diff = engine.ingest(feed(spot(1, "K6GTE", 14062)))
+    assert diff["removed"] == [2]
+    assert [event["kind"] for event in events] == [REMOVED]
+    assert engine.by_call == {"K6GTE": 1}
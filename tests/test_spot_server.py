@@ -0,0 +1,88 @@
+"""
+K6GTE, Spot server tests
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import socket
+from json import loads
+
+from augratin.lib.feed_replay import synthetic_spots
+from augratin.lib.spot_server import SpotServer
+from augratin.lib.udp_broadcast import UDPBroadcaster
+
+
+def long_spots(count: int) -> list:
+    """Spots with long comments, a few hundred bytes of JSON each."""
+    spots = synthetic_spots(count)
+    for spot in spots:
+        spot["comments"] = "QRP into a wire in the trees, thanks all " * 5
+    return spots
+
+
+def test_diff_datagrams_fit_max_bytes():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.5)
+    broadcaster = UDPBroadcaster(f"127.0.0.1:{sock.getsockname()[1]}")
+    server = SpotServer(broadcaster=broadcaster, max_bytes=1400)
+    spots = long_spots(60)
+    try:
+        server.publish(spots)
+        server.publish(spots[:20])
+        datagrams = []
+        while True:
+            try:
+                datagrams.append(sock.recv(65535))
+            except socket.timeout:
+                break
+    finally:
+        broadcaster.close()
+        sock.close()
+    assert len(datagrams) > 2
+    assert all(len(datagram) <= 1400 for datagram in datagrams)
+    parts = [loads(datagram) for datagram in datagrams]
+    added = [spot["spotId"] for part in parts for spot in part["added"]]
+    removed = [spot_id for part in parts for spot_id in part["removed"]]
+    assert added == [spot["spotId"] for spot in spots]
+    assert removed == [spot["spotId"] for spot in spots[20:]]
+
+
+class FlakyBroadcaster:
+    """Fails every send until told not to, keeping failures like UDPBroadcaster."""
+
+    def __init__(self) -> None:
+        self.up = False
+        self.queue = []
+        self.delivered = []
+
+    def send(self, text: str) -> bool:
+        if self.up:
+            self.delivered.append(text)
+            return True
+        self.queue.append(text)
+        return False
+
+    def pending(self) -> int:
+        return len(self.queue)
+
+    def retry(self) -> int:
+        waiting, self.queue = self.queue, []
+        for text in waiting:
+            self.send(text)
+        return len(self.queue)
+
+
+def test_unsent_diffs_go_out_before_the_next():
+    broadcaster = FlakyBroadcaster()
+    server = SpotServer(broadcaster=broadcaster)
+    spots = synthetic_spots(3)
+    server.publish(spots[:2])
+    assert broadcaster.pending() == 1
+    broadcaster.up = True
+    server.publish(spots)
+    assert broadcaster.pending() == 0
+    assert [
+        [spot["spotId"] for spot in loads(text)["added"]]
+        for text in broadcaster.delivered
+    ] == [[0, 1], [2]]
@@ -0,0 +1,143 @@
+"""
+K6GTE, Spot source tests against local stand in servers
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import time
+
+from augratin.lib.cluster_simulator import ClusterSimulator
+from augratin.lib.feed_replay import SPOT_PATH, FeedReplayServer, synthetic_spots
+from augratin.lib.spot_engine import SpotEngine
+from augratin.lib.spot_sources import (
+    SOURCE_ID_BASE,
+    HTTPPollSource,
+    SpotMerger,
+    TelnetSource,
+    parse_dx_line,
+)
+
+
+def wait_for(condition, seconds: float = 10.0) -> bool:
+    """Poll 'condition' until it is true or 'seconds' pass."""
+    ends = time.monotonic() + seconds
+    while time.monotonic() < ends:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def pota_spot(call: str, khz: float) -> dict:
+    """An api spot with park details."""
+    spot = synthetic_spots(1)[0]
+    spot.update({"activator": call, "frequency": str(khz), "reference": "K-0064"})
+    return spot
+
+
+def dx_spot(call: str, khz: float, source: str = "RBN") -> dict:
+    """A spot as a telnet source hands it over."""
+    return parse_dx_line(
+        f"DX de W3LPL-#:    {khz}  {call}  CW 12 dB 22 WPM CQ  1200Z", source
+    )
+
+
+def test_parse_dx_line():
+    spot = parse_dx_line(
+        "DX de N6SPT:     14062.0  K6GTE        CW POTA K-0064            1830Z",
+        "cluster",
+    )
+    assert spot["activator"] == "K6GTE"
+    assert spot["frequency"] == "14062.0"
+    assert spot["mode"] == "CW"
+    assert spot["reference"] == "K-0064"
+    assert spot["spotter"] == "N6SPT"
+    assert spot["spotId"] >= SOURCE_ID_BASE
+    assert spot["spotTime"].endswith("18:30:00")
+    assert parse_dx_line("Hello K6GTE, spots follow.", "cluster") is None
+
+
+def test_merger_prefers_the_first_source():
+    merger = SpotMerger()
+    merger.replace("pota", [pota_spot("K6GTE", 14062.0)])
+    merger.add("RBN", [dx_spot("K6GTE", 7030.0), dx_spot("W1AW", 7040.0)])
+    merged = {spot["activator"]: spot for spot in merger.merged()}
+    assert len(merged) == 2
+    assert merged["K6GTE"]["reference"] == "K-0064"
+    assert merged["K6GTE"]["frequency"] == "14062.0"
+    assert merged["W1AW"]["source"] == "RBN"
+
+
+def test_merger_counts_nearby_spots_across_a_khz_boundary():
+    merger = SpotMerger(tolerance=1.0)
+    merger.replace("pota", [pota_spot("K6GTE", 14062.4)])
+    merger.add("RBN", [dx_spot("K6GTE", 14062.6)])
+    merger.add("cluster", [dx_spot("K6GTE", 14080.0, "cluster")])
+    merged = merger.merged()
+    assert len(merged) == 1
+    assert merged[0]["count"] == 2
+
+
+def test_merged_feed_is_stable_in_the_engine():
+    merger = SpotMerger()
+    engine = SpotEngine(prune=True)
+    events = []
+    engine.subscribe(events.extend)
+    merger.replace("pota", [pota_spot("K6GTE", 14062.0)])
+    merger.add("RBN", [dx_spot("K6GTE", 7030.0)])
+    engine.ingest(merger.merged())
+    assert [spot["reference"] for spot in engine.spots()] == ["K-0064"]
+    for _ in range(3):
+        events.clear()
+        merger.add("RBN", [dx_spot("K6GTE", 7030.0)])
+        engine.ingest(merger.merged())
+        assert not events
+
+
+def test_http_poll_source_reads_the_replayed_api():
+    merger = SpotMerger()
+    with FeedReplayServer([], speed=0, amplify_to=50) as api:
+        source = HTTPPollSource(f"{api.url}{SPOT_PATH}", interval=0.2)
+        source.start(merger)
+        try:
+            assert wait_for(lambda: merger.received >= 50)
+        finally:
+            source.stop()
+    merged = merger.merged()
+    assert len(merged) == 50
+    assert all(spot["source"] == "Web" for spot in merged)
+
+
+def test_telnet_source_logs_in_and_merges_into_the_engine():
+    merger = SpotMerger()
+    engine = SpotEngine(mygrid="DM13at", prune=True)
+    with ClusterSimulator(rate=200, calls=20, seed=1) as cluster:
+        source = TelnetSource("localhost", cluster.port, "K6GTE", "cluster")
+        source.start(merger)
+        try:
+            assert wait_for(lambda: merger.received >= 100)
+        finally:
+            source.stop()
+    merged = merger.merged()
+    assert 0 < len(merged) <= 20
+    assert len({spot["activator"] for spot in merged}) == len(merged)
+    assert all(spot["source"] == "cluster" for spot in merged)
+    engine.ingest(merged)
+    assert len(engine.spots()) == len(merged)
+    assert all(spot["band"] for spot in engine.spots())
+
+
+def test_rbn_throughput():
+    merger = SpotMerger()
+    with ClusterSimulator(rate=1000, calls=5000, rbn=True, seed=3) as rbn:
+        source = TelnetSource("localhost", rbn.port, "K6GTE", "RBN")
+        source.start(merger)
+        try:
+            time.sleep(2.0)
+            sent = rbn.sent
+            assert sent >= 1500
+            assert wait_for(lambda: source.lines >= sent, 2.0)
+            # Handed over in batches, the last one a moment later.
+            assert wait_for(lambda: merger.received >= sent * 0.95, 2.0)
+        finally:
+            source.stop()
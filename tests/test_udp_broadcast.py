@@ -0,0 +1,102 @@
+"""
+K6GTE, UDP broadcaster tests against local listeners
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+import socket
+import struct
+
+import pytest
+
+from augratin.lib.udp_broadcast import (
+    WSJTX_LOGGED_ADIF,
+    WSJTX_MAGIC,
+    WSJTX_SCHEMA,
+    UDPBroadcaster,
+)
+
+QSO = (
+    "<BAND:3>20M\n<CALL:5>K6GTE\n<SIG:4>POTA\n<SIG_INFO:6>K-0064\n"
+    "<MODE:2>CW\n<QSO_DATE:8>20261019\n<TIME_ON:6>123456\n<EOR>\n"
+)
+
+
+@pytest.fixture(name="listen")
+def listen_fixture():
+    """Makes UDP sockets bound to a free localhost port, closed afterwards."""
+    sockets = []
+
+    def make() -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(2.0)
+        sockets.append(sock)
+        return sock
+
+    yield make
+    for sock in sockets:
+        sock.close()
+
+
+def read_utf8(data: bytes, offset: int) -> tuple:
+    """A QDataStream utf8 string, returns (text, next offset)."""
+    (length,) = struct.unpack_from(">I", data, offset)
+    offset += 4
+    return data[offset : offset + length].decode(), offset + length
+
+
+def test_adif_and_wsjtx_destinations(listen):
+    adif, wsjtx = listen(), listen()
+    broadcaster = UDPBroadcaster(
+        f"127.0.0.1:{adif.getsockname()[1]},"
+        f"wsjtx@127.0.0.1:{wsjtx.getsockname()[1]}"
+    )
+    try:
+        assert broadcaster.send(QSO)
+        assert adif.recv(65535).decode() == QSO
+
+        data = wsjtx.recv(65535)
+        assert struct.unpack_from(">III", data) == (
+            WSJTX_MAGIC,
+            WSJTX_SCHEMA,
+            WSJTX_LOGGED_ADIF,
+        )
+        client_id, offset = read_utf8(data, 12)
+        text, offset = read_utf8(data, offset)
+        assert client_id == "AuGratin"
+        assert text.endswith(QSO)
+        assert offset == len(data)
+    finally:
+        broadcaster.close()
+    assert [stats["sent"] for stats in broadcaster.stats.values()] == [1, 1]
+
+
+def test_one_socket_for_many_qsos(listen):
+    sock = listen()
+    broadcaster = UDPBroadcaster([f"adif@127.0.0.1:{sock.getsockname()[1]}"])
+    try:
+        for number in range(20):
+            assert broadcaster.send(QSO.replace("K6GTE", f"K{number:04}"))
+        received = [sock.recv(65535).decode() for _ in range(20)]
+    finally:
+        broadcaster.close()
+    assert received == [QSO.replace("K6GTE", f"K{number:04}") for number in range(20)]
+
+
+def test_failed_sends_are_retried_then_dropped(listen):
+    sock = listen()
+    destination = f"127.0.0.1:{sock.getsockname()[1]}"
+    broadcaster = UDPBroadcaster(destination, attempts=3)
+    try:
+        # Too big for any datagram, every try fails.
+        assert not broadcaster.send("x" * 70000)
+        assert broadcaster.pending() == 1
+        assert broadcaster.retry() == 1
+        assert broadcaster.retry() == 0
+    finally:
+        broadcaster.close()
+    stats = broadcaster.stats[destination]
+    assert stats["errors"] == 3
+    assert stats["retried"] == 2
+    assert stats["dropped"] == 1
@@ -0,0 +1,122 @@
+"""
+K6GTE, Watch list and alert tests
+Email: michael.bridak@gmail.com
+GPL V3
+"""
+
+from augratin.lib.spot_engine import SpotEngine
+from augratin.lib.watch import PrefixTrie, WatchAlerts, WatchList
+
+
+def spot(spot_id: int, call: str, khz: float, **fields) -> dict:
+    """A spot shaped like the /spot/activator feed."""
+    made = {
+        "spotId": spot_id,
+        "activator": call,
+        "frequency": str(khz),
+        "mode": "CW",
+        "reference": "K-0064",
+        "locationDesc": "US-CA",
+        "spotTime": "2025-05-18T12:00:00",
+        "spotter": "K6GTE",
+        "grid6": "DM13at",
+        "grid4": "DM13",
+    }
+    made.update(fields)
+    return made
+
+
+def test_prefix_trie_finds_every_prefix():
+    trie = PrefixTrie()
+    trie.add("K-", "us")
+    trie.add("K-00", "low")
+    trie.add("VE-", "canada")
+    trie.add("", "everything")
+    assert trie.matches("K-0064") == {"us", "low", "everything"}
+    assert trie.matches("K-1234") == {"us", "everything"}
+    assert trie.matches("VE-0001") == {"canada", "everything"}
+    trie.discard("K-00", "low")
+    trie.discard("G-", "never added")
+    assert trie.matches("K-0064") == {"us", "everything"}
+
+
+def test_exact_call_matches_portable_forms():
+    watchlist = WatchList(["k6gte"])
+    assert watchlist.matches(spot(1, "K6GTE", 14062))
+    assert watchlist.matches(spot(2, "K6GTE/P", 14062))
+    assert watchlist.matches(spot(3, "VE3/K6GTE", 14062))
+    assert not watchlist.matches(spot(4, "K6GTEX", 14062))
+    assert not watchlist.matches(spot(5, "W1AW", 14062))
+
+
+def test_park_prefix_and_rules_with_several_fields():
+    watchlist = WatchList(
+        [{"park": "k-00"}, {"park": "VE-", "mode": "ssb"}, {"location": "US-NV"}]
+    )
+    assert watchlist.matches(spot(1, "W1AW", 14062, reference="K-0064"))
+    assert not watchlist.matches(spot(2, "W1AW", 14062, reference="K-1064"))
+    assert not watchlist.matches(spot(3, "VE3XX", 14062, reference="VE-0001"))
+    assert watchlist.matches(spot(4, "VE3XX", 14250, reference="VE-0001", mode="SSB"))
+    assert watchlist.matches(
+        spot(5, "W7X", 7030, reference="K-4000", locationDesc="US-CA,US-NV")
+    )
+
+
+def test_removing_and_toggling_rules():
+    watchlist = WatchList()
+    park = watchlist.add({"park": "K-0064"})
+    assert watchlist.add({"park": "k-0064"}) == park
+    assert watchlist.add({"nothing": "here"}) is None
+    assert watchlist.toggle_call("W1AW")
+    assert watchlist.matches(spot(1, "W1AW", 14062, reference="K-1000"))
+    assert not watchlist.toggle_call("w1aw/p")
+    assert not watchlist.matches(spot(1, "W1AW", 14062, reference="K-1000"))
+    watchlist.remove(park)
+    watchlist.remove(park)
+    assert not watchlist.matches(spot(2, "N0CA", 14062, reference="K-0064"))
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "watched.json")
+    WatchList(["K6GTE", {"park": "K-0064", "mode": "CW"}]).save(path)
+    watchlist = WatchList()
+    assert watchlist.load(path) == 2
+    assert watchlist.matches(spot(1, "K6GTE/M", 14062, reference="K-9999"))
+    assert watchlist.matches(spot(2, "W1AW", 14062))
+    assert WatchList().load(str(tmp_path / "missing.json")) == 0
+
+
+def test_alerts_once_per_arrival_or_qsy():
+    alerts = []
+    watch = WatchAlerts(WatchList(["K6GTE"]), alerts.append)
+    engine = SpotEngine(mygrid="DM13at", prune=True)
+    engine.subscribe(watch.events)
+
+    engine.ingest([spot(1, "K6GTE", 14062), spot(2, "W1AW", 14070)])
+    assert [[found["spotId"] for found, _ in batch] for batch in alerts] == [[1]]
+    assert watch.watched == {1}
+
+    # Polled again, and respotted with a new comment, no new alert.
+    engine.ingest([spot(1, "K6GTE", 14062), spot(2, "W1AW", 14070)])
+    engine.ingest([spot(3, "K6GTE", 14062, comments="QRT soon")])
+    assert len(alerts) == 1
+    assert watch.watched == {3}
+
+    # Moved frequency, alert again.
+    engine.ingest([spot(4, "K6GTE", 7030)])
+    assert len(alerts) == 2
+    assert watch.watched == {4}
+
+    # Gone from the feed.
+    engine.ingest([spot(2, "W1AW", 14070)])
+    assert watch.watched == set()
+
+
+def test_rescan_after_the_rules_change():
+    engine = SpotEngine(mygrid="DM13at")
+    engine.ingest([spot(1, "K6GTE", 14062), spot(2, "W1AW", 14070)])
+    watchlist = WatchList()
+    watch = WatchAlerts(watchlist)
+    watchlist.toggle_call("W1AW")
+    watch.rescan(engine.spots())
+    assert watch.watched == {2}